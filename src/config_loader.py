@@ -1,8 +1,10 @@
 from __future__ import annotations
 
 import json
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from types import MappingProxyType
+from typing import Any, Mapping
 
 import yaml
 
@@ -25,6 +27,18 @@ class ConfigError(ValueError):
     pass
 
 
+@dataclass(frozen=True)
+class CompiledToken:
+    symbol: str
+    address: str
+    checksum_address: str
+
+
+@dataclass(frozen=True)
+class RuntimeConfig:
+    tokens: Mapping[str, CompiledToken]
+
+
 def _load_raw(path: Path) -> dict[str, Any]:
     text = path.read_text(encoding="utf-8")
     if path.suffix.lower() in {".yaml", ".yml"}:
@@ -39,8 +53,8 @@ def validate_config(cfg: dict[str, Any]) -> dict[str, Any]:
     if missing:
         raise ConfigError(f"Missing required config keys: {sorted(missing)}")
 
-    if cfg["quote_source"] not in {"1inch", "uniswap"}:
-        raise ConfigError("quote_source must be '1inch' or 'uniswap'")
+    if cfg["quote_source"] not in {"1inch", "uniswap", "composite"}:
+        raise ConfigError("quote_source must be '1inch' or 'uniswap' (or 'composite' to combine them)")
 
     if not isinstance(cfg["tokens"], dict) or not cfg["tokens"]:
         raise ConfigError("tokens must be a non-empty map")
@@ -63,8 +77,22 @@ def validate_config(cfg: dict[str, Any]) -> dict[str, Any]:
     cfg.setdefault("min_pool_liquidity_usd", None)
     cfg.setdefault("top_n", 10)
     cfg.setdefault("max_concurrency", 8)
+    cfg.setdefault("cycle_deadline_sec", None)
     cfg.setdefault("uniswap", {})
     cfg.setdefault("sanity", {})
+    cfg.setdefault("quote_cache", {})
+    cfg.setdefault("sharding", {})
+    cfg.setdefault("multichain", {})
+    cfg.setdefault("pruning", {})
+    cfg.setdefault("rpc_urls", [])
+    cfg.setdefault("circuit_breaker", {})
+    cfg.setdefault("composite", {})
+    cfg.setdefault("curve_model", {})
+    cfg.setdefault("snapshot", {})
+    cfg.setdefault("feed", {})
+    cfg.setdefault("pool_index", {})
+    cfg.setdefault("logging", {})
+    cfg.setdefault("rpc_pool", {})
 
     cfg["sanity"].setdefault("enabled", True)
     cfg["sanity"].setdefault("max_jump_ratio", 1000)
@@ -84,10 +112,123 @@ def validate_config(cfg: dict[str, Any]) -> dict[str, Any]:
     uni.setdefault("quoter_v2_address", "")
     uni.setdefault("quoter_address", "")
     uni.setdefault("check_pool_state", True)
+    uni.setdefault("path_quotes", False)
+    uni.setdefault("max_path_combos", 27)
+
+    quote_cache = cfg["quote_cache"]
+    quote_cache.setdefault("enabled", True)
+    quote_cache.setdefault("track_touched_pools", False)
+
+    sharding = cfg["sharding"]
+    sharding.setdefault("cost_ewma_alpha", 0.3)
+    sharding.setdefault("rebalance_imbalance", 1.25)
+
+    cfg["multichain"].setdefault("max_backoff_sec", 60)
+
+    pruning = cfg["pruning"]
+    pruning.setdefault("enabled", False)
+    pruning.setdefault("min_net_usd", 0.0)
+    pruning.setdefault("optimism_bps", 50)
+    pruning.setdefault("rate_ttl_sec", 30)
+    if float(pruning["rate_ttl_sec"]) <= 0:
+        raise ConfigError("pruning.rate_ttl_sec must be > 0")
+
+    if cfg["cycle_deadline_sec"] is not None and float(cfg["cycle_deadline_sec"]) <= 0:
+        raise ConfigError("cycle_deadline_sec must be positive (or null for no budget)")
+
+    if not isinstance(cfg["rpc_urls"], list):
+        raise ConfigError("rpc_urls must be a list of extra RPC endpoints")
+    rpc_pool = cfg["rpc_pool"]
+    rpc_pool.setdefault("ewma_alpha", 0.2)
+    rpc_pool.setdefault("error_penalty", 10.0)
+    rpc_pool.setdefault("hedge", True)
+    rpc_pool.setdefault("hedge_methods", ["eth_call", "eth_gasPrice"])
+    rpc_pool.setdefault("hedge_quantile", 0.95)
+    rpc_pool.setdefault("hedge_min_delay_ms", 20)
+    rpc_pool.setdefault("hedge_default_delay_ms", 250)
+    rpc_pool.setdefault("timeout_sec", 10)
+
+    breaker = cfg["circuit_breaker"]
+    breaker.setdefault("enabled", True)
+    breaker.setdefault("failure_threshold", 3)
+    breaker.setdefault("base_cooldown_sec", 30)
+    breaker.setdefault("max_cooldown_sec", 1800)
+    breaker.setdefault(
+        "tracked_errors",
+        ["pool_not_found", "low_liquidity", "no_viable_fee_tier", "missing_dst_amount", "http_400", "http_404", "http_422"],
+    )
+
+    composite = cfg["composite"]
+    composite.setdefault("sources", ["1inch", "uniswap"])
+    composite.setdefault("deadline_ms", 3000)
+    composite.setdefault("min_samples", 20)
+    composite.setdefault("stats_window", 200)
+    composite.setdefault("reprobe_every", 50)
+    composite.setdefault("early_cancel_win_rate", None)
+    unknown = set(composite["sources"]) - {"1inch", "uniswap"}
+    if not composite["sources"] or unknown:
+        raise ConfigError(f"composite.sources must list '1inch' and/or 'uniswap', got {composite['sources']}")
+
+    curve = cfg["curve_model"]
+    curve.setdefault("enabled", False)
+    curve.setdefault("ttl_sec", 30)
+    curve.setdefault("max_error_bps", 25)
+    curve.setdefault("extrapolate_factor", 2.0)
+    curve.setdefault("finalists", 20)
+
+    snapshot = cfg["snapshot"]
+    snapshot.setdefault("enabled", False)
+    snapshot.setdefault("path", None)
+    snapshot.setdefault("interval_sec", 300)
+    snapshot.setdefault("max_age_sec", 86400)
+    snapshot.setdefault("volatile_max_age_sec", 300)
+
+    feed = cfg["feed"]
+    feed.setdefault("enabled", False)
+    feed.setdefault("host", "127.0.0.1")
+    feed.setdefault("port", 8765)
+    feed.setdefault("top_n", None)
+    feed.setdefault("client_queue_size", 256)
+
+    pool_index = cfg["pool_index"]
+    pool_index.setdefault("enabled", False)
+    pool_index.setdefault("path", None)
+    pool_index.setdefault("start_block", 0)
+    pool_index.setdefault("chunk_blocks", 2000)
+    pool_index.setdefault("sync_on_start", True)
+    pool_index.setdefault("enumerate_routes", False)
+    pool_index.setdefault("catch_up_interval_sec", 300)
+    if float(pool_index["catch_up_interval_sec"]) < 0:
+        raise ConfigError("pool_index.catch_up_interval_sec must be >= 0")
+
+    log_cfg = cfg["logging"]
+    log_cfg.setdefault("mode", "full")
+    log_cfg.setdefault("net_change_usd", 0.05)
+    log_cfg.setdefault("net_thresholds_usd", [0.0])
+    log_cfg.setdefault("ewma_alpha", 0.2)
+    log_cfg.setdefault("hit_min_net_usd", 0.0)
+    log_cfg.setdefault("summary_interval_sec", 300)
+    if log_cfg["mode"] not in {"full", "changes"}:
+        raise ConfigError("logging.mode must be 'full' or 'changes'")
 
     return cfg
 
 
+def compile_config(cfg: dict[str, Any]) -> RuntimeConfig:
+    # eth_utils is a web3 dependency but far cheaper to import than web3 itself.
+    from eth_utils import to_checksum_address
+
+    compiled: dict[str, CompiledToken] = {}
+    for symbol, token in cfg["tokens"].items():
+        try:
+            checksum = to_checksum_address(token["address"])
+        except ValueError as exc:
+            raise ConfigError(f"token {symbol} has invalid address: {token['address']}") from exc
+        compiled[symbol] = CompiledToken(symbol=symbol, address=token["address"], checksum_address=checksum)
+    return RuntimeConfig(tokens=MappingProxyType(compiled))
+
+
 def load_config(path: str) -> dict[str, Any]:
-    cfg = _load_raw(Path(path))
-    return validate_config(cfg)
+    cfg = validate_config(_load_raw(Path(path)))
+    cfg["runtime"] = compile_config(cfg)
+    return cfg
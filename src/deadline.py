@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+DEADLINE_EXCEEDED = "deadline_exceeded"
+
+# Absolute time.monotonic() deadline of the current cycle. Tasks and to_thread calls copy the context
+# when they are created, so every quote started inside a cycle sees that cycle's budget.
+_cycle_deadline: ContextVar[float | None] = ContextVar("cycle_deadline", default=None)
+
+
+@contextmanager
+def cycle_deadline(budget_sec: float | None) -> Iterator[float | None]:
+    deadline = None if budget_sec is None else time.monotonic() + float(budget_sec)
+    token = _cycle_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _cycle_deadline.reset(token)
+
+
+def remaining() -> float | None:
+    """Seconds left in the current cycle's budget, or None when no budget is set."""
+    deadline = _cycle_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def bounded(timeout_sec: float) -> float:
+    left = remaining()
+    return timeout_sec if left is None else max(0.0, min(timeout_sec, left))
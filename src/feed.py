@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import json
+from typing import Any
+from urllib.parse import urlsplit
+
+from src.records import RouteResult
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+MAX_HEADER_BYTES = 16 * 1024
+# Clients only ever send short commands ("snapshot") and pings; anything bigger is refused with 1009.
+MAX_WS_FRAME_BYTES = 4 * 1024
+WS_CLOSE_TOO_BIG = 1009
+
+
+class WsFrameTooLarge(ValueError):
+    pass
+
+
+def route_view(row: RouteResult) -> dict[str, Any]:
+    return {
+        "id": row.route_id,
+        "ts_iso": row.ts_iso,
+        "route_type": row.route_type,
+        "route_symbols": row.route_symbols,
+        "amount_in_human": row.amount_in_human,
+        "status": row.status,
+        "error_message": row.error_message,
+        "gross_return_usd_est": row.gross_return_usd_est,
+        "net_usd_est": row.net_usd_est,
+    }
+
+
+def _ws_frame(payload: bytes, opcode: int = 0x1) -> bytes:
+    n = len(payload)
+    if n < 126:
+        header = bytes([0x80 | opcode, n])
+    elif n < 65536:
+        header = bytes([0x80 | opcode, 126]) + n.to_bytes(2, "big")
+    else:
+        header = bytes([0x80 | opcode, 127]) + n.to_bytes(8, "big")
+    return header + payload
+
+
+async def _read_ws_frame(reader: asyncio.StreamReader, max_bytes: int | None = None) -> tuple[int, bytes]:
+    b0, b1 = await reader.readexactly(2)
+    n = b1 & 0x7F
+    if n == 126:
+        n = int.from_bytes(await reader.readexactly(2), "big")
+    elif n == 127:
+        n = int.from_bytes(await reader.readexactly(8), "big")
+    if max_bytes is not None and n > max_bytes:
+        # Checked before reading the payload, so a bogus length can't make us buffer it.
+        raise WsFrameTooLarge(f"frame of {n} bytes exceeds {max_bytes}")
+    mask = await reader.readexactly(4) if b1 & 0x80 else b"\0\0\0\0"
+    data = await reader.readexactly(n)
+    return b0 & 0x0F, bytes(c ^ mask[i % 4] for i, c in enumerate(data))
+
+
+class FeedClient:
+    __slots__ = ("queue", "dropped", "kind")
+
+    def __init__(self, kind: str, queue_size: int) -> None:
+        self.kind = kind
+        self.queue: asyncio.Queue[tuple[str, dict[str, Any]]] = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+
+class FeedServer:
+    """Pushes top-N and per-route changes to SSE / WebSocket subscribers and serves snapshots from memory."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, top_n: int = 10, queue_size: int = 256) -> None:
+        self.host = host
+        self.port = port
+        self.top_n = top_n
+        self.queue_size = queue_size
+        self.routes: dict[str, dict[str, Any]] = {}
+        self.top: list[dict[str, Any]] = []
+        self.cycles = 0
+        self.clients: set[FeedClient] = set()
+        self._server: asyncio.Server | None = None
+        self._handlers: set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, limit=MAX_HEADER_BYTES)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            # Streaming handlers never finish on their own; wait_closed alone would leave them dangling.
+            for task in list(self._handlers):
+                task.cancel()
+            await asyncio.gather(*self._handlers, return_exceptions=True)
+            await self._server.wait_closed()
+
+    def snapshot(self) -> dict[str, Any]:
+        return {"cycles": self.cycles, "top": self.top, "routes": list(self.routes.values())}
+
+    def _broadcast(self, event: str, data: dict[str, Any]) -> None:
+        for client in self.clients:
+            try:
+                client.queue.put_nowait((event, data))
+            except asyncio.QueueFull:
+                # Never wait on a slow consumer: throw its backlog away and have it start over from a snapshot.
+                client.dropped += client.queue.qsize()
+                while not client.queue.empty():
+                    client.queue.get_nowait()
+                client.queue.put_nowait(("resync", self.snapshot()))
+
+    def publish_cycle(self, results: list[RouteResult], label: str | None = None) -> None:
+        self.cycles += 1
+        for row in results:
+            view = route_view(row)
+            if label is not None:
+                view["chain"] = label
+            key = view["id"] if label is None else f"{label}/{view['id']}"
+            prev = self.routes.get(key)
+            self.routes[key] = view
+            if prev is None or prev["status"] != view["status"] or prev["net_usd_est"] != view["net_usd_est"]:
+                self._broadcast("route", view)
+        self._refresh_top()
+
+    def retain(self, route_ids: set[str], label: str | None = None) -> None:
+        """Forget routes a reload removed (only those of `label` in multichain mode) and refresh top-N."""
+        for key, view in list(self.routes.items()):
+            if view.get("chain") == label and view["id"] not in route_ids:
+                del self.routes[key]
+                gone = {"id": view["id"]}
+                if label is not None:
+                    gone["chain"] = label
+                self._broadcast("route_removed", gone)
+        self._refresh_top()
+
+    def _refresh_top(self) -> None:
+        ranked = sorted((v for v in self.routes.values() if v["net_usd_est"] is not None), key=lambda v: v["net_usd_est"], reverse=True)
+        top = ranked[: self.top_n]
+        if [(v["id"], v["net_usd_est"]) for v in top] != [(v["id"], v["net_usd_est"]) for v in self.top]:
+            self.top = top
+            self._broadcast("top", {"cycle": self.cycles, "top": top})
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        task.add_done_callback(self._handlers.discard)
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            writer.close()
+            return
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            writer.close()
+            return
+        headers = {k.strip().lower(): v.strip() for k, _, v in (ln.partition(":") for ln in lines[1:] if ln)}
+        path = urlsplit(target).path
+        try:
+            if method != "GET":
+                await self._respond(writer, 405, {"error": "method_not_allowed"})
+            elif path == "/snapshot":
+                await self._respond(writer, 200, self.snapshot())
+            elif path == "/top":
+                await self._respond(writer, 200, {"cycle": self.cycles, "top": self.top})
+            elif path == "/events":
+                await self._serve_sse(writer)
+            elif path == "/ws" and headers.get("upgrade", "").lower() == "websocket":
+                await self._serve_ws(reader, writer, headers)
+            else:
+                await self._respond(writer, 404, {"error": "not_found"})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, body: dict[str, Any]) -> None:
+        payload = json.dumps(body).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode()
+            + payload
+        )
+        await writer.drain()
+
+    async def _serve_sse(self, writer: asyncio.StreamWriter) -> None:
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\nConnection: keep-alive\r\n\r\n")
+        client = FeedClient("sse", self.queue_size)
+        client.queue.put_nowait(("snapshot", self.snapshot()))
+        self.clients.add(client)
+        try:
+            while True:
+                event, data = await client.queue.get()
+                writer.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode())
+                await writer.drain()
+        finally:
+            self.clients.discard(client)
+
+    async def _serve_ws(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, headers: dict[str, str]) -> None:
+        key = headers.get("sec-websocket-key")
+        if not key:
+            await self._respond(writer, 400, {"error": "missing_websocket_key"})
+            return
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        writer.write(
+            "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n".encode()
+        )
+        client = FeedClient("ws", self.queue_size)
+        client.queue.put_nowait(("snapshot", self.snapshot()))
+        self.clients.add(client)
+
+        async def pump() -> None:
+            try:
+                while True:
+                    event, data = await client.queue.get()
+                    writer.write(_ws_frame(json.dumps({"event": event, "data": data}).encode()))
+                    await writer.drain()
+            except ConnectionError:
+                pass
+
+        sender = asyncio.create_task(pump())
+        try:
+            while True:
+                try:
+                    opcode, payload = await _read_ws_frame(reader, MAX_WS_FRAME_BYTES)
+                except WsFrameTooLarge:
+                    writer.write(_ws_frame(WS_CLOSE_TOO_BIG.to_bytes(2, "big"), opcode=0x8))
+                    await writer.drain()
+                    break
+                if opcode == 0x8:
+                    writer.write(_ws_frame(payload[:2], opcode=0x8))
+                    break
+                if opcode == 0x9:
+                    writer.write(_ws_frame(payload, opcode=0xA))
+                elif opcode == 0x1 and payload.strip() == b"snapshot":
+                    # Queries are answered inline so they are not stuck behind a backlog of updates.
+                    writer.write(_ws_frame(json.dumps({"event": "snapshot", "data": self.snapshot()}).encode()))
+        finally:
+            sender.cancel()
+            self.clients.discard(client)
+
+
+def build_feed(cfg: dict[str, Any]) -> FeedServer | None:
+    feed_cfg = cfg["feed"]
+    if not feed_cfg["enabled"]:
+        return None
+    return FeedServer(
+        host=feed_cfg["host"],
+        port=int(feed_cfg["port"]),
+        top_n=int(feed_cfg["top_n"] or cfg["top_n"]),
+        queue_size=int(feed_cfg["client_queue_size"]),
+    )
@@ -3,15 +3,42 @@ from __future__ import annotations
 import json
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Any, Iterable
+
+
+# `json.dumps` with non-default options builds a fresh encoder per call, about a third of a row's serialization cost.
+_encode = json.JSONEncoder(ensure_ascii=False).encode
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _payload(record: Any) -> dict:
+    return record if isinstance(record, dict) else record.to_dict()
+
+
+def encode_line(record: Any) -> str:
+    return _encode(_payload(record)) + "\n"
 
 
 class JsonlLogger:
-    def __init__(self, log_dir: str = "logs") -> None:
+    def __init__(self, log_dir: str = "logs", suffix: str = "") -> None:
         self.log_dir = Path(log_dir)
         self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.suffix = suffix
 
-    def write(self, record: dict) -> None:
+    def _out_path(self) -> Path:
         day = datetime.now(timezone.utc).strftime("%Y%m%d")
-        out_path = self.log_dir / f"{day}.jsonl"
-        with out_path.open("a", encoding="utf-8") as f:
-            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return self.log_dir / f"{day}{self.suffix}.jsonl"
+
+    def write(self, record: Any) -> None:
+        with self._out_path().open("a", encoding="utf-8") as f:
+            f.write(encode_line(record))
+
+    def write_many(self, records: Iterable[Any]) -> None:
+        lines = [encode_line(r) for r in records]
+        if not lines:
+            return
+        with self._out_path().open("a", encoding="utf-8") as f:
+            f.writelines(lines)
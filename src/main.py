@@ -2,28 +2,144 @@ from __future__ import annotations
 
 import argparse
 import asyncio
-from datetime import datetime, timezone
-from typing import Any
-
-from web3 import Web3
+import time
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Callable
 
 from src.config_loader import load_config
-from src.logger import JsonlLogger
-from src.pricing.usd import estimate_amount_usd, infer_eth_usd, infer_token_usd
-from src.quote.oneinch import OneInchQuoteProvider
-from src.quote.uniswap_v3 import UniswapV3QuoteProvider
-from src.routes.enumerate import enumerate_loops2, enumerate_triangles3
-from src.tokens import from_wei, to_wei
+from src.deadline import DEADLINE_EXCEEDED, cycle_deadline, remaining
+from src.feed import build_feed
+from src.logger import now_iso
+from src.pool_index import PoolIndex, open_pool_index, sync_pool_index
+from src.pricing.usd import infer_eth_price_fp, infer_token_price_fp
+from src.quote.breaker import BreakerQuoteProvider, BreakerRegistry
+from src.quote.cache import BlockQuoteCache, fetch_touched_pools
+from src.quote.curve import CURVE_SCREENED, build_curve_model
+from src.reload import PROVIDER_KEYS, RESTART_KEYS, ROUTE_KEYS, ConfigWatcher, diff_config, iter_providers
+from src.records import HopRecord, RouteFlags, RouteResult, route_id
+from src.route_stats import RouteLog
+from src.routes.enumerate import enumerate_linked_routes, enumerate_loops2, enumerate_triangles3, route_hops
+from src.routes.prune import PRUNE_PARTIAL, PRUNE_UPPER_BOUND, ProfitPruner
+from src.snapshot import SnapshotSaver, snapshot_path
+from src.tokens import fixed_to_float, scale_of, to_wei
+from src.workers import to_thread
+
+if TYPE_CHECKING:
+    import httpx
+    from web3 import Web3
+
+WEI_PER_ETH = 10**18
+# Slippage buffers may be fractional bps; keep six decimals of them in integer math.
+BPS_DECIMALS = 6
+BPS_DENOM = 10_000 * 10**BPS_DECIMALS
+
+
+def needs_rpc(cfg: dict[str, Any]) -> bool:
+    # 1inch with a fixed gas price never touches the chain, so skip loading web3 entirely.
+    return "uniswap" in quote_sources(cfg) or cfg.get("gas_price_gwei_override") is None
+
 
+def make_w3(cfg: dict[str, Any], session=None) -> Web3:
+    from web3 import Web3
 
-def now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
+    if cfg["rpc_urls"]:
+        from src.rpc_pool import PooledHTTPProvider, build_rpc_pool
 
+        return Web3(PooledHTTPProvider(build_rpc_pool(cfg)))
+    from src.rpc_pool import DeadlineHTTPProvider
 
-def build_provider(cfg: dict[str, Any], w3: Web3):
-    if cfg["quote_source"] == "1inch":
-        return OneInchQuoteProvider(cfg["chain_id"], cfg["tokens"], cfg["oneinch"])
-    return UniswapV3QuoteProvider(w3, cfg["tokens"], cfg["uniswap"], cfg.get("min_pool_liquidity_usd"))
+    return Web3(DeadlineHTTPProvider(cfg["rpc_url"], session=session))
+
+
+def quote_sources(cfg: dict[str, Any]) -> list[str]:
+    if cfg["quote_source"] == "composite":
+        return list(cfg["composite"]["sources"])
+    return [cfg["quote_source"]]
+
+
+def _build_source(
+    name: str,
+    cfg: dict[str, Any],
+    w3: Web3,
+    cache: BlockQuoteCache | None,
+    http_client: httpx.AsyncClient | None,
+    breakers: BreakerRegistry | None,
+):
+    # Provider modules are imported on demand so a 1inch-only run never loads web3 contract machinery.
+    if name == "1inch":
+        from src.quote.oneinch import OneInchQuoteProvider
+
+        return OneInchQuoteProvider(cfg["chain_id"], cfg["tokens"], cfg["oneinch"], client=http_client)
+    from src.quote.uniswap_v3 import UniswapV3QuoteProvider
+
+    return UniswapV3QuoteProvider(
+        w3,
+        cfg["tokens"],
+        cfg["uniswap"],
+        cfg.get("min_pool_liquidity_usd"),
+        cache=cache,
+        runtime=cfg.get("runtime"),
+        breakers=breakers,
+    )
+
+
+def build_provider(
+    cfg: dict[str, Any],
+    w3: Web3,
+    cache: BlockQuoteCache | None = None,
+    http_client: httpx.AsyncClient | None = None,
+    breakers: BreakerRegistry | None = None,
+):
+    tracked = cfg["circuit_breaker"]["tracked_errors"]
+    if cfg["quote_source"] != "composite":
+        provider = _build_source(cfg["quote_source"], cfg, w3, cache, http_client, breakers)
+        return provider if breakers is None else BreakerQuoteProvider(provider, breakers, tracked)
+
+    from src.quote.composite import CompositeQuoteProvider
+
+    sources = {}
+    for name in quote_sources(cfg):
+        provider = _build_source(name, cfg, w3, cache, http_client, breakers)
+        sources[name] = provider if breakers is None else BreakerQuoteProvider(provider, breakers, tracked, scope=name)
+    return CompositeQuoteProvider(sources, cfg["composite"])
+
+
+def build_breakers(cfg: dict[str, Any]) -> BreakerRegistry | None:
+    cb = cfg["circuit_breaker"]
+    if not cb["enabled"]:
+        return None
+    return BreakerRegistry(
+        failure_threshold=int(cb["failure_threshold"]),
+        base_cooldown_sec=float(cb["base_cooldown_sec"]),
+        max_cooldown_sec=float(cb["max_cooldown_sec"]),
+    )
+
+
+def advance_quote_cache(cache: BlockQuoteCache, w3: Web3, track_touched_pools: bool) -> None:
+    block = int(w3.eth.block_number)
+    touched, created = None, set()
+    if track_touched_pools and cache.block_number is not None and block > cache.block_number:
+        try:
+            touched, created = fetch_touched_pools(w3, cache.block_number + 1, block)
+        except Exception:  # noqa: BLE001
+            touched = None
+    cache.advance(block, touched, created)
+
+
+def new_route_result(cfg: dict[str, Any], route_type: str, route: tuple[str, ...], amount_in_human: float) -> RouteResult:
+    return RouteResult(
+        time.time(),
+        cfg["chain_id"],
+        cfg["quote_source"],
+        route_type,
+        route,
+        amount_in_human,
+        to_wei(amount_in_human, cfg["tokens"][route[0]]["decimals"]),
+        [],
+        cfg["gas_units_estimate"][route_type],
+        cfg["slippage_bps_buffer"],
+        RouteFlags(),
+    )
 
 
 async def process_route(
@@ -33,209 +149,578 @@ async def process_route(
     route_type: str,
     route: tuple[str, ...],
     amount_in_human: float,
-) -> dict[str, Any]:
+    cache: BlockQuoteCache | None = None,
+    pruner: ProfitPruner | None = None,
+) -> RouteResult:
     tokens = cfg["tokens"]
     sanity_cfg = cfg["sanity"]
     max_jump = float(sanity_cfg.get("max_jump_ratio", 1000))
 
     start_symbol = route[0]
     start_token = tokens[start_symbol]
-    amount_in_wei = to_wei(amount_in_human, start_token["decimals"])
-
-    hops_symbols = []
-    if route_type == "loop2":
-        a, b = route
-        hops_symbols = [(a, b), (b, a)]
-        route_symbols = [a, b, a]
-    else:
-        a, b, c = route
-        hops_symbols = [(a, b), (b, c), (c, a)]
-        route_symbols = [a, b, c, a]
-
-    flags = {
-        "suspicious": False,
-        "low_liquidity": False,
-        "incomplete_pricing": False,
-        "incomplete_pool_state": False,
-    }
-
-    hops = []
+    result = new_route_result(cfg, route_type, route, amount_in_human)
+    amount_in_wei = result.amount_in_wei
+    flags = result.flags
+    hops = result.hops
+
+    route_key = (route_type, route, amount_in_wei)
+    replay = cache.get_route(route_key) if cache is not None else None
+    prequoted = replay
+
+    hop_pairs = route_hops(route_type, route)
+    if prequoted is None:
+        # A Uniswap source with path quoting prices the whole route in one quoter call per fee combination.
+        quote_path = getattr(provider, "quote_path", None)
+        if quote_path is not None:
+            prequoted = await quote_path([a for a, _ in hop_pairs] + [hop_pairs[-1][1]], amount_in_wei)
+
+    quotes = []
     current_in = amount_in_wei
-    for token_in, token_out in hops_symbols:
-        q = await provider.quote(token_in, token_out, current_in)
+    for i, (token_in, token_out) in enumerate(hop_pairs):
+        q = prequoted[i] if prequoted is not None else await provider.quote(token_in, token_out, current_in)
+        quotes.append(q)
+        if pruner is not None:
+            pruner.observe_quote(q)
         if not q.ok or q.amount_out_wei <= 0:
-            return {
-                "ts_iso": now_iso(),
-                "chainId": cfg["chain_id"],
-                "source": cfg["quote_source"],
-                "route_type": route_type,
-                "route_symbols": route_symbols,
-                "amount_in_human": amount_in_human,
-                "amount_in_wei": str(amount_in_wei),
-                "hops": hops,
-                "gross_return_wei": "0",
-                "gross_return_usd_est": None,
-                "gas_price_wei": None,
-                "gas_units_est": cfg["gas_units_estimate"][route_type],
-                "gas_cost_usd_est": None,
-                "buffer_bps": cfg["slippage_bps_buffer"],
-                "buffer_usd_est": None,
-                "net_usd_est": None,
-                "flags": flags,
-                "status": "error",
-                "error_message": q.error or "quote_failed",
-            }
+            result.status = "error"
+            result.error_message = q.error or "quote_failed"
+            return result
 
         if sanity_cfg.get("enabled", True) and q.amount_out_wei > int(current_in * max_jump):
-            flags["suspicious"] = True
-            return {
-                "ts_iso": now_iso(),
-                "chainId": cfg["chain_id"],
-                "source": cfg["quote_source"],
-                "route_type": route_type,
-                "route_symbols": route_symbols,
-                "amount_in_human": amount_in_human,
-                "amount_in_wei": str(amount_in_wei),
-                "hops": hops,
-                "gross_return_wei": "0",
-                "gross_return_usd_est": None,
-                "gas_price_wei": None,
-                "gas_units_est": cfg["gas_units_estimate"][route_type],
-                "gas_cost_usd_est": None,
-                "buffer_bps": cfg["slippage_bps_buffer"],
-                "buffer_usd_est": None,
-                "net_usd_est": None,
-                "flags": flags,
-                "status": "error",
-                "error_message": "suspicious_quote_jump",
-            }
-
-        if q.meta.get("pool_checks", {}).get("liquidity") == 0:
-            flags["low_liquidity"] = True
-        if q.meta.get("pool_checks", {}).get("incomplete_pool_state"):
-            flags["incomplete_pool_state"] = True
-
-        hops.append(
-            {
-                "token_in": token_in,
-                "token_out": token_out,
-                "amount_in_wei": str(current_in),
-                "amount_out_wei": str(q.amount_out_wei),
-                "quote_meta": q.meta,
-            }
-        )
+            flags.suspicious = True
+            result.status = "error"
+            result.error_message = "suspicious_quote_jump"
+            return result
+
+        pool_checks = q.meta.get("pool_checks")
+        if pool_checks:
+            if pool_checks.get("liquidity") == 0:
+                flags.low_liquidity = True
+            if pool_checks.get("incomplete_pool_state"):
+                flags.incomplete_pool_state = True
+
+        hops.append(HopRecord(token_in, token_out, current_in, q.amount_out_wei, q.meta))
         current_in = q.amount_out_wei
 
+        if pruner is not None and i + 1 < len(hop_pairs) and pruner.cannot_clear(route_type, route, amount_in_wei, i + 1, current_in):
+            result.status = "skipped"
+            result.error_message = PRUNE_PARTIAL
+            return result
+
+    if cache is not None and replay is None:
+        cache.put_route(route_key, quotes)
+
     gross_wei = current_in - amount_in_wei
-    gross_human = from_wei(gross_wei, start_token["decimals"])
+    scale_in = scale_of(start_token["decimals"])
 
-    token_usd, token_price_src = await infer_token_usd(
+    # USD math below is integer fixed-point (PRICE_SCALE); floats are produced only for the output row.
+    token_px, token_price_src = await infer_token_price_fp(
         start_symbol,
         tokens,
         provider,
         cfg["pricing"]["token_price_mode"],
         cfg["pricing"].get("static_prices", {}),
     )
-    amount_usd = estimate_amount_usd(amount_in_human, start_token, token_usd)
-    if amount_usd is None:
-        flags["incomplete_pricing"] = True
-
-    gross_usd = float(gross_human) if start_token["is_stable"] else (float(gross_human) * token_usd if token_usd is not None else None)
+    amount_fp = gross_fp = None
+    if token_px is None:
+        flags.incomplete_pricing = True
+    else:
+        amount_fp = amount_in_wei * token_px // scale_in
+        gross_fp = gross_wei * token_px // scale_in
 
     if cfg.get("gas_price_gwei_override") is not None:
-        gas_price_wei = int(float(cfg["gas_price_gwei_override"]) * 1e9)
+        gas_price_wei = to_wei(cfg["gas_price_gwei_override"], 9)
     else:
-        gas_price_wei = int(w3.eth.gas_price)
+        gas_price_wei = int(await to_thread(lambda: w3.eth.gas_price))
 
-    eth_usd, eth_src = await infer_eth_usd(tokens, provider, cfg["pricing"])
-    gas_units = cfg["gas_units_estimate"][route_type]
-    gas_cost_usd = None
-    if eth_usd is not None:
-        gas_cost_usd = (gas_units * gas_price_wei * eth_usd) / 1e18
+    eth_px, eth_src = await infer_eth_price_fp(tokens, provider, cfg["pricing"])
+    gas_units = result.gas_units_est
+    gas_fp = None
+    if eth_px is not None:
+        gas_fp = gas_units * gas_price_wei * eth_px // WEI_PER_ETH
     else:
-        flags["incomplete_pricing"] = True
+        flags.incomplete_pricing = True
+
+    if pruner is not None:
+        pruner.observe_prices(start_symbol, token_px, gas_fp, gas_units)
+
+    buffer_fp = None if amount_fp is None else amount_fp * to_wei(cfg["slippage_bps_buffer"], BPS_DECIMALS) // BPS_DENOM
+
+    net_fp = None
+    if gross_fp is not None and gas_fp is not None and buffer_fp is not None:
+        net_fp = gross_fp - gas_fp - buffer_fp
+
+    gross_usd = fixed_to_float(gross_fp)
+    gas_cost_usd = fixed_to_float(gas_fp)
+    buffer_usd = fixed_to_float(buffer_fp)
+    net_usd = fixed_to_float(net_fp)
+
+    result.gross_return_wei = gross_wei
+    result.gross_return_usd_est = gross_usd
+    result.gas_price_wei = gas_price_wei
+    result.gas_cost_usd_est = gas_cost_usd
+    result.buffer_usd_est = buffer_usd
+    result.net_usd_est = net_usd
+    result.price_source = {"token_usd": token_price_src, "eth_usd": eth_src}
+    return result
+
+
+Candidate = tuple[str, tuple[str, ...], float]
+
+
+def build_candidates(cfg: dict[str, Any], loops2: list[tuple[str, ...]], triangles3: list[tuple[str, ...]]) -> list[Candidate]:
+    out: list[Candidate] = []
+    for route_type, routes in (("loop2", loops2), ("triangle3", triangles3)):
+        for route in routes:
+            for amt in cfg["amounts"].get(route[0], []):
+                out.append((route_type, route, float(amt)))
+    return out
+
+
+def enumerate_routes(cfg: dict[str, Any], index: PoolIndex | None = None) -> tuple[list[tuple[str, ...]], list[tuple[str, ...]]]:
+    # An index of another factory than the configured one is stale: fall back to the configured route sets.
+    if index is None or not cfg["pool_index"]["enumerate_routes"] or index.factory != cfg["uniswap"]["factory_address"].lower():
+        return enumerate_loops2(cfg), enumerate_triangles3(cfg)
+    symbol_of = {t["address"].lower(): s for s, t in cfg["tokens"].items()}
+    linked = {frozenset((symbol_of[t0], symbol_of[t1])) for t0, t1, _, _ in index.pools_among(symbol_of)}
+    return enumerate_linked_routes(cfg, linked)
+
+
+class Scanner:
+    def __init__(self, cfg: dict[str, Any], w3: Web3 | None = None, http_client: httpx.AsyncClient | None = None) -> None:
+        self.cfg = cfg
+        sources = quote_sources(cfg)
+        self.w3 = w3 if w3 is not None or not needs_rpc(cfg) else make_w3(cfg)
+        cache_cfg = cfg["quote_cache"]
+        self.cache = BlockQuoteCache() if cache_cfg["enabled"] and "uniswap" in sources else None
+        self.track_touched_pools = cache_cfg["track_touched_pools"]
+        self.http_client = http_client
+        self.breakers = build_breakers(cfg)
+        self.provider = build_provider(cfg, self.w3, cache=self.cache, http_client=http_client, breakers=self.breakers)
+        self.sem = asyncio.Semaphore(cfg["max_concurrency"])
+        self.pool_index = open_pool_index(cfg)
+        # Misses are only trusted ("no such pool") while this process keeps the index caught up with the chain.
+        self.pool_index_synced = False
+        self.pool_index_attempted_at: float | None = None
+        self.loops2, self.triangles3 = enumerate_routes(cfg, self.pool_index)
+        self.seed_pools()
+        self.route_costs: dict[Candidate, float] = {}
+        self.curves = build_curve_model(cfg)
+        # Curve screening ranks on net USD, so it keeps the pruner's price book even with pruning off.
+        self.pruner = ProfitPruner(cfg) if cfg["pruning"]["enabled"] or self.curves is not None else None
+        # (index, count) when this scanner is one shard of a run; the curve finalist budget is split across shards.
+        self.shard = (0, 1)
+        self.last_skipped: Counter[str] = Counter()
+
+    def seed_pools(self) -> None:
+        if self.pool_index is None:
+            return
+        rows = self.pool_index.pools_among(t["address"] for t in self.cfg["tokens"].values())
+        # Without periodic catch-up the index falls behind new pools, so it only pre-fills the registry.
+        complete = self.pool_index_synced and float(self.cfg["pool_index"]["catch_up_interval_sec"]) > 0
+        for p in iter_providers(self.provider):
+            seed = getattr(type(p), "seed_pools", None)
+            if seed is not None:
+                seed(p, self.pool_index.factory, rows, complete)
+
+    async def catch_up_pool_index(self) -> None:
+        if self.pool_index is None or self.w3 is None:
+            return
+        index_cfg = self.cfg["pool_index"]
+        self.pool_index_attempted_at = time.monotonic()
+        try:
+            await to_thread(
+                sync_pool_index, self.w3, self.pool_index, int(index_cfg["start_block"]), int(index_cfg["chunk_blocks"])
+            )
+        except BaseException:
+            # Behind the chain now: go back to asking the factory on a miss until a sync succeeds.
+            self.pool_index_synced = False
+            self.seed_pools()
+            raise
+        self.pool_index_synced = True
+        self.loops2, self.triangles3 = enumerate_routes(self.cfg, self.pool_index)
+        self.seed_pools()
+
+    async def maybe_catch_up_pool_index(self, label: str | None = None) -> None:
+        interval = float(self.cfg["pool_index"]["catch_up_interval_sec"])
+        if self.pool_index is None or interval <= 0:
+            return
+        if self.pool_index_attempted_at is not None and time.monotonic() - self.pool_index_attempted_at < interval:
+            return
+        try:
+            await self.catch_up_pool_index()
+        except Exception as exc:  # noqa: BLE001
+            prefix = f" [{label}]" if label else ""
+            print(f"[{now_iso()}]{prefix} pool index catch-up failed, falling back to getPool on misses: {exc!r}")
+
+    def candidates(self) -> list[Candidate]:
+        return build_candidates(self.cfg, self.loops2, self.triangles3)
+
+    def route_ids(self) -> set[str]:
+        return {route_id(*c) for c in self.candidates()}
+
+    async def evaluate(self, route_type: str, route: tuple[str, ...], amount_in_human: float) -> RouteResult:
+        async with self.sem:
+            started = time.perf_counter()
+            try:
+                row = await process_route(
+                    self.provider, self.cfg, self.w3, route_type, route, amount_in_human, cache=self.cache, pruner=self.pruner
+                )
+            finally:
+                # Cancelled routes still cost what they burned, so shard balancing sees slow legs.
+                self.route_costs[(route_type, route, amount_in_human)] = time.perf_counter() - started
+            if self.curves is not None:
+                self.curves.observe_route(row)
+            return row
+
+    async def scan(self, candidates: list[Candidate] | None = None) -> list[RouteResult]:
+        with cycle_deadline(self.cfg["cycle_deadline_sec"]):
+            return await self._scan(candidates)
+
+    async def _scan(self, candidates: list[Candidate] | None) -> list[RouteResult]:
+        if self.cache is not None:
+            await to_thread(advance_quote_cache, self.cache, self.w3, self.track_touched_pools)
+        if candidates is None:
+            candidates = self.candidates()
+        self.last_skipped = Counter()
+        if self.pruner is not None and self.pruner.enabled:
+            kept = []
+            tokens = self.cfg["tokens"]
+            for c in candidates:
+                route_type, route, amount = c
+                if self.pruner.cannot_clear(route_type, route, to_wei(amount, tokens[route[0]]["decimals"])):
+                    self.last_skipped[PRUNE_UPPER_BOUND] += 1
+                else:
+                    kept.append(c)
+            candidates = kept
+        if self.curves is not None:
+            candidates = self.screen(candidates)
+        tasks = [asyncio.create_task(self.evaluate(*c)) for c in candidates]
+        left = remaining()
+        if left is None:
+            return await asyncio.gather(*tasks, return_exceptions=False)
+        if tasks:
+            await asyncio.wait(tasks, timeout=max(0.0, left))
+        late = [t for t in tasks if not t.done()]
+        for task in late:
+            task.cancel()
+        if late:
+            await asyncio.gather(*late, return_exceptions=True)
+        results = []
+        for c, task in zip(candidates, tasks):
+            if task.cancelled():
+                row = new_route_result(self.cfg, *c)
+                row.status = DEADLINE_EXCEEDED
+                row.error_message = DEADLINE_EXCEEDED
+                results.append(row)
+            else:
+                results.append(task.result())
+        return results
+
+    async def apply_config(self, new_cfg: dict[str, Any]) -> tuple[set[str], set[str]]:
+        """Swap in a reloaded config between cycles; returns (applied, pinned) top-level keys."""
+        changed = diff_config(self.cfg, new_cfg)
+        pinned = changed & RESTART_KEYS
+        if pinned:
+            from src.config_loader import compile_config
+
+            for key in pinned:
+                new_cfg[key] = self.cfg[key]
+            new_cfg["runtime"] = compile_config(new_cfg)
+        applied = changed - pinned
+        if not applied:
+            return applied, pinned
+
+        # Build everything the new config needs first, so a failure leaves the running scanner untouched.
+        w3 = self.w3 if self.w3 is not None or not needs_rpc(new_cfg) else make_w3(new_cfg)
+        try:
+            provider = cache = None
+            if applied & PROVIDER_KEYS:
+                provider, cache = self._build_provider(new_cfg, w3)
+            routes = enumerate_routes(new_cfg, self.pool_index) if applied & ROUTE_KEYS else None
+            priced = new_cfg["pruning"]["enabled"] or self.curves is not None
+            pruner = ProfitPruner(new_cfg) if priced and self.pruner is None else None
+        except BaseException:
+            if w3 is not self.w3:
+                rpc_pool = getattr(w3.provider, "pool", None)
+                if rpc_pool is not None:
+                    rpc_pool.close()
+            raise
+
+        self.cfg = new_cfg
+        self.w3 = w3
+        if provider is not None:
+            old_provider, self.provider, self.cache = self.provider, provider, cache
+            close = getattr(old_provider, "close", None)
+            if close is not None:
+                await close()
+            self.seed_pools()
+        elif "tokens" in applied:
+            for p in iter_providers(self.provider):
+                set_tokens = getattr(type(p), "set_tokens", None)
+                if set_tokens is not None:
+                    set_tokens(p, new_cfg["tokens"], new_cfg["runtime"])
+            self.seed_pools()
+        if routes is not None:
+            self.loops2, self.triangles3 = routes
+            live = set(self.candidates())
+            self.route_costs = {c: t for c, t in self.route_costs.items() if c in live}
+        if "max_concurrency" in applied:
+            self.sem = asyncio.Semaphore(new_cfg["max_concurrency"])
+        if not priced:
+            self.pruner = None
+        elif pruner is not None:
+            self.pruner = pruner
+        else:
+            self.pruner.configure(new_cfg)
+        return applied, pinned
+
+    def _build_provider(self, cfg: dict[str, Any], w3: Web3 | None) -> tuple[Any, BlockQuoteCache | None]:
+        """Build a provider for `cfg` that inherits the running one's warm state; nothing is swapped in."""
+        sources = quote_sources(cfg)
+        cache = self.cache
+        if cache is None and cfg["quote_cache"]["enabled"] and "uniswap" in sources:
+            cache = BlockQuoteCache()
+        old_parts = list(iter_providers(self.provider))
+        # Reuse the old 1inch client so its pooled connections survive the rebuild.
+        http_client = self.http_client or next((vars(p)["client"] for p in old_parts if "client" in vars(p)), None)
+        new = build_provider(cfg, w3, cache=cache, http_client=http_client, breakers=self.breakers)
+        for part in iter_providers(new):
+            old = next((o for o in old_parts if type(o) is type(part)), None)
+            adopt = getattr(type(part), "adopt", None)
+            if old is not None and adopt is not None:
+                adopt(part, old)
+        return new, cache
+
+    def stateful_components(self) -> dict[str, Any]:
+        parts: dict[str, Any] = {
+            "breakers": self.breakers,
+            "pruner": self.pruner,
+            "curves": self.curves,
+            "rpc_pool": getattr(getattr(self.w3, "provider", None), "pool", None),
+        }
+        for p in iter_providers(self.provider):
+            key = getattr(type(p), "state_key", None)
+            if key is not None:
+                parts[key] = p
+        return {k: v for k, v in parts.items() if v is not None}
+
+    def export_state(self) -> dict[str, Any]:
+        state = {name: part.export_state() for name, part in self.stateful_components().items()}
+        state["route_costs"] = [[rt, list(route), amt, cost] for (rt, route, amt), cost in self.route_costs.items()]
+        return state
+
+    def import_state(self, state: dict[str, Any], age_sec: float) -> list[str]:
+        restored = []
+        for name, part in self.stateful_components().items():
+            if name in state:
+                try:
+                    part.import_state(state[name], age_sec)
+                except (KeyError, TypeError, ValueError) as exc:
+                    print(f"[{now_iso()}] snapshot component {name} skipped: {exc!r}")
+                    continue
+                restored.append(name)
+        if "route_costs" in state:
+            live = set(self.candidates())
+            for rt, route, amt, cost in state["route_costs"]:
+                cand = (rt, tuple(route), float(amt))
+                if cand in live:
+                    self.route_costs.setdefault(cand, float(cost))
+            restored.append("route_costs")
+        return restored
+
+    def screen(self, candidates: list[Candidate]) -> list[Candidate]:
+        # Rank candidates on the net USD of their curve estimates and only confirm the best with real quotes;
+        # routes the model cannot answer for (unknown, stale or too inaccurate pairs, or no price for the start
+        # token or gas yet) are always quoted, which also refreshes the curves and prices.
+        tokens = self.cfg["tokens"]
+        estimated: list[tuple[float, Candidate]] = []
+        unknown: list[Candidate] = []
+        for c in candidates:
+            route_type, route, amount = c
+            amount_in_wei = to_wei(amount, tokens[route[0]]["decimals"])
+            out = self.curves.estimate_route(route_type, route, amount_in_wei)
+            net = None if out is None else self.pruner.net_usd(route_type, route, amount_in_wei, out)
+            if net is None:
+                unknown.append(c)
+            else:
+                estimated.append((net, c))
+        estimated.sort(key=lambda x: x[0], reverse=True)
+        finalists = int(self.cfg["curve_model"]["finalists"])
+        index, count = self.shard
+        finalists = finalists // count + (index < finalists % count)
+        if len(estimated) > finalists:
+            self.last_skipped[CURVE_SCREENED] += len(estimated) - finalists
+        return unknown + [c for _, c in estimated[:finalists]]
+
+    async def close(self) -> None:
+        close = getattr(self.provider, "close", None)
+        if close is not None:
+            await close()
+        rpc_pool = getattr(getattr(self.w3, "provider", None), "pool", None)
+        if rpc_pool is not None:
+            rpc_pool.close()
+        if self.pool_index is not None:
+            self.pool_index.close()
+
+    def breaker_report(self) -> dict[str, Any] | None:
+        return None if self.breakers is None else self.breakers.report()
+
+    def source_report(self) -> dict[str, Any] | None:
+        report = getattr(self.provider, "report", None)
+        return None if report is None else report()
+
+
+def rank_results(results: list[RouteResult]) -> list[RouteResult]:
+    return sorted(
+        [r for r in results if r.net_usd_est is not None],
+        key=lambda x: x.net_usd_est,
+        reverse=True,
+    )
 
-    buffer_usd = None if amount_usd is None else amount_usd * (cfg["slippage_bps_buffer"] / 10000)
 
-    net_usd = None
-    if gross_usd is not None and gas_cost_usd is not None and buffer_usd is not None:
-        net_usd = gross_usd - gas_cost_usd - buffer_usd
+def print_top(ranked: list[RouteResult], top_n: int, label: str | None = None) -> None:
+    prefix = f" [{label}]" if label else ""
+    print(f"[{now_iso()}]{prefix} top {top_n} opportunities")
+    for r in ranked[:top_n]:
+        print(
+            f"{r.route_type} {r.route_symbols} in={r.amount_in_human} net_usd={r.net_usd_est:.6f} gross_usd={r.gross_return_usd_est}"
+        )
+
 
+def cycle_summary(
+    results: list[RouteResult],
+    skipped: Counter[str],
+    breakers: dict[str, Any] | None = None,
+    sources: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    reasons = Counter(skipped)
+    reasons.update(r.error_message for r in results if r.status == "skipped")
     return {
-        "ts_iso": now_iso(),
-        "chainId": cfg["chain_id"],
-        "source": cfg["quote_source"],
-        "route_type": route_type,
-        "route_symbols": route_symbols,
-        "amount_in_human": amount_in_human,
-        "amount_in_wei": str(amount_in_wei),
-        "hops": hops,
-        "gross_return_wei": str(gross_wei),
-        "gross_return_usd_est": gross_usd,
-        "gas_price_wei": gas_price_wei,
-        "gas_units_est": gas_units,
-        "gas_cost_usd_est": gas_cost_usd,
-        "buffer_bps": cfg["slippage_bps_buffer"],
-        "buffer_usd_est": buffer_usd,
-        "net_usd_est": net_usd,
-        "flags": flags,
-        "status": "ok",
-        "error_message": None,
-        "price_source": {"token_usd": token_price_src, "eth_usd": eth_src},
+        "evaluated": len(results),
+        "statuses": dict(Counter(r.status for r in results)),
+        "skipped": sum(reasons.values()),
+        "skip_reasons": dict(reasons),
+        "breakers": breakers,
+        "sources": sources,
     }
 
 
-async def run(config_path: str) -> None:
-    cfg = load_config(config_path)
-    w3 = Web3(Web3.HTTPProvider(cfg["rpc_url"]))
-    provider = build_provider(cfg, w3)
-    logger = JsonlLogger("logs")
-    sem = asyncio.Semaphore(cfg["max_concurrency"])
+def print_summary(summary: dict[str, Any], label: str | None = None) -> None:
+    prefix = f" [{label}]" if label else ""
+    reasons = " ".join(f"{k}={v}" for k, v in sorted(summary["skip_reasons"].items()))
+    statuses = " ".join(f"{k}={v}" for k, v in sorted(summary["statuses"].items()))
+    print(f"[{now_iso()}]{prefix} cycle evaluated={summary['evaluated']} {statuses} skipped={summary['skipped']} {reasons}".rstrip())
+    breakers = summary.get("breakers")
+    if breakers:
+        print(
+            f"[{now_iso()}]{prefix} breakers open={breakers['open']} half_open={breakers['half_open']} short_circuited={breakers['short_circuited']}"
+        )
+        for t in breakers["transitions"]:
+            print(f"[{now_iso()}]{prefix} breaker {t}")
+    for name, s in sorted((summary.get("sources") or {}).items()):
+        mean_ms = s["latency_ms_total"] / s["requests"] if s["requests"] else 0.0
+        print(
+            f"[{now_iso()}]{prefix} source {name} requests={s['requests']} ok={s['ok']} wins={s['wins']} "
+            f"timeouts={s['timeouts']} skipped={s['skipped']} mean_latency_ms={mean_ms:.1f}"
+        )
 
-    loops2 = enumerate_loops2(cfg)
-    triangles3 = enumerate_triangles3(cfg)
 
-    async def bounded(route_type: str, route: tuple[str, ...], amount_in_human: float):
-        async with sem:
-            return await process_route(provider, cfg, w3, route_type, route, amount_in_human)
+async def reload_between_cycles(scanner: Scanner, watcher: ConfigWatcher, label: str | None = None) -> set[str]:
+    """Apply a changed config file, if any; returns the top-level keys that took effect."""
+    new_cfg = watcher.poll()
+    if new_cfg is None:
+        return set()
+    prefix = f" [{label}]" if label else ""
+    try:
+        applied, pinned = await scanner.apply_config(new_cfg)
+    except Exception as exc:  # noqa: BLE001
+        # The file validated but the scanner could not be built from it; keep scanning on the running config.
+        print(f"[{now_iso()}]{prefix} config reload failed, keeping running config: {exc!r}")
+        return set()
+    if applied:
+        print(f"[{now_iso()}]{prefix} config reloaded: {', '.join(sorted(applied))}")
+    if pinned:
+        print(f"[{now_iso()}]{prefix} config keys need a restart, kept running values: {', '.join(sorted(pinned))}")
+    return applied
+
+
+def build_snapshot_saver(scanner: Scanner, suffix: str = "", label: str | None = None) -> SnapshotSaver | None:
+    snap_cfg = scanner.cfg["snapshot"]
+    if not snap_cfg["enabled"]:
+        return None
+    saver = SnapshotSaver(scanner, snapshot_path(scanner.cfg, suffix), float(snap_cfg["interval_sec"]))
+    restored = saver.restore()
+    if restored:
+        prefix = f" [{label}]" if label else ""
+        print(f"[{now_iso()}]{prefix} warm start from {saver.path}: {', '.join(restored)}")
+    return saver
+
+
+async def run(
+    config_path: str,
+    log_dir: str = "logs",
+    max_cycles: int | None = None,
+    on_cycle: Callable[[Scanner, list[RouteResult]], None] | None = None,
+) -> None:
+    cfg = load_config(config_path)
+    scanner = Scanner(cfg)
+    route_log = RouteLog(log_dir, cfg["logging"])
+    watcher = ConfigWatcher(config_path)
+    saver = build_snapshot_saver(scanner)
+    if cfg["pool_index"]["sync_on_start"]:
+        await scanner.catch_up_pool_index()
+    feed = build_feed(cfg)
+    if feed is not None:
+        await feed.start()
+        print(f"[{now_iso()}] live feed on http://{feed.host}:{feed.port} (/events, /ws, /snapshot)")
+    cycles = 0
 
     try:
         while True:
-            tasks = []
-            for route in loops2:
-                sym = route[0]
-                for amt in cfg["amounts"].get(sym, []):
-                    tasks.append(asyncio.create_task(bounded("loop2", route, float(amt))))
-
-            for route in triangles3:
-                sym = route[0]
-                for amt in cfg["amounts"].get(sym, []):
-                    tasks.append(asyncio.create_task(bounded("triangle3", route, float(amt))))
-
-            results = await asyncio.gather(*tasks, return_exceptions=False)
-            for row in results:
-                logger.write(row)
-
-            ranked = sorted(
-                [r for r in results if r.get("net_usd_est") is not None],
-                key=lambda x: x["net_usd_est"],
-                reverse=True,
-            )
-            print(f"[{now_iso()}] top {cfg['top_n']} opportunities")
-            for r in ranked[: cfg["top_n"]]:
-                print(
-                    f"{r['route_type']} {r['route_symbols']} in={r['amount_in_human']} net_usd={r['net_usd_est']:.6f} gross_usd={r['gross_return_usd_est']}"
-                )
-            await asyncio.sleep(float(cfg["loop_interval_sec"]))
+            results = await scanner.scan()
+            route_log.write_cycle(results)
+
+            print_summary(cycle_summary(results, scanner.last_skipped, scanner.breaker_report(), scanner.source_report()))
+            print_top(rank_results(results), scanner.cfg["top_n"])
+            if feed is not None:
+                feed.publish_cycle(results)
+            if on_cycle is not None:
+                on_cycle(scanner, results)
+            cycles += 1
+            if max_cycles is not None and cycles >= max_cycles:
+                break
+            if saver is not None:
+                saver.maybe_save()
+            applied = await reload_between_cycles(scanner, watcher)
+            if "logging" in applied:
+                route_log.configure(scanner.cfg["logging"])
+            if applied & ROUTE_KEYS:
+                live = scanner.route_ids()
+                route_log.retain(live)
+                if feed is not None:
+                    feed.retain(live)
+            await scanner.maybe_catch_up_pool_index()
+            await asyncio.sleep(float(scanner.cfg["loop_interval_sec"]))
     finally:
-        if isinstance(provider, OneInchQuoteProvider):
-            await provider.close()
+        route_log.close()
+        if saver is not None:
+            saver.save()
+        if feed is not None:
+            await feed.close()
+        await scanner.close()
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Dry-run DEX quote collector")
     parser.add_argument("--config", required=True, help="Path to YAML/JSON config")
+    parser.add_argument("--shards", type=int, default=1, help="Number of worker processes to partition routes across")
     args = parser.parse_args()
+    if args.shards > 1:
+        from src.sharding import run_sharded
+
+        run_sharded(args.config, args.shards)
+        return
     asyncio.run(run(args.config))
 
 
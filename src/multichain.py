@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.config_loader import load_config
+from src.feed import FeedServer, build_feed
+from src.main import (
+    Scanner,
+    build_snapshot_saver,
+    cycle_summary,
+    make_w3,
+    now_iso,
+    print_summary,
+    print_top,
+    quote_sources,
+    rank_results,
+    reload_between_cycles,
+)
+from src.reload import ROUTE_KEYS, ConfigWatcher
+from src.route_stats import RouteLog
+from src.workers import use_executor
+
+
+def chain_label(cfg: dict[str, Any]) -> str:
+    return str(cfg.get("chain_name") or cfg["chain_id"])
+
+
+class SharedHttpPools:
+    """Connection pools shared by every chain that talks to the same host."""
+
+    def __init__(self, pool_size: int = 32) -> None:
+        self.pool_size = pool_size
+        self._sessions: dict[str, requests.Session] = {}
+        self._clients: dict[str, httpx.AsyncClient] = {}
+
+    @staticmethod
+    def _host_key(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def session_for(self, url: str) -> requests.Session:
+        key = self._host_key(url)
+        session = self._sessions.get(key)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._sessions[key] = session
+        return session
+
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        key = self._host_key(url)
+        client = self._clients.get(key)
+        if client is None:
+            limits = httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+            client = httpx.AsyncClient(limits=limits)
+            self._clients[key] = client
+        return client
+
+    async def aclose(self) -> None:
+        for client in self._clients.values():
+            await client.aclose()
+        for session in self._sessions.values():
+            session.close()
+        self._clients.clear()
+        self._sessions.clear()
+
+
+def build_scanner(cfg: dict[str, Any], pools: SharedHttpPools) -> Scanner:
+    w3 = make_w3(cfg, session=pools.session_for(cfg["rpc_url"]))
+    http_client = pools.client_for(cfg["oneinch"]["base_url"]) if "1inch" in quote_sources(cfg) else None
+    return Scanner(cfg, w3=w3, http_client=http_client)
+
+
+async def run_chain(
+    cfg: dict[str, Any],
+    pools: SharedHttpPools,
+    log_root: str = "logs",
+    config_path: str | None = None,
+    feed: FeedServer | None = None,
+) -> None:
+    label = chain_label(cfg)
+    watcher = ConfigWatcher(config_path, label=label) if config_path else None
+    route_log = RouteLog(f"{log_root}/{label}", cfg["logging"])
+    interval = float(cfg["loop_interval_sec"])
+    max_backoff = float(cfg["multichain"]["max_backoff_sec"])
+    scanner: Scanner | None = None
+    saver = None
+    failures = 0
+    # Blocking RPC work runs on this chain's own threads, so a chain stuck on a slow node cannot starve the others.
+    executor = ThreadPoolExecutor(max_workers=int(cfg["max_concurrency"]) + 4, thread_name_prefix=f"chain-{label}")
+    try:
+        with use_executor(executor):
+            while True:
+                # Any failure in the cycle stays inside this chain's task; other chains keep scanning.
+                try:
+                    if scanner is None:
+                        scanner = build_scanner(cfg, pools)
+                        saver = build_snapshot_saver(scanner, label=label)
+                        if cfg["pool_index"]["sync_on_start"]:
+                            await scanner.catch_up_pool_index()
+                    results = await scanner.scan()
+                    route_log.write_cycle(results)
+                    print_summary(cycle_summary(results, scanner.last_skipped, scanner.breaker_report(), scanner.source_report()), label=label)
+                    print_top(rank_results(results), scanner.cfg["top_n"], label=label)
+                    if feed is not None:
+                        feed.publish_cycle(results, label=label)
+                    if saver is not None:
+                        saver.maybe_save()
+                    await scanner.maybe_catch_up_pool_index(label=label)
+                    if watcher is not None:
+                        applied = await reload_between_cycles(scanner, watcher, label=label)
+                        if "logging" in applied:
+                            route_log.configure(scanner.cfg["logging"])
+                        if applied & ROUTE_KEYS:
+                            live = scanner.route_ids()
+                            route_log.retain(live)
+                            if feed is not None:
+                                feed.retain(live, label=label)
+                        interval = float(scanner.cfg["loop_interval_sec"])
+                    failures = 0
+                except Exception as exc:  # noqa: BLE001
+                    failures += 1
+                    delay = min(max_backoff, interval * (2**failures))
+                    print(f"[{now_iso()}] [{label}] cycle failed ({failures}): {exc!r}; retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                    continue
+                await asyncio.sleep(interval)
+    finally:
+        route_log.close()
+        if saver is not None:
+            saver.save()
+        if scanner is not None:
+            await scanner.close()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _report_chain_exit(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        print(f"[{now_iso()}] [{task.get_name().removeprefix('chain:')}] chain stopped: {task.exception()!r}")
+
+
+async def run_multi(config_paths: list[str]) -> None:
+    cfgs = [load_config(p) for p in config_paths]
+    labels = [chain_label(c) for c in cfgs]
+    if len(set(labels)) != len(labels):
+        raise ValueError(f"Duplicate chain labels across configs: {labels}; set chain_name to disambiguate")
+
+    pools = SharedHttpPools(pool_size=sum(int(c["max_concurrency"]) for c in cfgs))
+    # One feed for every chain, configured by the first config; events carry the chain label.
+    feed = build_feed(cfgs[0])
+    if feed is not None:
+        await feed.start()
+        print(f"[{now_iso()}] live feed on http://{feed.host}:{feed.port} (/events, /ws, /snapshot)")
+    tasks = [
+        asyncio.create_task(run_chain(cfg, pools, config_path=path, feed=feed), name=f"chain:{label}")
+        for cfg, label, path in zip(cfgs, labels, config_paths)
+    ]
+    for task in tasks:
+        task.add_done_callback(_report_chain_exit)
+    try:
+        # A chain that dies is reported on its own; the others keep running until every chain has stopped.
+        await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if feed is not None:
+            await feed.close()
+        await pools.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Dry-run DEX quote collector across several chains in one process")
+    parser.add_argument("--config", action="append", required=True, help="Path to YAML/JSON config; repeat per chain")
+    args = parser.parse_args()
+    asyncio.run(run_multi(args.config))
+
+
+if __name__ == "__main__":
+    main()
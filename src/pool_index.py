@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+# PoolCreated(address indexed token0, address indexed token1, uint24 indexed fee, int24 tickSpacing, address pool)
+POOL_CREATED_TOPIC = "0x783cca1c0412dd0d695e784568c96da2e9c22ff989357a2e8b1d9b2b4e6b7118"
+
+PoolRow = tuple[str, str, int, str]  # token0, token1, fee, pool (lowercase hex)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pools (
+    chain_id INTEGER NOT NULL,
+    factory TEXT NOT NULL,
+    pool TEXT NOT NULL,
+    token0 TEXT NOT NULL,
+    token1 TEXT NOT NULL,
+    fee INTEGER NOT NULL,
+    tick_spacing INTEGER NOT NULL,
+    block INTEGER NOT NULL,
+    PRIMARY KEY (chain_id, factory, pool)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS pools_token0 ON pools (chain_id, factory, token0);
+CREATE INDEX IF NOT EXISTS pools_token1 ON pools (chain_id, factory, token1);
+CREATE TABLE IF NOT EXISTS progress (
+    chain_id INTEGER NOT NULL,
+    factory TEXT NOT NULL,
+    next_block INTEGER NOT NULL,
+    PRIMARY KEY (chain_id, factory)
+);
+"""
+
+
+def _hex(value: Any) -> str:
+    if isinstance(value, str):
+        return value[2:] if value.startswith("0x") else value
+    return bytes(value).hex()
+
+
+def decode_pool_created(log: Any) -> tuple[str, str, int, int, str, int]:
+    """(token0, token1, fee, tick_spacing, pool, block) from a raw PoolCreated log."""
+    topics = [_hex(t) for t in log["topics"]]
+    data = bytes.fromhex(_hex(log["data"]))
+    return (
+        "0x" + topics[1][-40:].lower(),
+        "0x" + topics[2][-40:].lower(),
+        int(topics[3], 16),
+        int.from_bytes(data[:32], "big", signed=True),
+        "0x" + data[44:64].hex(),
+        int(log["blockNumber"]),
+    )
+
+
+class PoolIndex:
+    """Local SQLite store of one factory's pools, with indexed lookups by token."""
+
+    def __init__(self, path: str, chain_id: int, factory: str) -> None:
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.chain_id = chain_id
+        self.factory = factory.lower()
+        # Syncs run in a worker thread; callers never touch one index from two threads at once.
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self.db.close()
+
+    def next_block(self) -> int | None:
+        row = self.db.execute(
+            "SELECT next_block FROM progress WHERE chain_id = ? AND factory = ?", (self.chain_id, self.factory)
+        ).fetchone()
+        return None if row is None else int(row[0])
+
+    def add_pools(self, logs: Iterable[Any], next_block: int) -> int:
+        rows = [
+            (self.chain_id, self.factory, pool, t0, t1, fee, spacing, block)
+            for t0, t1, fee, spacing, pool, block in map(decode_pool_created, logs)
+        ]
+        # Pools and the resume point land in one transaction, so an interrupted sync never skips or half-writes a range.
+        with self.db:
+            before = self.db.total_changes
+            self.db.executemany("INSERT OR IGNORE INTO pools VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            added = self.db.total_changes - before
+            self.db.execute(
+                "INSERT INTO progress VALUES (?, ?, ?) ON CONFLICT (chain_id, factory) DO UPDATE SET next_block = excluded.next_block",
+                (self.chain_id, self.factory, next_block),
+            )
+        return added
+
+    def count(self) -> int:
+        return self.db.execute(
+            "SELECT COUNT(*) FROM pools WHERE chain_id = ? AND factory = ?", (self.chain_id, self.factory)
+        ).fetchone()[0]
+
+    def pools_for_token(self, token: str) -> list[PoolRow]:
+        token = token.lower()
+        return self.db.execute(
+            "SELECT token0, token1, fee, pool FROM pools WHERE chain_id = ? AND factory = ? AND token0 = ? "
+            "UNION ALL SELECT token0, token1, fee, pool FROM pools WHERE chain_id = ? AND factory = ? AND token1 = ?",
+            (self.chain_id, self.factory, token) * 2,
+        ).fetchall()
+
+    def most_connected(self, limit: int) -> list[tuple[str, int]]:
+        """Tokens with the most pools: candidates worth adding to the config's token list."""
+        if limit <= 0:
+            return []
+        return self.db.execute(
+            "SELECT token, COUNT(*) AS n FROM ("
+            "SELECT token0 AS token FROM pools WHERE chain_id = ? AND factory = ? "
+            "UNION ALL SELECT token1 FROM pools WHERE chain_id = ? AND factory = ?"
+            ") GROUP BY token ORDER BY n DESC, token LIMIT ?",
+            (self.chain_id, self.factory) * 2 + (limit,),
+        ).fetchall()
+
+    def pools_among(self, tokens: Iterable[str]) -> list[PoolRow]:
+        wanted = {t.lower() for t in tokens}
+        out = []
+        # Walk from each token through the token0 index; checking token1 in Python keeps the query size fixed.
+        for token in sorted(wanted):
+            for row in self.db.execute(
+                "SELECT token0, token1, fee, pool FROM pools WHERE chain_id = ? AND factory = ? AND token0 = ?",
+                (self.chain_id, self.factory, token),
+            ):
+                if row[1] in wanted:
+                    out.append(row)
+        return out
+
+
+def sync_pool_index(
+    w3,
+    index: PoolIndex,
+    start_block: int = 0,
+    chunk_blocks: int = 2000,
+    to_block: int | None = None,
+    log: Callable[[str], None] | None = print,
+) -> int:
+    """Catch the index up with the factory's PoolCreated logs; resumes from the last committed range."""
+    from eth_utils import to_checksum_address
+
+    head = int(w3.eth.block_number) if to_block is None else int(to_block)
+    start = index.next_block()
+    if start is None:
+        start = int(start_block)
+    factory = to_checksum_address(index.factory)
+    chunk = int(chunk_blocks)
+    added = 0
+    while start <= head:
+        end = min(head, start + chunk - 1)
+        try:
+            logs = w3.eth.get_logs({"address": factory, "topics": [POOL_CREATED_TOPIC], "fromBlock": start, "toBlock": end})
+        except Exception as exc:  # noqa: BLE001
+            # Providers cap block ranges and result counts; shrink the window for the rest of this sync and retry.
+            if chunk == 1:
+                raise
+            chunk = max(1, chunk // 2)
+            if log is not None:
+                log(f"get_logs {start}-{end} failed ({exc}); retrying with {chunk}-block chunks")
+            continue
+        added += index.add_pools(logs, next_block=end + 1)
+        start = end + 1
+    if log is not None:
+        log(f"pool index {index.path}: {index.count()} pools (+{added}), synced to block {head}")
+    return added
+
+
+def pool_index_path(cfg: dict[str, Any]) -> str:
+    return cfg["pool_index"]["path"] or f"state/pools-{cfg.get('chain_name') or cfg['chain_id']}.sqlite"
+
+
+def open_pool_index(cfg: dict[str, Any]) -> PoolIndex | None:
+    if not cfg["pool_index"]["enabled"]:
+        return None
+    return PoolIndex(pool_index_path(cfg), int(cfg["chain_id"]), cfg["uniswap"]["factory_address"])
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Callable, Hashable, Iterable
+
+from src.quote.base import QuoteResult
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+CIRCUIT_OPEN_ERROR = "circuit_open"
+
+
+class CircuitBreaker:
+    __slots__ = ("state", "failures", "cooldown_sec", "open_until", "probing", "trips")
+
+    def __init__(self) -> None:
+        self.state = CLOSED
+        self.failures = 0
+        self.cooldown_sec = 0.0
+        self.open_until = 0.0
+        self.probing = False
+        self.trips = 0
+
+
+class BreakerRegistry:
+    """Per-key circuit breakers with exponential cool-off and a single half-open probe."""
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        base_cooldown_sec: float = 30.0,
+        max_cooldown_sec: float = 1800.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.base_cooldown_sec = base_cooldown_sec
+        self.max_cooldown_sec = max_cooldown_sec
+        self.clock = clock
+        self.breakers: dict[Hashable, CircuitBreaker] = {}
+        self.short_circuited = 0
+        self._transitions: list[str] = []
+
+    def _transition(self, key: Hashable, b: CircuitBreaker, state: str) -> None:
+        b.state = state
+        extra = f" cooldown={b.cooldown_sec:.0f}s" if state == OPEN else ""
+        self._transitions.append(f"{format_key(key)} -> {state}{extra}")
+
+    def allow(self, key: Hashable) -> bool:
+        b = self.breakers.get(key)
+        if b is None or b.state == CLOSED:
+            return True
+        if b.state == OPEN and self.clock() >= b.open_until:
+            self._transition(key, b, HALF_OPEN)
+        if b.state == HALF_OPEN and not b.probing:
+            b.probing = True
+            return True
+        self.short_circuited += 1
+        return False
+
+    def record_success(self, key: Hashable) -> None:
+        b = self.breakers.get(key)
+        if b is None:
+            return
+        if b.state != CLOSED:
+            self._transition(key, b, CLOSED)
+        b.failures = 0
+        b.cooldown_sec = 0.0
+        b.probing = False
+
+    def record_failure(self, key: Hashable) -> None:
+        b = self.breakers.setdefault(key, CircuitBreaker())
+        b.failures += 1
+        if b.state == HALF_OPEN or (b.state == CLOSED and b.failures >= self.failure_threshold):
+            b.cooldown_sec = min(self.max_cooldown_sec, b.cooldown_sec * 2 if b.cooldown_sec else self.base_cooldown_sec)
+            b.open_until = self.clock() + b.cooldown_sec
+            b.probing = False
+            b.trips += 1
+            self._transition(key, b, OPEN)
+
+    def release(self, key: Hashable) -> None:
+        # Outcome says nothing about the key (e.g. transport error): let another probe through later.
+        b = self.breakers.get(key)
+        if b is not None:
+            b.probing = False
+
+    def state(self, key: Hashable) -> str:
+        b = self.breakers.get(key)
+        return CLOSED if b is None else b.state
+
+    def drain_transitions(self) -> list[str]:
+        out, self._transitions = self._transitions, []
+        return out
+
+    def export_state(self) -> list[dict[str, Any]]:
+        now = self.clock()
+        return [
+            {
+                "key": list(key) if isinstance(key, tuple) else key,
+                "state": b.state,
+                "failures": b.failures,
+                "cooldown_sec": b.cooldown_sec,
+                "open_for_sec": max(0.0, b.open_until - now),
+                "trips": b.trips,
+            }
+            for key, b in self.breakers.items()
+            if b.state != CLOSED or b.failures
+        ]
+
+    def import_state(self, state: list[dict[str, Any]], age_sec: float) -> None:
+        now = self.clock()
+        for item in state:
+            key = tuple(item["key"]) if isinstance(item["key"], list) else item["key"]
+            b = self.breakers.setdefault(key, CircuitBreaker())
+            b.failures = int(item["failures"])
+            b.cooldown_sec = float(item["cooldown_sec"])
+            b.trips = int(item["trips"])
+            # A half-open probe never outlives the process; resume as open with the cool-off already spent.
+            b.state = CLOSED if item["state"] == CLOSED else OPEN
+            b.open_until = now + max(0.0, float(item["open_for_sec"]) - age_sec)
+
+    def report(self) -> dict[str, Any]:
+        counts = {OPEN: 0, HALF_OPEN: 0}
+        for b in self.breakers.values():
+            if b.state in counts:
+                counts[b.state] += 1
+        return {
+            "open": counts[OPEN],
+            "half_open": counts[HALF_OPEN],
+            "short_circuited": self.short_circuited,
+            "transitions": self.drain_transitions(),
+        }
+
+
+def format_key(key: Hashable) -> str:
+    if isinstance(key, tuple):
+        kind, *rest = key
+        return f"{kind}:{'/'.join(str(p) for p in rest)}"
+    return str(key)
+
+
+class BreakerQuoteProvider:
+    """Wraps a quote provider with per-pair breakers for chronically failing legs."""
+
+    def __init__(self, inner, registry: BreakerRegistry, tracked_errors: Iterable[str], scope: str | None = None) -> None:
+        self.inner = inner
+        self.registry = registry
+        self.tracked_errors = frozenset(tracked_errors)
+        # Distinguishes per-source breakers when several providers share one registry.
+        self.scope = scope
+
+    def __getattr__(self, name: str):
+        return getattr(self.inner, name)
+
+    def _key(self, token_in: str, token_out: str) -> tuple[str, ...]:
+        return ("pair", token_in, token_out) if self.scope is None else ("pair", token_in, token_out, self.scope)
+
+    async def quote_path(self, tokens: list[str], amount_in_wei: int) -> list[QuoteResult] | None:
+        quote_path = getattr(self.inner, "quote_path", None)
+        if quote_path is None:
+            return None
+        keys = [self._key(a, b) for a, b in zip(tokens, tokens[1:])]
+        # A path quote can't take a half-open probe slot for one hop, so any pair that isn't closed sends the
+        # route back to hop-by-hop quoting, where `quote` gates (and probes) it.
+        if any(self.registry.state(k) != CLOSED for k in keys):
+            return None
+        quotes = await quote_path(tokens, amount_in_wei)
+        if quotes is not None:
+            for key, q in zip(keys, quotes):
+                if q.ok:
+                    self.registry.record_success(key)
+        return quotes
+
+    async def quote(self, token_in: str, token_out: str, amount_in_wei: int) -> QuoteResult:
+        key = self._key(token_in, token_out)
+        if not self.registry.allow(key):
+            return QuoteResult(
+                ok=False,
+                amount_in_wei=amount_in_wei,
+                amount_out_wei=0,
+                token_in=token_in,
+                token_out=token_out,
+                meta={"breaker": {"key": format_key(key), "state": self.registry.state(key)}},
+                error=CIRCUIT_OPEN_ERROR,
+            )
+        try:
+            q = await self.inner.quote(token_in, token_out, amount_in_wei)
+        except BaseException:
+            # Cancelled at a deadline (or crashed): the probe slot must not stay taken.
+            self.registry.release(key)
+            raise
+        if q.ok:
+            self.registry.record_success(key)
+        elif q.error in self.tracked_errors:
+            self.registry.record_failure(key)
+        else:
+            self.registry.release(key)
+        return q
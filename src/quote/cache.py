@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from typing import Any, Iterable
+
+from src.pool_index import POOL_CREATED_TOPIC, decode_pool_created
+from src.quote.base import QuoteResult
+
+# Uniswap V3 pool events that move price or liquidity.
+POOL_STATE_TOPICS = [
+    "0xc42079f94a6350d7e6235f29174924f928cc2ac818eb64fed8004e115fbcca67",  # Swap
+    "0x7a53080ba414158be7ec69b987b5fb7d07dee101fe85488f0853ae16239d0bde",  # Mint
+    "0x0c396cd989a39f4459b5fa1aed6a9a8dcdbc45908acfd67e028cd568da98982c",  # Burn
+]
+
+
+class BlockQuoteCache:
+    """Per-block quote cache; route hop chains survive blocks that leave their pools untouched."""
+
+    def __init__(self) -> None:
+        self.block_number: int | None = None
+        self._quotes: dict[tuple[int, str, str, int, int], Any] = {}
+        # (sqrtPriceX96, liquidity) per pool at the current block, shared by every amount and path quote.
+        self._pool_states: dict[str, tuple[int | None, int | None]] = {}
+        self._routes: dict[tuple[Any, ...], tuple[list[QuoteResult], frozenset[str], frozenset[frozenset[str]]]] = {}
+        # Filled by the Uniswap provider: every fee-tier pool it has resolved, and the token addresses of its symbols.
+        self.pool_pairs: dict[str, frozenset[str]] = {}
+        self.token_addresses: dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+        self.routes_carried = 0
+
+    def register_pool(self, pool: str, token_a: str, token_b: str) -> None:
+        self.pool_pairs[pool.lower()] = frozenset((token_a.lower(), token_b.lower()))
+
+    def _pair(self, token_in: str, token_out: str) -> frozenset[str]:
+        return frozenset(self.token_addresses.get(t, t).lower() for t in (token_in, token_out))
+
+    def advance(
+        self,
+        block_number: int,
+        touched_pools: Iterable[str] | None = None,
+        created_pairs: Iterable[tuple[str, str]] = (),
+    ) -> None:
+        if block_number == self.block_number:
+            return
+        self._quotes.clear()
+        self._pool_states.clear()
+        self.routes_carried = 0
+        if touched_pools is None or self.block_number is None:
+            self._routes.clear()
+        else:
+            touched = {p.lower() for p in touched_pools}
+            # Activity on any tier of a hop's pair (or a new pool for it) can change which tier is best.
+            pairs = {self.pool_pairs[p] for p in touched if p in self.pool_pairs}
+            pairs.update(frozenset((a.lower(), b.lower())) for a, b in created_pairs)
+            self._routes = {k: v for k, v in self._routes.items() if touched.isdisjoint(v[1]) and pairs.isdisjoint(v[2])}
+            self.routes_carried = len(self._routes)
+        self.block_number = block_number
+
+    def get_quote(self, token_in: str, token_out: str, fee: int, amount_in_wei: int) -> Any | None:
+        if self.block_number is None:
+            return None
+        hit = self._quotes.get((self.block_number, token_in, token_out, fee, amount_in_wei))
+        if hit is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return hit
+
+    def put_quote(self, token_in: str, token_out: str, fee: int, amount_in_wei: int, value: Any) -> None:
+        if self.block_number is None:
+            return
+        self._quotes[(self.block_number, token_in, token_out, fee, amount_in_wei)] = value
+
+    def get_pool_state(self, pool: str) -> tuple[int | None, int | None] | None:
+        return self._pool_states.get(pool) if self.block_number is not None else None
+
+    def put_pool_state(self, pool: str, state: tuple[int | None, int | None]) -> None:
+        if self.block_number is not None:
+            self._pool_states[pool] = state
+
+    def get_route(self, key: tuple[Any, ...]) -> list[QuoteResult] | None:
+        entry = self._routes.get(key)
+        return None if entry is None else entry[0]
+
+    def put_route(self, key: tuple[Any, ...], quotes: list[QuoteResult]) -> None:
+        if self.block_number is None:
+            return
+        pools = [q.meta.get("pool_address") for q in quotes]
+        if not pools or any(not p for p in pools):
+            return
+        pairs = frozenset(self._pair(q.token_in, q.token_out) for q in quotes)
+        self._routes[key] = (quotes, frozenset(p.lower() for p in pools), pairs)
+
+
+def fetch_touched_pools(w3, from_block: int, to_block: int) -> tuple[set[str], set[tuple[str, str]]]:
+    """(pools with state-changing events, token pairs that gained a pool) over a block range."""
+    logs = w3.eth.get_logs({"fromBlock": from_block, "toBlock": to_block, "topics": [[*POOL_STATE_TOPICS, POOL_CREATED_TOPIC]]})
+    pools: set[str] = set()
+    created: set[tuple[str, str]] = set()
+    for log in logs:
+        topic = log["topics"][0]
+        topic = topic if isinstance(topic, str) else "0x" + bytes(topic).hex()
+        if topic.lower() == POOL_CREATED_TOPIC:
+            token0, token1, *_ = decode_pool_created(log)
+            created.add((token0, token1))
+        else:
+            pools.add(str(log["address"]).lower())
+    return pools, created
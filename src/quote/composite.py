@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any
+
+from src.deadline import bounded
+from src.quote.base import QuoteResult
+
+COMPOSITE_DEADLINE_ERROR = "composite_deadline"
+
+
+class SourceStats:
+    __slots__ = ("requests", "ok", "wins", "timeouts", "latency_sec", "skipped")
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.ok = 0
+        self.wins = 0
+        self.timeouts = 0
+        self.latency_sec = 0.0
+        self.skipped = 0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "ok": self.ok,
+            "wins": self.wins,
+            "timeouts": self.timeouts,
+            "latency_ms_total": self.latency_sec * 1000,
+            "skipped": self.skipped,
+        }
+
+
+class CompositeQuoteProvider:
+    """Queries several quote sources concurrently per hop and keeps the best amount_out."""
+
+    state_key = "composite"
+
+    def __init__(self, sources: dict[str, Any], composite_cfg: dict[str, Any]) -> None:
+        if not sources:
+            raise ValueError("CompositeQuoteProvider needs at least one source")
+        self.sources = sources
+        self.deadline_sec = float(composite_cfg["deadline_ms"]) / 1000
+        self.min_samples = int(composite_cfg["min_samples"])
+        self.reprobe_every = int(composite_cfg["reprobe_every"])
+        self.max_window = max(self.min_samples, int(composite_cfg["stats_window"]))
+        early = composite_cfg.get("early_cancel_win_rate")
+        self.early_cancel_win_rate = None if early is None else float(early)
+        # Per directed pair: source -> [trials, wins]; halved once trials exceed the window so old wins age out.
+        self.pair_stats: dict[tuple[str, str], dict[str, list[int]]] = {}
+        self.pair_calls: dict[tuple[str, str], int] = {}
+        self.cycle_stats = {name: SourceStats() for name in sources}
+
+    async def close(self) -> None:
+        for provider in self.sources.values():
+            close = getattr(provider, "close", None)
+            if close is not None:
+                await close()
+
+    def adopt(self, old: "CompositeQuoteProvider") -> None:
+        for pair, stats in old.pair_stats.items():
+            kept = {n: rec for n, rec in stats.items() if n in self.sources}
+            if kept:
+                self.pair_stats[pair] = kept
+        self.pair_calls.update(old.pair_calls)
+
+    def export_state(self) -> dict[str, Any]:
+        return {"pair_stats": [[a, b, stats] for (a, b), stats in self.pair_stats.items()]}
+
+    def import_state(self, state: dict[str, Any], age_sec: float) -> None:
+        for a, b, stats in state["pair_stats"]:
+            kept = {n: [int(t), int(w)] for n, (t, w) in stats.items() if n in self.sources}
+            if kept:
+                self.pair_stats[(a, b)] = kept
+
+    def _win_rate(self, pair: tuple[str, str], name: str) -> float | None:
+        rec = self.pair_stats.get(pair, {}).get(name)
+        if rec is None or rec[0] < self.min_samples:
+            return None
+        return rec[1] / rec[0]
+
+    def active_sources(self, token_in: str, token_out: str) -> list[str]:
+        pair = (token_in, token_out)
+        calls = self.pair_calls[pair] = self.pair_calls.get(pair, 0) + 1
+        names = list(self.sources)
+        active = [n for n in names if self._win_rate(pair, n) != 0]
+        if not active or len(active) == len(names) or calls % self.reprobe_every == 0:
+            return names
+        for n in names:
+            if n not in active:
+                self.cycle_stats[n].skipped += 1
+        return active
+
+    def _observe(self, pair: tuple[str, str], asked: list[str], winner: str | None) -> None:
+        stats = self.pair_stats.setdefault(pair, {})
+        for name in asked:
+            rec = stats.setdefault(name, [0, 0])
+            rec[0] += 1
+            if name == winner:
+                rec[1] += 1
+            if rec[0] > self.max_window:
+                rec[0] //= 2
+                rec[1] //= 2
+
+    async def _timed(self, name: str, token_in: str, token_out: str, amount_in_wei: int) -> tuple[QuoteResult, float]:
+        started = time.perf_counter()
+        try:
+            q = await self.sources[name].quote(token_in, token_out, amount_in_wei)
+        except Exception as exc:  # noqa: BLE001
+            q = QuoteResult(False, amount_in_wei, 0, token_in, token_out, error=f"{name}_exception:{type(exc).__name__}")
+        return q, time.perf_counter() - started
+
+    async def quote(self, token_in: str, token_out: str, amount_in_wei: int) -> QuoteResult:
+        pair = (token_in, token_out)
+        asked = self.active_sources(token_in, token_out)
+        tasks = {asyncio.create_task(self._timed(n, token_in, token_out, amount_in_wei)): n for n in asked}
+        done_results: dict[str, QuoteResult] = {}
+        latency_ms: dict[str, float] = {}
+        early_cancelled = False
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + bounded(self.deadline_sec)
+        pending = set(tasks)
+        try:
+            while pending:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = tasks[task]
+                    q, elapsed = task.result()
+                    done_results[name] = q
+                    latency_ms[name] = elapsed * 1000
+                    stats = self.cycle_stats[name]
+                    stats.requests += 1
+                    stats.latency_sec += elapsed
+                    if q.ok and q.amount_out_wei > 0:
+                        stats.ok += 1
+                        rate = self._win_rate(pair, name)
+                        if self.early_cancel_win_rate is not None and rate is not None and rate >= self.early_cancel_win_rate:
+                            early_cancelled = bool(pending)
+                if early_cancelled:
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        if not early_cancelled:
+            for task in pending:
+                self.cycle_stats[tasks[task]].timeouts += 1
+
+        ok = {n: q for n, q in done_results.items() if q.ok and q.amount_out_wei > 0}
+        winner = max(ok, key=lambda n: ok[n].amount_out_wei) if ok else None
+        # A cancelled loser might have won, so early-cancelled quotes don't feed the per-pair win rates.
+        if not early_cancelled:
+            self._observe(pair, asked, winner)
+
+        composite_meta = {
+            "sources": asked,
+            "latency_ms": latency_ms,
+            "errors": {n: q.error for n, q in done_results.items() if n not in ok},
+            "timed_out": [tasks[t] for t in pending] if not early_cancelled else [],
+            "early_cancelled": early_cancelled,
+        }
+        if winner is None:
+            errors = [q.error for q in done_results.values() if q.error]
+            return QuoteResult(
+                ok=False,
+                amount_in_wei=amount_in_wei,
+                amount_out_wei=0,
+                token_in=token_in,
+                token_out=token_out,
+                meta={"composite": composite_meta},
+                error=errors[0] if errors else COMPOSITE_DEADLINE_ERROR,
+            )
+
+        self.cycle_stats[winner].wins += 1
+        best = ok[winner]
+        return QuoteResult(
+            ok=True,
+            amount_in_wei=amount_in_wei,
+            amount_out_wei=best.amount_out_wei,
+            token_in=token_in,
+            token_out=token_out,
+            meta={**best.meta, "source_used": winner, "composite": composite_meta},
+        )
+
+    def report(self) -> dict[str, dict[str, Any]]:
+        out = {name: s.to_dict() for name, s in self.cycle_stats.items()}
+        self.cycle_stats = {name: SourceStats() for name in self.sources}
+        return out
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import math
+import time
+from bisect import bisect_left
+from collections import deque
+from typing import Any, Callable
+
+from src.routes.enumerate import route_hops
+
+CURVE_SCREENED = "curve_screened"
+
+
+class QuoteCurveModel:
+    """Per-pair amount->output curves from recent real quotes, one anchor per power-of-two size bucket."""
+
+    def __init__(
+        self,
+        ttl_sec: float = 30.0,
+        max_error_bps: float = 25.0,
+        extrapolate_factor: float = 2.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl_sec = ttl_sec
+        self.max_error_bps = max_error_bps
+        self.extrapolate_factor = extrapolate_factor
+        self.clock = clock
+        # pair -> {bucket: (amount_in, amount_out, observed_at)}
+        self.anchors: dict[tuple[str, str], dict[int, tuple[int, int, float]]] = {}
+        # Recent |estimate - actual| in bps per pair; a pair is only trusted once it has been checked.
+        self.errors: dict[tuple[str, str], deque[float]] = {}
+
+    def _fresh(self, pair: tuple[str, str]) -> list[tuple[int, float]]:
+        now = self.clock()
+        anchors = self.anchors.get(pair)
+        if not anchors:
+            return []
+        stale = [b for b, (_, _, ts) in anchors.items() if now - ts > self.ttl_sec]
+        for b in stale:
+            del anchors[b]
+        if not anchors:
+            # Nothing left to check the old residuals against; make the pair earn trust again.
+            self.errors.pop(pair, None)
+        return sorted((a, out / a) for a, out, _ in anchors.values())
+
+    def _interpolate(self, pair: tuple[str, str], amount_in_wei: int) -> int | None:
+        points = self._fresh(pair)
+        if not points or amount_in_wei <= 0:
+            return None
+        amounts = [a for a, _ in points]
+        i = bisect_left(amounts, amount_in_wei)
+        if i < len(points) and amounts[i] == amount_in_wei:
+            rate = points[i][1]
+        elif i == 0:
+            if amount_in_wei * self.extrapolate_factor < amounts[0]:
+                return None
+            rate = points[0][1]
+        elif i == len(points):
+            if amount_in_wei > amounts[-1] * self.extrapolate_factor:
+                return None
+            rate = points[-1][1]
+        else:
+            (a0, r0), (a1, r1) = points[i - 1], points[i]
+            t = (math.log(amount_in_wei) - math.log(a0)) / (math.log(a1) - math.log(a0))
+            rate = r0 + t * (r1 - r0)
+        return int(amount_in_wei * rate)
+
+    def error_bps(self, token_in: str, token_out: str) -> float | None:
+        errs = self.errors.get((token_in, token_out))
+        return max(errs) if errs else None
+
+    def estimate(self, token_in: str, token_out: str, amount_in_wei: int) -> int | None:
+        err = self.error_bps(token_in, token_out)
+        if err is None or err > self.max_error_bps:
+            return None
+        return self._interpolate((token_in, token_out), amount_in_wei)
+
+    def observe(self, token_in: str, token_out: str, amount_in_wei: int, amount_out_wei: int) -> None:
+        if amount_in_wei <= 0 or amount_out_wei <= 0:
+            return
+        pair = (token_in, token_out)
+        predicted = self._interpolate(pair, amount_in_wei)
+        if predicted is not None:
+            self.errors.setdefault(pair, deque(maxlen=16)).append(abs(predicted - amount_out_wei) * 10000 / amount_out_wei)
+        self.anchors.setdefault(pair, {})[amount_in_wei.bit_length()] = (amount_in_wei, amount_out_wei, self.clock())
+
+    def export_state(self) -> dict[str, Any]:
+        now = self.clock()
+        return {
+            "anchors": [
+                [a, b, amt_in, amt_out, now - ts] for (a, b), anchors in self.anchors.items() for amt_in, amt_out, ts in anchors.values()
+            ],
+            "errors": [[a, b, list(errs)] for (a, b), errs in self.errors.items()],
+        }
+
+    def import_state(self, state: dict[str, Any], age_sec: float) -> None:
+        now = self.clock()
+        for a, b, amt_in, amt_out, age in state["anchors"]:
+            observed_at = now - float(age) - age_sec
+            if now - observed_at <= self.ttl_sec:
+                self.anchors.setdefault((a, b), {})[int(amt_in).bit_length()] = (int(amt_in), int(amt_out), observed_at)
+        for a, b, errs in state["errors"]:
+            if (a, b) in self.anchors:
+                self.errors[(a, b)] = deque(errs, maxlen=16)
+
+    def observe_route(self, row: Any) -> None:
+        for hop in row.hops:
+            meta = hop.quote_meta
+            # Path-quoted intermediates are derived, not quoted; anchoring on them would compound the error.
+            if meta.get("amount_in_estimated") or meta.get("amount_out_estimated"):
+                continue
+            self.observe(hop.token_in, hop.token_out, hop.amount_in_wei, hop.amount_out_wei)
+
+    def estimate_route(self, route_type: str, route: tuple[str, ...], amount_in_wei: int) -> int | None:
+        current = amount_in_wei
+        for token_in, token_out in route_hops(route_type, route):
+            current = self.estimate(token_in, token_out, current)
+            if current is None:
+                return None
+        return current
+
+
+def build_curve_model(cfg: dict[str, Any]) -> QuoteCurveModel | None:
+    curve_cfg = cfg["curve_model"]
+    if not curve_cfg["enabled"]:
+        return None
+    return QuoteCurveModel(
+        ttl_sec=float(curve_cfg["ttl_sec"]),
+        max_error_bps=float(curve_cfg["max_error_bps"]),
+        extrapolate_factor=float(curve_cfg["extrapolate_factor"]),
+    )
@@ -6,21 +6,49 @@ from typing import Any
 
 import httpx
 
+from src.deadline import DEADLINE_EXCEEDED, bounded, remaining
 from src.quote.base import QuoteResult
 
 
 class OneInchQuoteProvider:
-    def __init__(self, chain_id: int, tokens: dict[str, Any], oneinch_cfg: dict[str, Any]) -> None:
+    def __init__(
+        self,
+        chain_id: int,
+        tokens: dict[str, Any],
+        oneinch_cfg: dict[str, Any],
+        client: httpx.AsyncClient | None = None,
+    ) -> None:
         self.chain_id = chain_id
         self.tokens = tokens
         self.base_url = oneinch_cfg["base_url"].rstrip("/")
         self.timeout_sec = oneinch_cfg["timeout_sec"]
         self.max_retries = oneinch_cfg["max_retries"]
         self.api_key = oneinch_cfg.get("api_key", "")
-        self.client = httpx.AsyncClient(timeout=self.timeout_sec)
+        # A shared client is owned (and closed) by whoever passed it in.
+        self._owns_client = client is None
+        self.client = client if client is not None else httpx.AsyncClient(timeout=self.timeout_sec)
+
+    def set_tokens(self, tokens: dict[str, Any], runtime=None) -> None:
+        self.tokens = tokens
+
+    def adopt(self, old: "OneInchQuoteProvider") -> None:
+        # A rebuilt provider handed the previous client takes over closing it.
+        if old.client is self.client:
+            self._owns_client, old._owns_client = old._owns_client, False
 
     async def close(self) -> None:
-        await self.client.aclose()
+        if self._owns_client:
+            await self.client.aclose()
+
+    async def _backoff(self, attempt: int) -> bool:
+        """Sleep before the next retry; False when the cycle budget cannot cover the wait."""
+        base = (2**attempt) * 0.25
+        left = remaining()
+        # Compare against the worst-case jitter so the answer doesn't depend on the draw.
+        if left is not None and base + 0.2 >= left:
+            return False
+        await asyncio.sleep(base + random.uniform(0, 0.2))
+        return True
 
     async def quote(self, token_in: str, token_out: str, amount_in_wei: int) -> QuoteResult:
         t_in = self.tokens[token_in]
@@ -38,15 +66,30 @@ class OneInchQuoteProvider:
         last_error = "unknown"
         status = None
         for attempt in range(self.max_retries + 1):
+            timeout = bounded(self.timeout_sec)
+            if timeout <= 0:
+                last_error = DEADLINE_EXCEEDED
+                break
             try:
-                resp = await self.client.get(endpoint, params=params, headers=headers)
+                resp = await self.client.get(endpoint, params=params, headers=headers, timeout=timeout)
                 status = resp.status_code
                 if status in {429, 500, 502, 503, 504}:
                     last_error = f"retryable_http_{status}"
-                    if attempt < self.max_retries:
-                        delay = (2**attempt) * 0.25 + random.uniform(0, 0.2)
-                        await asyncio.sleep(delay)
+                    if attempt < self.max_retries and await self._backoff(attempt):
                         continue
+                    # Out of retries (or budget): report the rate limit / outage, not a client error.
+                    break
+                if 400 <= status < 500:
+                    # Client errors (unsupported pair, bad amount) will not change on retry.
+                    return QuoteResult(
+                        ok=False,
+                        amount_in_wei=amount_in_wei,
+                        amount_out_wei=0,
+                        token_in=token_in,
+                        token_out=token_out,
+                        meta={"endpoint": endpoint, "http_status": status},
+                        error=f"http_{status}",
+                    )
                 resp.raise_for_status()
                 payload = resp.json()
                 out_raw = payload.get("dstAmount") or payload.get("toTokenAmount")
@@ -75,10 +118,9 @@ class OneInchQuoteProvider:
                 )
             except Exception as exc:  # noqa: BLE001
                 last_error = str(exc)
-                if attempt < self.max_retries:
-                    delay = (2**attempt) * 0.25 + random.uniform(0, 0.2)
-                    await asyncio.sleep(delay)
+                if attempt < self.max_retries and await self._backoff(attempt):
                     continue
+                break
 
         return QuoteResult(
             ok=False,
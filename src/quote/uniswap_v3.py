@@ -1,10 +1,16 @@
 from __future__ import annotations
 
+import asyncio
+import itertools
 from typing import Any
 
 from web3 import Web3
 
+from src.config_loader import RuntimeConfig
 from src.quote.base import QuoteResult
+from src.quote.breaker import CIRCUIT_OPEN_ERROR, CLOSED, BreakerRegistry
+from src.quote.cache import BlockQuoteCache
+from src.workers import to_thread
 
 FACTORY_ABI = [
     {
@@ -70,7 +76,22 @@ QUOTER_V2_ABI = [
         ],
         "stateMutability": "nonpayable",
         "type": "function",
-    }
+    },
+    {
+        "inputs": [
+            {"internalType": "bytes", "name": "path", "type": "bytes"},
+            {"internalType": "uint256", "name": "amountIn", "type": "uint256"},
+        ],
+        "name": "quoteExactInput",
+        "outputs": [
+            {"internalType": "uint256", "name": "amountOut", "type": "uint256"},
+            {"internalType": "uint160[]", "name": "sqrtPriceX96AfterList", "type": "uint160[]"},
+            {"internalType": "uint32[]", "name": "initializedTicksCrossedList", "type": "uint32[]"},
+            {"internalType": "uint256", "name": "gasEstimate", "type": "uint256"},
+        ],
+        "stateMutability": "nonpayable",
+        "type": "function",
+    },
 ]
 
 QUOTER_ABI = [
@@ -90,85 +111,242 @@ QUOTER_ABI = [
 ]
 
 
+PATH_QUOTER = "QuoterV2.path"
+ZERO_ADDRESS = "0x" + "00" * 20
+Q192 = 2**192
+
+
+def encode_path(addresses: list[str], fees: list[int]) -> bytes:
+    """Uniswap V3 multi-hop path: token (20 bytes), fee (3 bytes), token, ..."""
+    out = bytes.fromhex(addresses[0][2:])
+    for fee, address in zip(fees, addresses[1:]):
+        out += fee.to_bytes(3, "big") + bytes.fromhex(address[2:])
+    return out
+
+
+def estimate_hop_out(amount_in: int, fee: int, sqrt_before: int, sqrt_after: int, zero_for_one: bool) -> int:
+    # Within one tick range the average execution price is sqrt(P_before * P_after), i.e. the product of the
+    # two sqrt prices; exact when no initialized tick was crossed, an approximation otherwise.
+    amount_in = amount_in * (1_000_000 - fee) // 1_000_000
+    if sqrt_before == 0 or sqrt_after == 0:
+        return 0
+    if zero_for_one:
+        return amount_in * sqrt_before * sqrt_after // Q192
+    return amount_in * Q192 // (sqrt_before * sqrt_after)
+
+
 class UniswapV3QuoteProvider:
-    def __init__(self, w3: Web3, tokens: dict[str, Any], cfg: dict[str, Any], min_pool_liquidity_usd: float | None = None) -> None:
+    state_key = "uniswap"
+
+    def __init__(
+        self,
+        w3: Web3,
+        tokens: dict[str, Any],
+        cfg: dict[str, Any],
+        min_pool_liquidity_usd: float | None = None,
+        cache: BlockQuoteCache | None = None,
+        runtime: RuntimeConfig | None = None,
+        breakers: BreakerRegistry | None = None,
+    ) -> None:
         self.w3 = w3
-        self.tokens = tokens
+        self.cache = cache
+        self.set_tokens(tokens, runtime)
         self.factory = w3.eth.contract(address=Web3.to_checksum_address(cfg["factory_address"]), abi=FACTORY_ABI)
         self.quoter_v2 = w3.eth.contract(address=Web3.to_checksum_address(cfg["quoter_v2_address"]), abi=QUOTER_V2_ABI)
         self.quoter = w3.eth.contract(address=Web3.to_checksum_address(cfg["quoter_address"]), abi=QUOTER_ABI)
         self.fees = [500, 3000, 10000]
         self.check_pool_state = cfg.get("check_pool_state", True)
+        self.path_quotes = cfg.get("path_quotes", False)
+        self.max_path_combos = int(cfg.get("max_path_combos", 27))
         self.min_pool_liquidity_usd = min_pool_liquidity_usd
+        self.breakers = breakers
+        # Pools never move once created, so existing ones are remembered for the life of the provider.
+        self.pools: dict[tuple[str, str, int], str] = {}
+        # Fee tier that last gave the best quote per directed (address) pair; tried first, so the path-combo cap
+        # keeps the combinations most likely to win.
+        self.preferred_fees: dict[tuple[str, str], int] = {}
+        # Set while seeded from a pool index kept caught up with the chain: a pair/fee missing from `pools` then
+        # has no pool at all. Otherwise misses still go to the factory.
+        self.known_pools_only = False
+        self._pool_contracts: dict[str, Any] = {}
+        self._get_pool_fn = self.factory.functions.getPool
+        self._quote_v2_fn = self.quoter_v2.functions.quoteExactInputSingle
+        self._quote_v1_fn = self.quoter.functions.quoteExactInputSingle
+        self._quote_path_fn = self.quoter_v2.functions.quoteExactInput
+
+    def set_tokens(self, tokens: dict[str, Any], runtime: RuntimeConfig | None = None) -> None:
+        # The pool registry is keyed by address, so it stays valid across token-list changes.
+        self.tokens = tokens
+        self.addresses = {
+            s: runtime.tokens[s].checksum_address if runtime is not None and s in runtime.tokens else Web3.to_checksum_address(t["address"])
+            for s, t in tokens.items()
+        }
+        if self.cache is not None:
+            self.cache.token_addresses.update(self.addresses)
+
+    def _remember_pool(self, key: tuple[str, str, int], pool: str) -> None:
+        self.pools[key] = pool
+        if self.cache is not None:
+            self.cache.register_pool(pool, key[0], key[1])
+
+    def adopt(self, old: "UniswapV3QuoteProvider") -> None:
+        if old.factory.address == self.factory.address:
+            for key, pool in old.pools.items():
+                self._remember_pool(key, pool)
+            self.preferred_fees.update(old.preferred_fees)
+            self._pool_contracts.update(old._pool_contracts)
+
+    def seed_pools(self, factory: str, rows: list[tuple[str, str, int, str]], complete: bool = False) -> None:
+        """Load (token0, token1, fee, pool) rows from the pool index; a complete index also answers misses."""
+        # An index built for another factory (the factory was hot-reloaded, the index is restart-pinned) is stale.
+        if factory.lower() != self.factory.address.lower():
+            self.known_pools_only = False
+            return
+        checksum = {a.lower(): a for a in self.addresses.values()}
+        for token0, token1, fee, pool in rows:
+            if token0 in checksum and token1 in checksum:
+                self._remember_pool((checksum[token0], checksum[token1], int(fee)), Web3.to_checksum_address(pool))
+        self.known_pools_only = complete
+
+    def export_state(self) -> dict[str, Any]:
+        return {
+            "factory": self.factory.address,
+            "pools": [[a, b, fee, pool] for (a, b, fee), pool in self.pools.items()],
+            "preferred_fees": [[a, b, fee] for (a, b), fee in self.preferred_fees.items()],
+        }
+
+    def import_state(self, state: dict[str, Any], age_sec: float) -> None:
+        # Pools are immutable once created, so the registry never goes stale; only the factory must match.
+        if state.get("factory") != self.factory.address:
+            return
+        for a, b, fee, pool in state["pools"]:
+            if (a, b, int(fee)) not in self.pools:
+                self._remember_pool((a, b, int(fee)), pool)
+        for a, b, fee in state.get("preferred_fees", []):
+            self.preferred_fees.setdefault((a, b), int(fee))
+
+    def _fee_order(self, token_in: str, token_out: str) -> list[int]:
+        preferred = self.preferred_fees.get((self.addresses[token_in], self.addresses[token_out]))
+        if preferred not in self.fees:
+            return self.fees
+        return [preferred, *(f for f in self.fees if f != preferred)]
+
+    def _prefer(self, token_in: str, token_out: str, fee: int) -> None:
+        self.preferred_fees[(self.addresses[token_in], self.addresses[token_out])] = fee
 
     def _get_pool(self, token_in: str, token_out: str, fee: int) -> str:
-        a = Web3.to_checksum_address(self.tokens[token_in]["address"])
-        b = Web3.to_checksum_address(self.tokens[token_out]["address"])
-        return self.factory.functions.getPool(a, b, fee).call()
-
-    def _pool_state(self, pool_address: str) -> tuple[bool, int | None]:
-        pool = self.w3.eth.contract(address=Web3.to_checksum_address(pool_address), abi=POOL_ABI)
-        slot0_ok = False
-        liq = None
+        a = self.addresses[token_in]
+        b = self.addresses[token_out]
+        key = (a, b, fee) if a.lower() < b.lower() else (b, a, fee)
+        pool = self.pools.get(key)
+        if pool is None:
+            if self.known_pools_only:
+                return ZERO_ADDRESS
+            pool = self._get_pool_fn(a, b, fee).call()
+            if int(pool, 16) != 0:
+                self._remember_pool(key, pool)
+        return pool
+
+    def _pool_contract(self, pool_address: str):
+        pool = self._pool_contracts.get(pool_address)
+        if pool is None:
+            pool = self.w3.eth.contract(address=Web3.to_checksum_address(pool_address), abi=POOL_ABI)
+            self._pool_contracts[pool_address] = pool
+        return pool
+
+    def _pool_state(self, pool_address: str) -> tuple[int | None, int | None]:
+        """(sqrtPriceX96, liquidity), None for whichever read failed; read once per pool per block when cached."""
+        if self.cache is not None:
+            hit = self.cache.get_pool_state(pool_address)
+            if hit is not None:
+                return hit
+        pool = self._pool_contract(pool_address)
         try:
-            pool.functions.slot0().call()
-            slot0_ok = True
+            sqrt_price = int(pool.functions.slot0().call()[0])
         except Exception:  # noqa: BLE001
-            slot0_ok = False
+            sqrt_price = None
         try:
             liq = int(pool.functions.liquidity().call())
         except Exception:  # noqa: BLE001
             liq = None
-        return slot0_ok, liq
+        state = (sqrt_price, liq)
+        # A failed read may be transient, so only complete states are shared.
+        if self.cache is not None and sqrt_price is not None and liq is not None:
+            self.cache.put_pool_state(pool_address, state)
+        return state
+
+    def _checked_state(self, pool_address: str) -> tuple[int | None, int | None] | None:
+        return self._pool_state(pool_address) if self.check_pool_state else None
+
+    @staticmethod
+    def _pool_checks(state: tuple[int | None, int | None] | None) -> dict[str, Any]:
+        if state is None:
+            return {"exists": True, "liquidity": None, "slot0_ok": False, "incomplete_pool_state": False}
+        sqrt_price, liq = state
+        slot0_ok = sqrt_price is not None
+        return {"exists": True, "liquidity": liq, "slot0_ok": slot0_ok, "incomplete_pool_state": liq is None or not slot0_ok}
 
     def _quote_one(self, token_in: str, token_out: str, amount_in_wei: int, fee: int) -> tuple[int, str, dict[str, Any], str | None]:
         pool_address = self._get_pool(token_in, token_out, fee)
         if int(pool_address, 16) == 0:
             return 0, "", {"exists": False, "liquidity": None, "slot0_ok": False}, "pool_not_found"
 
-        slot0_ok = False
-        liq = None
-        incomplete_pool_state = False
-        if self.check_pool_state:
-            slot0_ok, liq = self._pool_state(pool_address)
-            if liq is None or not slot0_ok:
-                incomplete_pool_state = True
-
+        checks = self._pool_checks(self._checked_state(pool_address))
+        liq = checks["liquidity"]
         if self.min_pool_liquidity_usd is not None and liq is not None and liq < int(self.min_pool_liquidity_usd):
-            return 0, pool_address, {"exists": True, "liquidity": liq, "slot0_ok": slot0_ok, "incomplete_pool_state": incomplete_pool_state}, "low_liquidity"
+            return 0, pool_address, checks, "low_liquidity"
 
-        a = Web3.to_checksum_address(self.tokens[token_in]["address"])
-        b = Web3.to_checksum_address(self.tokens[token_out]["address"])
+        a = self.addresses[token_in]
+        b = self.addresses[token_out]
 
         try:
             params = (a, b, fee, amount_in_wei, 0)
-            amount_out, _, _, gas_estimate = self.quoter_v2.functions.quoteExactInputSingle(params).call()
-            return int(amount_out), pool_address, {
-                "exists": True,
-                "liquidity": liq,
-                "slot0_ok": slot0_ok,
-                "incomplete_pool_state": incomplete_pool_state,
-                "gasEstimate": int(gas_estimate),
-            }, "QuoterV2"
+            amount_out, _, _, gas_estimate = self._quote_v2_fn(params).call()
+            return int(amount_out), pool_address, {**checks, "gasEstimate": int(gas_estimate)}, "QuoterV2"
         except Exception:  # noqa: BLE001
             try:
-                amount_out = self.quoter.functions.quoteExactInputSingle(a, b, fee, amount_in_wei, 0).call()
-                return int(amount_out), pool_address, {
-                    "exists": True,
-                    "liquidity": liq,
-                    "slot0_ok": slot0_ok,
-                    "incomplete_pool_state": incomplete_pool_state,
-                }, "Quoter"
+                amount_out = self._quote_v1_fn(a, b, fee, amount_in_wei, 0).call()
+                return int(amount_out), pool_address, checks, "Quoter"
             except Exception as exc:  # noqa: BLE001
-                return 0, pool_address, {"exists": True, "liquidity": liq, "slot0_ok": slot0_ok, "incomplete_pool_state": incomplete_pool_state}, str(exc)
+                return 0, pool_address, checks, str(exc)
+
+    def _cached_quote_one(self, token_in: str, token_out: str, amount_in_wei: int, fee: int) -> tuple[int, str, dict[str, Any], str | None]:
+        if self.cache is None:
+            return self._quote_one(token_in, token_out, amount_in_wei, fee)
+        hit = self.cache.get_quote(token_in, token_out, fee, amount_in_wei)
+        if hit is not None:
+            return hit
+        res = self._quote_one(token_in, token_out, amount_in_wei, fee)
+        # RPC exceptions surface as free-form error strings; only cache deterministic outcomes.
+        if res[3] in {"QuoterV2", "Quoter", "pool_not_found", "low_liquidity"}:
+            self.cache.put_quote(token_in, token_out, fee, amount_in_wei, res)
+        return res
 
     async def quote(self, token_in: str, token_out: str, amount_in_wei: int) -> QuoteResult:
         best_out = 0
         best_meta: dict[str, Any] = {}
         best_err = None
 
-        for fee in self.fees:
-            out, pool_addr, checks, quoter_used = self._quote_one(token_in, token_out, amount_in_wei, fee)
+        for fee in self._fee_order(token_in, token_out):
+            breaker_key = ("pool", token_in, token_out, fee)
+            if self.breakers is not None and not self.breakers.allow(breaker_key):
+                best_err = best_err or CIRCUIT_OPEN_ERROR
+                continue
+            try:
+                out, pool_addr, checks, quoter_used = await to_thread(
+                    self._cached_quote_one, token_in, token_out, amount_in_wei, fee
+                )
+            except BaseException:
+                if self.breakers is not None:
+                    self.breakers.release(breaker_key)
+                raise
+            if self.breakers is not None:
+                if out > 0:
+                    self.breakers.record_success(breaker_key)
+                elif quoter_used in {"pool_not_found", "low_liquidity"}:
+                    self.breakers.record_failure(breaker_key)
+                else:
+                    self.breakers.release(breaker_key)
             if out > best_out:
                 best_out = out
                 best_meta = {
@@ -180,6 +358,8 @@ class UniswapV3QuoteProvider:
             if out == 0 and isinstance(quoter_used, str) and quoter_used not in {"QuoterV2", "Quoter"}:
                 best_err = quoter_used
 
+        if best_out > 0:
+            self._prefer(token_in, token_out, best_meta["fee_tier_used"])
         return QuoteResult(
             ok=best_out > 0,
             amount_in_wei=amount_in_wei,
@@ -189,3 +369,85 @@ class UniswapV3QuoteProvider:
             meta=best_meta,
             error=None if best_out > 0 else (best_err or "no_viable_fee_tier"),
         )
+
+    def _path_fee_options(self, token_in: str, token_out: str) -> list[tuple[int, str, dict[str, Any], Any]]:
+        options = []
+        for fee in self._fee_order(token_in, token_out):
+            # Path quotes never take a half-open probe slot; tiers that aren't closed wait for the per-hop path.
+            if self.breakers is not None and self.breakers.state(("pool", token_in, token_out, fee)) != CLOSED:
+                continue
+            pool = self._get_pool(token_in, token_out, fee)
+            if int(pool, 16) == 0:
+                continue
+            # Same checks as a single-hop quote, so path-quoted hops carry the same liquidity / pool-state flags.
+            state = self._checked_state(pool)
+            checks = self._pool_checks(state)
+            liq = checks["liquidity"]
+            if self.min_pool_liquidity_usd is not None and liq is not None and liq < int(self.min_pool_liquidity_usd):
+                continue
+            options.append((fee, pool, checks, state))
+        return options
+
+    def _quote_path_call(self, tokens: list[str], fees: list[int], amount_in_wei: int) -> tuple[int, list[int], list[int], int] | None:
+        path = encode_path([self.addresses[t] for t in tokens], fees)
+        try:
+            amount_out, after, ticks, gas_estimate = self._quote_path_fn(path, amount_in_wei).call()
+        except Exception:  # noqa: BLE001
+            return None
+        return int(amount_out), [int(x) for x in after], [int(x) for x in ticks], int(gas_estimate)
+
+    async def quote_path(self, tokens: list[str], amount_in_wei: int) -> list[QuoteResult] | None:
+        """Quote a whole multi-hop route with one quoteExactInput call per fee-tier combination.
+
+        Returns one QuoteResult per hop, or None when path quoting is off or no combination quotes, in which
+        case the caller falls back to hop-by-hop quoting. Only the route's input and final output are exact:
+        intermediate amounts are derived from each pool's sqrt price before/after the swap and flagged
+        `amount_in_estimated` / `amount_out_estimated` in the hop meta.
+        """
+        if not self.path_quotes:
+            return None
+        hops = list(zip(tokens, tokens[1:]))
+        options = await to_thread(lambda: [self._path_fee_options(a, b) for a, b in hops])
+        if not all(options):
+            return None
+        combos = list(itertools.islice(itertools.product(*options), self.max_path_combos))
+        calls = await asyncio.gather(
+            *(to_thread(self._quote_path_call, tokens, [fee for fee, *_ in combo], amount_in_wei) for combo in combos)
+        )
+        quoted = [(res, combo) for res, combo in zip(calls, combos) if res is not None and res[0] > 0]
+        if not quoted:
+            return None
+        (amount_out, after, ticks, gas_estimate), combo = max(quoted, key=lambda rc: rc[0][0])
+        fees = [fee for fee, *_ in combo]
+        for (token_in, token_out), fee in zip(hops, fees):
+            self._prefer(token_in, token_out, fee)
+        # Pre-swap prices come from the pool state already read for the checks (or the per-block cache).
+        before = await to_thread(
+            lambda: [(state or self._pool_state(pool))[0] for _, pool, _, state in combo[:-1]]
+        )
+
+        quotes = []
+        current = amount_in_wei
+        for i, ((token_in, token_out), (fee, pool, checks, _)) in enumerate(zip(hops, combo)):
+            last = i == len(hops) - 1
+            if last:
+                out = amount_out
+            else:
+                zero_for_one = self.addresses[token_in].lower() < self.addresses[token_out].lower()
+                out = estimate_hop_out(current, fee, before[i] or after[i], after[i], zero_for_one)
+            meta = {
+                "fee_tier_used": fee,
+                "pool_address": pool,
+                "quoter_used": PATH_QUOTER,
+                "path_fees": fees,
+                "sqrtPriceX96After": after[i],
+                "initializedTicksCrossed": ticks[i],
+                "amount_in_estimated": i > 0,
+                "amount_out_estimated": not last,
+                "pool_checks": checks,
+            }
+            if last:
+                meta["gasEstimate"] = gas_estimate
+            quotes.append(QuoteResult(True, current, out, token_in, token_out, meta=meta))
+            current = out
+        return quotes
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any
+
+FLAG_NAMES = ("suspicious", "low_liquidity", "incomplete_pricing", "incomplete_pool_state")
+
+
+def route_id(route_type: str, route: tuple[str, ...], amount_in_human: float) -> str:
+    return f"{route_type}:{'-'.join(route)}:{amount_in_human}"
+
+
+class RouteFlags:
+    __slots__ = FLAG_NAMES
+
+    def __init__(self) -> None:
+        self.suspicious = False
+        self.low_liquidity = False
+        self.incomplete_pricing = False
+        self.incomplete_pool_state = False
+
+    def to_dict(self) -> dict[str, bool]:
+        return {
+            "suspicious": self.suspicious,
+            "low_liquidity": self.low_liquidity,
+            "incomplete_pricing": self.incomplete_pricing,
+            "incomplete_pool_state": self.incomplete_pool_state,
+        }
+
+
+class HopRecord:
+    __slots__ = ("token_in", "token_out", "amount_in_wei", "amount_out_wei", "quote_meta")
+
+    def __init__(self, token_in: str, token_out: str, amount_in_wei: int, amount_out_wei: int, quote_meta: dict[str, Any]) -> None:
+        self.token_in = token_in
+        self.token_out = token_out
+        self.amount_in_wei = amount_in_wei
+        self.amount_out_wei = amount_out_wei
+        self.quote_meta = quote_meta
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "token_in": self.token_in,
+            "token_out": self.token_out,
+            "amount_in_wei": str(self.amount_in_wei),
+            "amount_out_wei": str(self.amount_out_wei),
+            "quote_meta": self.quote_meta,
+        }
+
+
+class RouteResult:
+    """One evaluated route x amount; wei amounts stay ints until `to_dict`."""
+
+    __slots__ = (
+        "ts",
+        "chain_id",
+        "source",
+        "route_type",
+        "route",
+        "amount_in_human",
+        "amount_in_wei",
+        "hops",
+        "gross_return_wei",
+        "gross_return_usd_est",
+        "gas_price_wei",
+        "gas_units_est",
+        "gas_cost_usd_est",
+        "buffer_bps",
+        "buffer_usd_est",
+        "net_usd_est",
+        "flags",
+        "status",
+        "error_message",
+        "price_source",
+    )
+
+    def __init__(
+        self,
+        ts: float,
+        chain_id: int,
+        source: str,
+        route_type: str,
+        route: tuple[str, ...],
+        amount_in_human: float,
+        amount_in_wei: int,
+        hops: list[HopRecord],
+        gas_units_est: int,
+        buffer_bps: float,
+        flags: RouteFlags,
+    ) -> None:
+        self.ts = ts
+        self.chain_id = chain_id
+        self.source = source
+        self.route_type = route_type
+        self.route = route
+        self.amount_in_human = amount_in_human
+        self.amount_in_wei = amount_in_wei
+        self.hops = hops
+        self.gross_return_wei = 0
+        self.gross_return_usd_est: float | None = None
+        self.gas_price_wei: int | None = None
+        self.gas_units_est = gas_units_est
+        self.gas_cost_usd_est: float | None = None
+        self.buffer_bps = buffer_bps
+        self.buffer_usd_est: float | None = None
+        self.net_usd_est: float | None = None
+        self.flags = flags
+        self.status = "ok"
+        self.error_message: str | None = None
+        self.price_source: dict[str, str] | None = None
+
+    @property
+    def route_symbols(self) -> list[str]:
+        return [*self.route, self.route[0]]
+
+    @property
+    def route_id(self) -> str:
+        return route_id(self.route_type, self.route, self.amount_in_human)
+
+    @property
+    def ts_iso(self) -> str:
+        return datetime.fromtimestamp(self.ts, timezone.utc).isoformat()
+
+    def to_dict(self) -> dict[str, Any]:
+        out = {
+            "ts_iso": self.ts_iso,
+            "chainId": self.chain_id,
+            "source": self.source,
+            "route_type": self.route_type,
+            "route_symbols": self.route_symbols,
+            "amount_in_human": self.amount_in_human,
+            "amount_in_wei": str(self.amount_in_wei),
+            "hops": [h.to_dict() for h in self.hops],
+            "gross_return_wei": str(self.gross_return_wei),
+            "gross_return_usd_est": self.gross_return_usd_est,
+            "gas_price_wei": self.gas_price_wei,
+            "gas_units_est": self.gas_units_est,
+            "gas_cost_usd_est": self.gas_cost_usd_est,
+            "buffer_bps": self.buffer_bps,
+            "buffer_usd_est": self.buffer_usd_est,
+            "net_usd_est": self.net_usd_est,
+            "flags": self.flags.to_dict(),
+            "status": self.status,
+            "error_message": self.error_message,
+        }
+        if self.price_source is not None:
+            out["price_source"] = self.price_source
+        return out
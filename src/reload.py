@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import os
+from typing import Any, Iterator
+
+from src.config_loader import load_config
+from src.logger import now_iso
+
+# Keys whose change means a different chain, RPC topology or cache layout; they stay pinned until restart.
+RESTART_KEYS = frozenset(
+    {
+        "chain_id",
+        "rpc_url",
+        "rpc_urls",
+        "rpc_pool",
+        "quote_cache",
+        "circuit_breaker",
+        "curve_model",
+        "sharding",
+        "multichain",
+        "snapshot",
+        "feed",
+        "pool_index",
+    }
+)
+# Keys that change which quote providers exist or how they are built.
+PROVIDER_KEYS = frozenset({"quote_source", "composite", "oneinch", "uniswap", "min_pool_liquidity_usd"})
+# Keys that change the candidate universe.
+ROUTE_KEYS = frozenset({"tokens", "route_sets", "amounts", "path_enum_rules"})
+
+
+def diff_config(old: dict[str, Any], new: dict[str, Any]) -> set[str]:
+    keys = (set(old) | set(new)) - {"runtime"}
+    return {k for k in keys if old.get(k) != new.get(k)}
+
+
+def iter_providers(provider: Any) -> Iterator[Any]:
+    """Yield a provider and everything it wraps (breaker wrappers, composite sources)."""
+    yield provider
+    # Look at instance attributes only: breaker wrappers forward unknown attributes to what they wrap.
+    attrs = getattr(provider, "__dict__", {})
+    if attrs.get("inner") is not None:
+        yield from iter_providers(attrs["inner"])
+    for source in attrs.get("sources", {}).values():
+        yield from iter_providers(source)
+
+
+class ConfigWatcher:
+    """Polls a config file's mtime and returns a freshly validated config when it changes."""
+
+    def __init__(self, path: str, label: str | None = None) -> None:
+        self.path = path
+        self.label = label
+        self._stamp = self._stat()
+
+    def _stat(self) -> tuple[int, int] | None:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def poll(self) -> dict[str, Any] | None:
+        stamp = self._stat()
+        if stamp is None or stamp == self._stamp:
+            return None
+        self._stamp = stamp
+        try:
+            return load_config(self.path)
+        except Exception as exc:  # noqa: BLE001
+            # A half-written or invalid file must not take the runner down; keep the running config.
+            prefix = f" [{self.label}]" if self.label else ""
+            print(f"[{now_iso()}]{prefix} config reload rejected ({self.path}): {exc}")
+            return None
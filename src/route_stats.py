@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import time
+from collections import Counter
+from typing import Any
+
+from src.logger import JsonlLogger
+from src.records import RouteResult
+
+
+class RouteStats:
+    __slots__ = (
+        "samples",
+        "ok",
+        "hits",
+        "ewma_net_usd",
+        "errors",
+        "last_status",
+        "last_net_usd",
+        "last_changed_ts",
+        "logged_status",
+        "logged_net_usd",
+    )
+
+    def __init__(self) -> None:
+        self.samples = 0
+        self.ok = 0
+        self.hits = 0
+        self.ewma_net_usd: float | None = None
+        self.errors: Counter[str] = Counter()
+        self.last_status: str | None = None
+        self.last_net_usd: float | None = None
+        self.last_changed_ts: float | None = None
+        # What the log last saw for this route; change-only logging compares against it.
+        self.logged_status: str | None = None
+        self.logged_net_usd: float | None = None
+
+    def reset_window(self) -> None:
+        # Counts cover one summary window; the EWMA and last-seen values carry over.
+        self.samples = 0
+        self.ok = 0
+        self.hits = 0
+        self.errors.clear()
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "n": self.samples,
+            "ok_rate": round(self.ok / self.samples, 4) if self.samples else None,
+            "hit_rate": round(self.hits / self.samples, 4) if self.samples else None,
+            "ewma_net_usd": None if self.ewma_net_usd is None else round(self.ewma_net_usd, 6),
+            "last_net_usd": self.last_net_usd,
+            "last_status": self.last_status,
+            "errors": dict(self.errors),
+            "last_changed_ts": self.last_changed_ts,
+        }
+
+
+class RouteStatsAggregator:
+    """Per-route stats over each summary window, and the change-only filter deciding which rows are worth a full log line."""
+
+    def __init__(self, logging_cfg: dict[str, Any]) -> None:
+        self.configure(logging_cfg)
+        self.routes: dict[str, RouteStats] = {}
+        self.rows_seen = 0
+        self.rows_changed = 0
+
+    def configure(self, logging_cfg: dict[str, Any]) -> None:
+        self.alpha = float(logging_cfg["ewma_alpha"])
+        self.hit_min_net_usd = float(logging_cfg["hit_min_net_usd"])
+        self.net_change_usd = float(logging_cfg["net_change_usd"])
+        self.net_thresholds_usd = sorted(float(x) for x in logging_cfg["net_thresholds_usd"])
+
+    def retain(self, route_ids: set[str]) -> None:
+        """Forget routes that are no longer candidates (e.g. removed by a config reload)."""
+        self.routes = {rid: st for rid, st in self.routes.items() if rid in route_ids}
+
+    def _crosses(self, old: float, new: float) -> bool:
+        return any((old < level) != (new < level) for level in self.net_thresholds_usd)
+
+    def _should_log(self, st: RouteStats, row: RouteResult) -> bool:
+        if st.logged_status is None or row.status != st.logged_status:
+            return True
+        old, new = st.logged_net_usd, row.net_usd_est
+        if old is None or new is None:
+            return old is not new
+        return abs(new - old) >= self.net_change_usd or self._crosses(old, new)
+
+    def observe(self, results: list[RouteResult]) -> list[RouteResult]:
+        """Fold a cycle into the stats; returns the rows that changed enough to log in full."""
+        changed = []
+        for row in results:
+            st = self.routes.get(row.route_id)
+            if st is None:
+                st = self.routes[row.route_id] = RouteStats()
+            st.samples += 1
+            net = row.net_usd_est
+            if row.status == "ok":
+                st.ok += 1
+            else:
+                st.errors[row.error_message or row.status] += 1
+            if net is not None:
+                st.ewma_net_usd = net if st.ewma_net_usd is None else st.ewma_net_usd + self.alpha * (net - st.ewma_net_usd)
+                if net > self.hit_min_net_usd:
+                    st.hits += 1
+            if row.status != st.last_status or net != st.last_net_usd:
+                st.last_changed_ts = row.ts
+            st.last_status = row.status
+            st.last_net_usd = net
+            if self._should_log(st, row):
+                st.logged_status = row.status
+                st.logged_net_usd = net
+                changed.append(row)
+        self.rows_seen += len(results)
+        self.rows_changed += len(changed)
+        return changed
+
+    def summary(self) -> dict[str, Any]:
+        out = {
+            "kind": "route_summary",
+            "ts": time.time(),
+            "rows_seen": self.rows_seen,
+            "rows_changed": self.rows_changed,
+            "routes": {rid: st.to_dict() for rid, st in self.routes.items()},
+        }
+        self.rows_seen = 0
+        self.rows_changed = 0
+        for st in self.routes.values():
+            st.reset_window()
+        return out
+
+
+class RouteLog:
+    """Writes each cycle's rows in full or change-only mode, plus periodic route summaries."""
+
+    def __init__(self, log_dir: str, logging_cfg: dict[str, Any]) -> None:
+        self.rows = JsonlLogger(log_dir)
+        self.summaries = JsonlLogger(log_dir, suffix=".summary")
+        self.stats = RouteStatsAggregator(logging_cfg)
+        self.configure(logging_cfg)
+        self._last_summary = time.monotonic()
+
+    def configure(self, logging_cfg: dict[str, Any]) -> None:
+        """Apply a reloaded `logging` section; per-route stats and the change filter's baselines carry over."""
+        self.mode = logging_cfg["mode"]
+        self.summary_interval_sec = float(logging_cfg["summary_interval_sec"])
+        self.stats.configure(logging_cfg)
+
+    def retain(self, route_ids: set[str]) -> None:
+        self.stats.retain(route_ids)
+
+    def write_cycle(self, results: list[RouteResult]) -> int:
+        changed = self.stats.observe(results)
+        if self.mode == "full":
+            self.rows.write_many(results)
+            rows = results
+        else:
+            # Marked so offline tools can tell these rows are a filtered subset, not every evaluation.
+            rows = changed
+            self.rows.write_many({**row.to_dict(), "log_mode": "changes"} for row in changed)
+        if self.summary_interval_sec > 0 and time.monotonic() - self._last_summary >= self.summary_interval_sec:
+            self.flush_summary()
+        return len(rows)
+
+    def flush_summary(self) -> None:
+        self.summaries.write(self.stats.summary())
+        self._last_summary = time.monotonic()
+
+    def close(self) -> None:
+        # Don't lose the tail of the stats window on shutdown.
+        if self.summary_interval_sec > 0 and self.stats.rows_seen:
+            self.flush_summary()
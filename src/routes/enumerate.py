@@ -7,6 +7,14 @@ def _all_whitelisted(tokens: dict, symbols: Iterable[str]) -> bool:
     return all(sym in tokens for sym in symbols)
 
 
+def route_hops(route_type: str, route: tuple[str, ...]) -> list[tuple[str, str]]:
+    if route_type == "loop2":
+        a, b = route
+        return [(a, b), (b, a)]
+    a, b, c = route
+    return [(a, b), (b, c), (c, a)]
+
+
 def enumerate_loops2(config: dict) -> list[tuple[str, str]]:
     token_map = config["tokens"]
     loops = []
@@ -46,3 +54,35 @@ def enumerate_triangles3(config: dict) -> list[tuple[str, str, str]]:
         out.append((a, b, c))
 
     return out
+
+
+def enumerate_linked_routes(
+    config: dict, linked: set[frozenset[str]]
+) -> tuple[list[tuple[str, str]], list[tuple[str, str, str]]]:
+    """Loops and triangles over every configured token pair that has at least one pool in `linked`."""
+    rules = config["path_enum_rules"]
+    token_map = config["tokens"]
+    symbols = list(token_map)
+    neighbours = {s: [t for t in symbols if t != s and frozenset((s, t)) in linked] for s in symbols}
+    bases = [s for s in config["amounts"] if s in token_map]
+
+    loops = [(a, b) for a in bases for b in neighbours[a]]
+
+    seen: set[tuple[str, ...]] = set()
+    triangles: list[tuple[str, str, str]] = []
+    cap = rules.get("max_triangles_per_base_token", 50)
+    for a in bases:
+        count = 0
+        for b in neighbours[a]:
+            for c in neighbours[b]:
+                if count >= cap:
+                    break
+                if c == a or frozenset((c, a)) not in linked:
+                    continue
+                key = tuple(sorted([a, b, c])) if rules.get("dedup_by_sorted_symbols", True) else (a, b, c)
+                if key in seen:
+                    continue
+                seen.add(key)
+                triangles.append((a, b, c))
+                count += 1
+    return loops, triangles
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import time
+from typing import Any
+
+from src.quote.base import QuoteResult
+from src.routes.enumerate import route_hops
+from src.tokens import PRICE_SCALE, scale_of
+
+PRUNE_UPPER_BOUND = "unprofitable_upper_bound"
+PRUNE_PARTIAL = "pruned_partial"
+
+
+class ProfitPruner:
+    """Optimistic net-USD bound per candidate from cached mid prices, gas and fee tiers."""
+
+    def __init__(self, cfg: dict[str, Any]) -> None:
+        self.configure(cfg)
+        # Per directed pair, within the current `rate_ttl_sec` window: the best fee-free rate (out wei per in wei)
+        # seen at any size, the cheapest fee tier seen, and when the window opened. Larger sizes quote worse rates,
+        # so keeping the best one keeps the bound optimistic; expiry forces pruned pairs back to a real quote.
+        self.mid_rates: dict[tuple[str, str], float] = {}
+        self.min_fee: dict[tuple[str, str], int] = {}
+        self.rate_since: dict[tuple[str, str], float] = {}
+        self.token_usd: dict[str, float] = {}
+        self.gas_usd_per_unit: float | None = None
+
+    def configure(self, cfg: dict[str, Any]) -> None:
+        prune_cfg = cfg["pruning"]
+        # With pruning off the price book is still kept for curve screening, but nothing is pruned.
+        self.enabled = bool(prune_cfg["enabled"])
+        self.tokens = cfg["tokens"]
+        self.gas_units = cfg["gas_units_estimate"]
+        self.buffer_bps = float(cfg["slippage_bps_buffer"])
+        self.min_net_usd = float(prune_cfg["min_net_usd"])
+        self.slack = 1 + float(prune_cfg["optimism_bps"]) / 10000
+        self.rate_ttl_sec = float(prune_cfg["rate_ttl_sec"])
+
+    def export_state(self) -> dict[str, Any]:
+        now = time.monotonic()
+        return {
+            # Window ages rather than monotonic stamps, which mean nothing in another process.
+            "mid_rates": [[a, b, r, now - self.rate_since[(a, b)]] for (a, b), r in self.mid_rates.items()],
+            "min_fee": [[a, b, f] for (a, b), f in self.min_fee.items()],
+            "token_usd": self.token_usd,
+            "gas_usd_per_unit": self.gas_usd_per_unit,
+        }
+
+    def import_state(self, state: dict[str, Any], age_sec: float) -> None:
+        now = time.monotonic()
+        for a, b, r, window_age in state["mid_rates"]:
+            since = now - float(window_age) - age_sec
+            if now - since < self.rate_ttl_sec:
+                self.mid_rates[(a, b)] = float(r)
+                self.rate_since[(a, b)] = since
+        self.min_fee.update({(a, b): int(f) for a, b, f in state["min_fee"] if (a, b) in self.mid_rates})
+        self.token_usd.update(state["token_usd"])
+        if state["gas_usd_per_unit"] is not None:
+            self.gas_usd_per_unit = float(state["gas_usd_per_unit"])
+
+    def _expired(self, pair: tuple[str, str], now: float) -> bool:
+        since = self.rate_since.get(pair)
+        return since is None or now - since >= self.rate_ttl_sec
+
+    def observe_quote(self, q: QuoteResult) -> None:
+        if not q.ok or q.amount_in_wei <= 0 or q.amount_out_wei <= 0:
+            return
+        pair = (q.token_in, q.token_out)
+        fee = q.meta.get("fee_tier_used")
+        rate = q.amount_out_wei / q.amount_in_wei
+        if isinstance(fee, int):
+            rate /= 1 - fee / 1_000_000
+        now = time.monotonic()
+        if self._expired(pair, now):
+            self.mid_rates.pop(pair, None)
+            self.min_fee.pop(pair, None)
+            self.rate_since[pair] = now
+        self.mid_rates[pair] = max(rate, self.mid_rates.get(pair, rate))
+        if isinstance(fee, int):
+            self.min_fee[pair] = min(fee, self.min_fee.get(pair, fee))
+
+    def observe_prices(self, symbol: str, token_px: int | None, gas_fp: int | None, gas_units: int) -> None:
+        if token_px is not None:
+            self.token_usd[symbol] = token_px / PRICE_SCALE
+        if gas_fp is not None and gas_units > 0:
+            self.gas_usd_per_unit = gas_fp / PRICE_SCALE / gas_units
+
+    def upper_rate(self, token_in: str, token_out: str) -> float | None:
+        mid = self.mid_rates.get((token_in, token_out))
+        if mid is None or self._expired((token_in, token_out), time.monotonic()):
+            return None
+        return mid * (1 - self.min_fee.get((token_in, token_out), 0) / 1_000_000) * self.slack
+
+    def upper_bound_net_usd(
+        self,
+        route_type: str,
+        route: tuple[str, ...],
+        amount_in_wei: int,
+        hop_index: int = 0,
+        current_in_wei: int | None = None,
+    ) -> float | None:
+        if route[0] not in self.token_usd or self.gas_usd_per_unit is None:
+            return None
+        out = float(amount_in_wei if current_in_wei is None else current_in_wei)
+        for token_in, token_out in route_hops(route_type, route)[hop_index:]:
+            rate = self.upper_rate(token_in, token_out)
+            if rate is None:
+                return None
+            out *= rate
+        return self.net_usd(route_type, route, amount_in_wei, out)
+
+    def net_usd(self, route_type: str, route: tuple[str, ...], amount_in_wei: int, amount_out_wei: float) -> float | None:
+        """Net USD of a loop returning `amount_out_wei`, priced like the scanner: gross minus gas and buffer."""
+        px = self.token_usd.get(route[0])
+        if px is None or self.gas_usd_per_unit is None:
+            return None
+        scale = scale_of(self.tokens[route[0]]["decimals"])
+        amount_usd = amount_in_wei / scale * px
+        gross_usd = (amount_out_wei - amount_in_wei) / scale * px
+        return gross_usd - self.gas_usd_per_unit * self.gas_units[route_type] - amount_usd * self.buffer_bps / 10000
+
+    def cannot_clear(self, route_type: str, route: tuple[str, ...], amount_in_wei: int, hop_index: int = 0, current_in_wei: int | None = None) -> bool:
+        if not self.enabled:
+            return False
+        bound = self.upper_bound_net_usd(route_type, route, amount_in_wei, hop_index, current_in_wei)
+        return bound is not None and bound < self.min_net_usd
@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Iterable
+
+import httpx
+from web3 import HTTPProvider
+from web3._utils.http import DEFAULT_HTTP_TIMEOUT
+from web3.providers.base import JSONBaseProvider
+
+from src.deadline import DEADLINE_EXCEEDED, remaining
+
+RETRYABLE_HTTP = {429, 500, 502, 503, 504}
+
+
+class RpcEndpointError(RuntimeError):
+    pass
+
+
+class EndpointStats:
+    __slots__ = ("url", "client", "ewma_latency", "ewma_error", "samples", "requests", "failures")
+
+    def __init__(self, url: str, client: httpx.Client) -> None:
+        self.url = url
+        self.client = client
+        self.ewma_latency: float | None = None
+        self.ewma_error = 0.0
+        self.samples: deque[float] = deque(maxlen=128)
+        self.requests = 0
+        self.failures = 0
+
+    def quantile(self, q: float) -> float | None:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def score(self, error_penalty: float, prior_latency: float) -> float:
+        # Endpoints without a latency sample rank on a finite prior, so failures still push them down;
+        # one never tried at all gets half of it so it is explored once before we settle on a favourite.
+        if self.ewma_latency is not None:
+            latency = self.ewma_latency
+        else:
+            latency = prior_latency / 2 if self.requests == 0 else prior_latency
+        return latency * (1 + error_penalty * self.ewma_error)
+
+
+class RpcEndpointPool:
+    """JSON-RPC endpoints ranked by EWMA latency/error rate, with hedged sends for latency-critical methods."""
+
+    def __init__(
+        self,
+        urls: Iterable[str],
+        ewma_alpha: float = 0.2,
+        error_penalty: float = 10.0,
+        hedge: bool = True,
+        hedge_methods: Iterable[str] = ("eth_call", "eth_gasPrice"),
+        hedge_quantile: float = 0.95,
+        hedge_min_delay_sec: float = 0.02,
+        hedge_default_delay_sec: float = 0.25,
+        timeout_sec: float = 10.0,
+    ) -> None:
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            raise ValueError("RpcEndpointPool needs at least one endpoint")
+        self.endpoints = [EndpointStats(u, httpx.Client(timeout=timeout_sec)) for u in urls]
+        self.alpha = ewma_alpha
+        self.error_penalty = error_penalty
+        self.hedge = hedge
+        self.hedge_methods = frozenset(hedge_methods)
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_delay_sec = hedge_min_delay_sec
+        self.hedge_default_delay_sec = hedge_default_delay_sec
+        self.timeout_sec = timeout_sec
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(4, 4 * len(urls)), thread_name_prefix="rpc-pool")
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        for ep in self.endpoints:
+            ep.client.close()
+
+    def _prior_latency(self) -> float:
+        known = sorted(ep.ewma_latency for ep in self.endpoints if ep.ewma_latency is not None)
+        return known[len(known) // 2] if known else self.hedge_default_delay_sec
+
+    def ranked(self) -> list[EndpointStats]:
+        with self._lock:
+            prior = self._prior_latency()
+            return sorted(self.endpoints, key=lambda ep: ep.score(self.error_penalty, prior))
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return [
+                {
+                    "url": ep.url,
+                    "ewma_latency_ms": None if ep.ewma_latency is None else ep.ewma_latency * 1000,
+                    "p95_ms": None if ep.quantile(0.95) is None else ep.quantile(0.95) * 1000,
+                    "ewma_error": ep.ewma_error,
+                    "requests": ep.requests,
+                    "failures": ep.failures,
+                }
+                for ep in self.endpoints
+            ]
+
+    def export_state(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return [
+                {"url": ep.url, "ewma_latency": ep.ewma_latency, "ewma_error": ep.ewma_error, "samples": list(ep.samples)}
+                for ep in self.endpoints
+            ]
+
+    def import_state(self, state: list[dict[str, Any]], age_sec: float) -> None:
+        by_url = {item["url"]: item for item in state}
+        with self._lock:
+            for ep in self.endpoints:
+                item = by_url.get(ep.url)
+                if item is not None:
+                    ep.ewma_latency = item["ewma_latency"]
+                    ep.ewma_error = float(item["ewma_error"])
+                    ep.samples.extend(item["samples"])
+
+    def _record(self, ep: EndpointStats, latency: float | None) -> None:
+        a = self.alpha
+        with self._lock:
+            ep.requests += 1
+            if latency is None:
+                ep.failures += 1
+                ep.ewma_error = a + (1 - a) * ep.ewma_error
+                return
+            ep.ewma_error = (1 - a) * ep.ewma_error
+            ep.ewma_latency = latency if ep.ewma_latency is None else a * latency + (1 - a) * ep.ewma_latency
+            ep.samples.append(latency)
+
+    def _send(self, ep: EndpointStats, payload: bytes, deadline: float | None) -> bytes:
+        started = time.perf_counter()
+        try:
+            resp = ep.client.post(
+                ep.url, content=payload, headers={"Content-Type": "application/json"}, timeout=self._timeout(deadline)
+            )
+            if resp.status_code in RETRYABLE_HTTP:
+                raise RpcEndpointError(f"{ep.url}: http_{resp.status_code}")
+            resp.raise_for_status()
+        except Exception:
+            self._record(ep, None)
+            raise
+        self._record(ep, time.perf_counter() - started)
+        return resp.content
+
+    def _timeout(self, deadline: float | None) -> float:
+        if deadline is None:
+            return self.timeout_sec
+        left = deadline - time.monotonic()
+        if left <= 0:
+            raise RpcEndpointError(DEADLINE_EXCEEDED)
+        return min(self.timeout_sec, left)
+
+    def _hedge_delay(self, ep: EndpointStats) -> float:
+        with self._lock:
+            q = ep.quantile(self.hedge_quantile)
+        return self.hedge_default_delay_sec if q is None else max(self.hedge_min_delay_sec, q)
+
+    def request(self, method: str, payload: bytes) -> bytes:
+        # Called from asyncio.to_thread, which carries the cycle's context; the pool's own worker
+        # threads don't, so the budget is pinned to an absolute deadline here and handed down.
+        left = remaining()
+        deadline = None if left is None else time.monotonic() + left
+        order = self.ranked()
+        if self.hedge and len(order) > 1 and method in self.hedge_methods:
+            return self._hedged(order, payload, deadline)
+
+        last_exc: Exception | None = None
+        for ep in order:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise RpcEndpointError(DEADLINE_EXCEEDED) from last_exc
+            try:
+                return self._send(ep, payload, deadline)
+            except Exception as exc:  # noqa: BLE001
+                last_exc = exc
+        raise RpcEndpointError(f"all RPC endpoints failed: {last_exc!r}") from last_exc
+
+    def _wait_budget(self, wanted: float | None, deadline: float | None) -> float | None:
+        if deadline is None:
+            return wanted
+        left = max(0.0, deadline - time.monotonic())
+        return left if wanted is None else min(wanted, left)
+
+    def _hedged(self, order: list[EndpointStats], payload: bytes, deadline: float | None) -> bytes:
+        primary = self._executor.submit(self._send, order[0], payload, deadline)
+        done, _ = wait([primary], timeout=self._wait_budget(self._hedge_delay(order[0]), deadline))
+        if done and primary.exception() is None:
+            return primary.result()
+
+        # Primary is slow or failed: race the remaining endpoints one backup at a time.
+        pending: set[Future] = set() if done else {primary}
+        hedge_futures: set[Future] = set()
+        last_exc = primary.exception() if done else None
+        backups = iter(order[1:])
+        while True:
+            if deadline is not None and time.monotonic() >= deadline:
+                # In-flight sends carry the same deadline as their HTTP timeout, so they free their slots soon.
+                raise RpcEndpointError(DEADLINE_EXCEEDED) from last_exc
+            if len(pending) < 2:
+                ep = next(backups, None)
+                if ep is not None:
+                    fut = self._executor.submit(self._send, ep, payload, deadline)
+                    hedge_futures.add(fut)
+                    pending.add(fut)
+                    with self._lock:
+                        self.hedges_sent += 1
+            if not pending:
+                raise RpcEndpointError(f"all RPC endpoints failed: {last_exc!r}") from last_exc
+            done, pending = wait(pending, timeout=self._wait_budget(None, deadline), return_when=FIRST_COMPLETED)
+            for fut in done:
+                if fut.exception() is None:
+                    if fut in hedge_futures:
+                        with self._lock:
+                            self.hedges_won += 1
+                    return fut.result()
+                last_exc = fut.exception()
+
+
+class PooledHTTPProvider(JSONBaseProvider):
+    def __init__(self, pool: RpcEndpointPool, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.pool = pool
+
+    def close(self) -> None:
+        self.pool.close()
+
+    def make_request(self, method, params):
+        raw = self.pool.request(method, self.encode_rpc_request(method, params))
+        return self.decode_rpc_response(raw)
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        try:
+            self.make_request("web3_clientVersion", [])
+        except Exception:  # noqa: BLE001
+            if show_traceback:
+                raise
+            return False
+        return True
+
+
+class DeadlineHTTPProvider(HTTPProvider):
+    """Single-endpoint provider whose per-request timeout is clipped to the current cycle budget."""
+
+    def __init__(self, endpoint_uri: str, timeout_sec: float = DEFAULT_HTTP_TIMEOUT, **kwargs: Any) -> None:
+        super().__init__(endpoint_uri, **kwargs)
+        self.timeout_sec = timeout_sec
+
+    def get_request_kwargs(self) -> dict[str, Any]:
+        kwargs = dict(super().get_request_kwargs())
+        left = remaining()
+        if left is not None:
+            if left <= 0:
+                raise RpcEndpointError(DEADLINE_EXCEEDED)
+            kwargs["timeout"] = min(float(kwargs.get("timeout", self.timeout_sec)), left)
+        return kwargs
+
+
+def build_rpc_pool(cfg: dict[str, Any]) -> RpcEndpointPool:
+    pool_cfg = cfg["rpc_pool"]
+    return RpcEndpointPool(
+        [cfg["rpc_url"], *cfg["rpc_urls"]],
+        ewma_alpha=float(pool_cfg["ewma_alpha"]),
+        error_penalty=float(pool_cfg["error_penalty"]),
+        hedge=bool(pool_cfg["hedge"]),
+        hedge_methods=pool_cfg["hedge_methods"],
+        hedge_quantile=float(pool_cfg["hedge_quantile"]),
+        hedge_min_delay_sec=float(pool_cfg["hedge_min_delay_ms"]) / 1000,
+        hedge_default_delay_sec=float(pool_cfg["hedge_default_delay_ms"]) / 1000,
+        timeout_sec=float(pool_cfg["timeout_sec"]),
+    )
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import multiprocessing as mp
+import queue
+import time
+from collections import Counter
+
+from src.config_loader import ConfigError, load_config
+from src.main import (
+    Candidate,
+    Scanner,
+    build_candidates,
+    build_snapshot_saver,
+    cycle_summary,
+    enumerate_routes,
+    make_w3,
+    now_iso,
+    print_summary,
+    print_top,
+    rank_results,
+)
+from src.pool_index import open_pool_index, sync_pool_index
+from src.records import RouteResult, route_id
+from src.reload import RESTART_KEYS, ConfigWatcher
+from src.route_stats import RouteLog
+
+
+def partition_candidates(
+    candidates: list[Candidate],
+    shards: int,
+    costs: dict[Candidate, float],
+    default_cost: float = 1.0,
+) -> list[list[Candidate]]:
+    # Longest-processing-time-first: heaviest candidate goes to the lightest shard.
+    bins: list[list[Candidate]] = [[] for _ in range(shards)]
+    heap = [(0.0, i) for i in range(shards)]
+    ordered = sorted(candidates, key=lambda c: costs.get(c, default_cost), reverse=True)
+    for cand in ordered:
+        load, i = heapq.heappop(heap)
+        bins[i].append(cand)
+        heapq.heappush(heap, (load + costs.get(cand, default_cost), i))
+    return bins
+
+
+def shard_loads(parts: list[list[Candidate]], costs: dict[Candidate, float], default_cost: float = 1.0) -> list[float]:
+    return [sum(costs.get(c, default_cost) for c in part) for part in parts]
+
+
+def _shard_worker(config_path: str, inbox: mp.Queue, outbox: mp.Queue, shard_id: int, shards: int = 1) -> None:
+    cfg = load_config(config_path)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    scanner = Scanner(cfg)
+    scanner.shard = (shard_id, shards)
+    watcher = ConfigWatcher(config_path, label=f"shard{shard_id}")
+    # Each shard keeps its own snapshot: its pool registry and breakers cover the routes it was assigned.
+    saver = build_snapshot_saver(scanner, suffix=f".shard{shard_id}", label=f"shard{shard_id}")
+    try:
+        while True:
+            job = inbox.get()
+            if job is None:
+                break
+            # The coordinator only plans candidates from a config it has already reloaded, so catch up first.
+            new_cfg = watcher.poll()
+            if new_cfg is not None:
+                try:
+                    loop.run_until_complete(scanner.apply_config(new_cfg))
+                except Exception as exc:  # noqa: BLE001
+                    print(f"[{now_iso()}] [shard{shard_id}] config reload failed, keeping running config: {exc!r}")
+            scanner.route_costs.clear()
+            rows = loop.run_until_complete(scanner.scan(job))
+            outbox.put((shard_id, rows, dict(scanner.route_costs), dict(scanner.last_skipped), scanner.breaker_report(), scanner.source_report()))
+            if saver is not None:
+                saver.maybe_save()
+    finally:
+        if saver is not None:
+            saver.save()
+        loop.run_until_complete(scanner.close())
+        loop.close()
+
+
+class ShardCoordinator:
+    def __init__(self, config_path: str, shards: int) -> None:
+        self.config_path = config_path
+        self.cfg = load_config(config_path)
+        self.shards = shards
+        shard_cfg = self.cfg["sharding"]
+        self.cost_alpha = float(shard_cfg["cost_ewma_alpha"])
+        self.rebalance_imbalance = float(shard_cfg["rebalance_imbalance"])
+        self.costs: dict[Candidate, float] = {}
+        self.parts: list[list[Candidate]] = []
+        self.rebalances = 0
+        self.last_skipped: Counter[str] = Counter()
+        self.last_breakers: dict | None = None
+        self.last_sources: dict | None = None
+        self._ctx = mp.get_context("spawn")
+        self._inboxes: list[mp.Queue] = []
+        self._outbox: mp.Queue = self._ctx.Queue()
+        self._procs: list[mp.Process] = []
+
+    def start(self) -> None:
+        for i in range(self.shards):
+            inbox = self._ctx.Queue()
+            proc = self._ctx.Process(target=_shard_worker, args=(self.config_path, inbox, self._outbox, i, self.shards), daemon=True)
+            proc.start()
+            self._inboxes.append(inbox)
+            self._procs.append(proc)
+
+    def stop(self) -> None:
+        for inbox in self._inboxes:
+            inbox.put(None)
+        for proc in self._procs:
+            proc.join(timeout=10)
+            if proc.is_alive():
+                proc.terminate()
+
+    def _plan(self, candidates: list[Candidate]) -> list[list[Candidate]]:
+        default_cost = sum(self.costs.values()) / len(self.costs) if self.costs else 1.0
+        current = {c for part in self.parts for c in part}
+        if self.parts and current == set(candidates):
+            loads = shard_loads(self.parts, self.costs, default_cost)
+            mean = sum(loads) / len(loads)
+            # Keep assignments stable while balanced so per-shard caches stay warm.
+            if mean <= 0 or max(loads) / mean <= self.rebalance_imbalance:
+                return self.parts
+        self.rebalances += 1
+        self.parts = partition_candidates(candidates, self.shards, self.costs, default_cost)
+        return self.parts
+
+    def _observe_costs(self, costs: dict[Candidate, float]) -> None:
+        a = self.cost_alpha
+        for cand, cost in costs.items():
+            prev = self.costs.get(cand)
+            self.costs[cand] = cost if prev is None else a * cost + (1 - a) * prev
+
+    def _merge_breakers(self, shard_id: int, report: dict | None) -> None:
+        if report is None:
+            return
+        if self.last_breakers is None:
+            self.last_breakers = {"open": 0, "half_open": 0, "short_circuited": 0, "transitions": []}
+        for k in ("open", "half_open", "short_circuited"):
+            self.last_breakers[k] += report[k]
+        self.last_breakers["transitions"].extend(f"shard{shard_id} {t}" for t in report["transitions"])
+
+    def _merge_sources(self, report: dict | None) -> None:
+        if report is None:
+            return
+        if self.last_sources is None:
+            self.last_sources = {}
+        for name, stats in report.items():
+            merged = self.last_sources.setdefault(name, dict.fromkeys(stats, 0))
+            for k, v in stats.items():
+                merged[k] += v
+
+    def scan_cycle(self, candidates: list[Candidate]) -> list[RouteResult]:
+        parts = self._plan(candidates)
+        for inbox, part in zip(self._inboxes, parts):
+            inbox.put(part)
+
+        results: list[RouteResult] = []
+        self.last_skipped = Counter()
+        self.last_breakers = None
+        self.last_sources = None
+        pending = set(range(self.shards))
+        while pending:
+            try:
+                shard_id, rows, costs, skipped, breakers, sources = self._outbox.get(timeout=1.0)
+            except queue.Empty:
+                dead = [i for i in pending if not self._procs[i].is_alive()]
+                if dead:
+                    raise RuntimeError(f"shard worker(s) exited: {dead}")
+                continue
+            pending.discard(shard_id)
+            results.extend(rows)
+            self.last_skipped.update(skipped)
+            self._merge_breakers(shard_id, breakers)
+            self._merge_sources(sources)
+            self._observe_costs(costs)
+        return results
+
+
+def run_sharded(config_path: str, shards: int, log_dir: str = "logs") -> None:
+    coord = ShardCoordinator(config_path, shards)
+    cfg = coord.cfg
+    if cfg["feed"]["enabled"]:
+        # Results only come together in this process, which has no event loop to serve subscribers from.
+        raise ConfigError("feed.enabled is not supported with --shards > 1; disable the feed or run a single process")
+    # Only this process syncs the index; workers read the file to pre-fill their pool registries but, never
+    # syncing themselves, still ask the factory on a miss.
+    index = open_pool_index(cfg)
+    index_cfg = cfg["pool_index"]
+    index_w3 = make_w3(cfg) if index is not None else None
+    synced_at: float | None = None
+    if index is not None and index_cfg["sync_on_start"]:
+        synced_at = time.monotonic()
+        sync_pool_index(index_w3, index, int(index_cfg["start_block"]), int(index_cfg["chunk_blocks"]))
+    universe = build_candidates(cfg, *enumerate_routes(cfg, index))
+    route_log = RouteLog(log_dir, cfg["logging"])
+    watcher = ConfigWatcher(config_path)
+
+    coord.start()
+    try:
+        while True:
+            results = coord.scan_cycle(universe)
+            route_log.write_cycle(results)
+            print_summary(cycle_summary(results, coord.last_skipped, coord.last_breakers, coord.last_sources))
+            print_top(rank_results(results), cfg["top_n"])
+            new_cfg = watcher.poll()
+            if new_cfg is not None:
+                # Workers apply the same file themselves before their next job; restart-only keys stay as they were.
+                for key in RESTART_KEYS:
+                    new_cfg[key] = cfg[key]
+                coord.cfg = cfg = new_cfg
+                universe = build_candidates(cfg, *enumerate_routes(cfg, index))
+                route_log.configure(cfg["logging"])
+                route_log.retain({route_id(*c) for c in universe})
+                print(f"[{now_iso()}] config reloaded: {len(universe)} candidates")
+            interval = float(index_cfg["catch_up_interval_sec"])
+            if index is not None and interval > 0 and (synced_at is None or time.monotonic() - synced_at >= interval):
+                synced_at = time.monotonic()
+                try:
+                    sync_pool_index(index_w3, index, int(index_cfg["start_block"]), int(index_cfg["chunk_blocks"]))
+                except Exception as exc:  # noqa: BLE001
+                    print(f"[{now_iso()}] pool index catch-up failed: {exc!r}")
+                else:
+                    universe = build_candidates(cfg, *enumerate_routes(cfg, index))
+            time.sleep(float(cfg["loop_interval_sec"]))
+    finally:
+        route_log.close()
+        coord.stop()
+        if index is not None:
+            index.close()
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+from src.logger import now_iso
+
+SNAPSHOT_VERSION = 1
+# Components whose contents describe market prices rather than chain structure; they age out much faster.
+VOLATILE_COMPONENTS = frozenset({"pruner"})
+
+
+def snapshot_path(cfg: dict[str, Any], suffix: str = "") -> str:
+    path = cfg["snapshot"]["path"] or f"state/snapshot-{cfg.get('chain_name') or cfg['chain_id']}.json"
+    return f"{path}{suffix}"
+
+
+def save_snapshot(path: str, chain_id: int, components: dict[str, Any]) -> None:
+    payload = {"version": SNAPSHOT_VERSION, "chain_id": chain_id, "saved_at": time.time(), "components": components}
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(target.name + ".tmp")
+    tmp.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+    # Atomic swap so a crash mid-write never leaves a truncated snapshot behind.
+    os.replace(tmp, target)
+
+
+def load_snapshot(
+    path: str,
+    chain_id: int,
+    max_age_sec: float,
+    volatile_max_age_sec: float,
+) -> tuple[dict[str, Any], float] | None:
+    try:
+        payload = json.loads(Path(path).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as exc:
+        print(f"[{now_iso()}] ignoring unreadable snapshot {path}: {exc}")
+        return None
+    if payload.get("version") != SNAPSHOT_VERSION:
+        print(f"[{now_iso()}] ignoring snapshot {path}: version {payload.get('version')} != {SNAPSHOT_VERSION}")
+        return None
+    if payload.get("chain_id") != chain_id:
+        print(f"[{now_iso()}] ignoring snapshot {path}: chain_id {payload.get('chain_id')} != {chain_id}")
+        return None
+    age = max(0.0, time.time() - float(payload.get("saved_at", 0)))
+    if age > max_age_sec:
+        print(f"[{now_iso()}] ignoring snapshot {path}: {age:.0f}s old (max {max_age_sec:.0f}s)")
+        return None
+    components = dict(payload.get("components") or {})
+    if age > volatile_max_age_sec:
+        for key in VOLATILE_COMPONENTS:
+            components.pop(key, None)
+    return components, age
+
+
+class SnapshotSaver:
+    """Writes a scanner's state every `interval_sec` and once more on shutdown."""
+
+    def __init__(self, scanner, path: str, interval_sec: float) -> None:
+        self.scanner = scanner
+        self.path = path
+        self.interval_sec = interval_sec
+        self._last = time.monotonic()
+
+    def restore(self) -> list[str]:
+        snap_cfg = self.scanner.cfg["snapshot"]
+        loaded = load_snapshot(
+            self.path,
+            int(self.scanner.cfg["chain_id"]),
+            float(snap_cfg["max_age_sec"]),
+            float(snap_cfg["volatile_max_age_sec"]),
+        )
+        if loaded is None:
+            return []
+        components, age = loaded
+        return self.scanner.import_state(components, age)
+
+    def save(self) -> None:
+        try:
+            save_snapshot(self.path, int(self.scanner.cfg["chain_id"]), self.scanner.export_state())
+        except OSError as exc:
+            print(f"[{now_iso()}] snapshot save failed ({self.path}): {exc}")
+        self._last = time.monotonic()
+
+    def maybe_save(self) -> None:
+        if time.monotonic() - self._last >= self.interval_sec:
+            self.save()
@@ -1,9 +1,17 @@
 from __future__ import annotations
 
+import re
 from dataclasses import dataclass
-from decimal import Decimal, ROUND_DOWN, getcontext
+from decimal import Context, Decimal, ROUND_DOWN
+from functools import lru_cache
 
-getcontext().prec = 80
+# Local context so importing this module does not change the process-wide Decimal precision.
+_CTX = Context(prec=80)
+_PLAIN_DECIMAL = re.compile(r"([+-]?)(\d*)(?:\.(\d*))?")
+
+# USD prices and USD amounts on the hot path are ints scaled by PRICE_SCALE.
+PRICE_DECIMALS = 18
+PRICE_SCALE = 10**PRICE_DECIMALS
 
 
 @dataclass(frozen=True)
@@ -15,12 +23,30 @@ class Token:
     static_price_usd: float | None = None
 
 
+@lru_cache(maxsize=None)
+def scale_of(decimals: int) -> int:
+    return 10**decimals
+
+
+# Hot-path inputs (amount ladders, bps buffer, gas override) repeat every cycle.
+@lru_cache(maxsize=4096)
 def to_wei(amount_human: float | str | Decimal, decimals: int) -> int:
-    amount = Decimal(str(amount_human))
-    scale = Decimal(10) ** decimals
-    return int((amount * scale).quantize(Decimal("1"), rounding=ROUND_DOWN))
+    if isinstance(amount_human, int):
+        return amount_human * scale_of(decimals)
+    text = str(amount_human).strip()
+    m = _PLAIN_DECIMAL.fullmatch(text)
+    if m is None or not (m.group(2) or m.group(3)):
+        # Exponent notation, NaN/inf and other Decimal spellings take the slow path.
+        amount = Decimal(text)
+        return int(_CTX.multiply(amount, Decimal(scale_of(decimals))).quantize(Decimal("1"), rounding=ROUND_DOWN, context=_CTX))
+    sign, whole, frac = m.group(1), m.group(2), m.group(3) or ""
+    value = int(whole or "0") * scale_of(decimals) + int(frac[:decimals].ljust(decimals, "0") or "0")
+    return -value if sign == "-" else value
 
 
 def from_wei(amount_wei: int, decimals: int) -> Decimal:
-    scale = Decimal(10) ** decimals
-    return Decimal(amount_wei) / scale
+    return _CTX.divide(Decimal(amount_wei), Decimal(scale_of(decimals)))
+
+
+def fixed_to_float(value: int | None, scale: int = PRICE_SCALE) -> float | None:
+    return None if value is None else value / scale
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+from typing import Any
+
+from src.logger import encode_line
+from src.main import process_route
+from src.quote.base import QuoteResult
+
+TOKENS: dict[str, Any] = {
+    "USDC": {"symbol": "USDC", "address": "0x1", "decimals": 6, "is_stable": True},
+    "WETH": {"symbol": "WETH", "address": "0x2", "decimals": 18, "is_stable": False},
+    "DAI": {"symbol": "DAI", "address": "0x3", "decimals": 18, "is_stable": True},
+}
+
+# Output per 1 unit of input, in wei of the output token per wei of the input token.
+RATES: dict[tuple[str, str], tuple[int, int]] = {
+    ("USDC", "WETH"): (10**18, 3000 * 10**6),
+    ("WETH", "USDC"): (3001 * 10**6, 10**18),
+    ("USDC", "DAI"): (10**18, 10**6),
+    ("DAI", "USDC"): (10**6, 10**18),
+    ("WETH", "DAI"): (3000, 1),
+    ("DAI", "WETH"): (1, 3000),
+}
+
+ROUTES = [("loop2", ("USDC", "WETH")), ("loop2", ("USDC", "DAI")), ("triangle3", ("USDC", "WETH", "DAI"))]
+
+
+class StaticQuoteProvider:
+    async def quote(self, token_in: str, token_out: str, amount_in_wei: int) -> QuoteResult:
+        num, den = RATES[(token_in, token_out)]
+        out = amount_in_wei * num // den
+        meta = {"fee_tier_used": 500, "pool_address": f"0x{token_in}{token_out}", "quoter_used": "QuoterV2", "pool_checks": {"liquidity": 10**20}}
+        return QuoteResult(True, amount_in_wei, out, token_in, token_out, meta=meta)
+
+
+def bench_cfg() -> dict[str, Any]:
+    return {
+        "chain_id": 8453,
+        "quote_source": "uniswap",
+        "tokens": TOKENS,
+        "sanity": {"enabled": True, "max_jump_ratio": 10**15},
+        "pricing": {"token_price_mode": "static", "static_prices": {"WETH": 3000}, "eth_usd_static": 3000},
+        "gas_units_estimate": {"loop2": 180000, "triangle3": 260000},
+        "slippage_bps_buffer": 10,
+        "gas_price_gwei_override": 0.05,
+    }
+
+
+async def _cycle(provider, cfg: dict[str, Any], rows: int) -> list[Any]:
+    tasks = []
+    for i in range(rows):
+        route_type, route = ROUTES[i % len(ROUTES)]
+        tasks.append(process_route(provider, cfg, None, route_type, route, float(10 + i % 500)))
+    return await asyncio.gather(*tasks)
+
+
+def run_bench(rows: int, cycles: int) -> dict[str, float]:
+    cfg = bench_cfg()
+    provider = StaticQuoteProvider()
+
+    cycle_times = []
+    for _ in range(cycles):
+        started = time.perf_counter()
+        asyncio.run(_cycle(provider, cfg, rows))
+        cycle_times.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    results = asyncio.run(_cycle(provider, cfg, rows))
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    retained = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+
+    serialize_times = []
+    for _ in range(cycles):
+        started = time.perf_counter()
+        for row in results:
+            encode_line(row)
+        serialize_times.append(time.perf_counter() - started)
+    serialize_sec = min(serialize_times)
+
+    best = min(cycle_times)
+    return {
+        "rows": rows,
+        "cycle_sec_best": best,
+        "us_per_row": best / rows * 1e6,
+        "retained_bytes_per_row": retained / rows,
+        "serialize_us_per_row": serialize_sec / rows * 1e6,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Micro-benchmark process_route CPU and per-row allocation")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--cycles", type=int, default=5)
+    args = parser.parse_args()
+    for k, v in run_bench(args.rows, args.cycles).items():
+        print(f"{k}: {v:.2f}" if isinstance(v, float) else f"{k}: {v}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import argparse
+
+from src.config_loader import load_config
+from src.main import make_w3
+from src.pool_index import PoolIndex, pool_index_path, sync_pool_index
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Catch up the local Uniswap V3 pool index from factory PoolCreated logs")
+    parser.add_argument("--config", required=True, help="Path to YAML/JSON config (uses rpc_url, chain_id, uniswap.factory_address, pool_index)")
+    parser.add_argument("--to-block", type=int, default=None, help="Stop at this block instead of the chain head")
+    parser.add_argument("--token", action="append", default=[], help="Print the indexed pools of a token (symbol from config or address)")
+    parser.add_argument("--top", type=int, default=0, help="Print the N tokens with the most pools")
+    args = parser.parse_args()
+
+    cfg = load_config(args.config)
+    index_cfg = cfg["pool_index"]
+    index = PoolIndex(pool_index_path(cfg), int(cfg["chain_id"]), cfg["uniswap"]["factory_address"])
+    try:
+        sync_pool_index(make_w3(cfg), index, int(index_cfg["start_block"]), int(index_cfg["chunk_blocks"]), to_block=args.to_block)
+        for token in args.token:
+            address = cfg["tokens"][token]["address"] if token in cfg["tokens"] else token
+            for token0, token1, fee, pool in index.pools_for_token(address):
+                print(f"{token}: {token0} / {token1} fee={fee} pool={pool}")
+        for address, n in index.most_connected(args.top):
+            print(f"{address} pools={n}")
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
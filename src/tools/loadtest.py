@@ -0,0 +1,409 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import math
+import random
+import socket
+import tempfile
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+from eth_abi import decode, encode
+from eth_utils import function_signature_to_4byte_selector, to_checksum_address
+
+from src.main import run
+from src.pool_index import POOL_CREATED_TOPIC
+
+TOKENS: dict[str, dict[str, Any]] = {
+    "USDC": {"symbol": "USDC", "address": "0x833589fcd6edb6e08f4c7c32d4f71b54bda02913", "decimals": 6, "is_stable": True},
+    "WETH": {"symbol": "WETH", "address": "0x4200000000000000000000000000000000000006", "decimals": 18, "is_stable": False},
+    "DAI": {"symbol": "DAI", "address": "0x50c5725949a6f0c72e6c4a641f24049a917db0cb", "decimals": 18, "is_stable": True},
+}
+
+# Fee-free output wei per input wei, as (numerator, denominator); slightly off-peg so some loops clear.
+RATES: dict[tuple[str, str], tuple[int, int]] = {
+    ("USDC", "WETH"): (10**18, 3000 * 10**6),
+    ("WETH", "USDC"): (3003 * 10**6, 10**18),
+    ("USDC", "DAI"): (10**18, 10**6),
+    ("DAI", "USDC"): (10**6, 10**18),
+    ("WETH", "DAI"): (3000, 1),
+    ("DAI", "WETH"): (1, 3000),
+}
+
+FACTORY = "0x33128a8fc17869897dce68ed026d694621f6fdfd"
+QUOTER_V2 = "0x3d4e44eb1374240ce5f1b871ab261cd16335b76a"
+QUOTER_V1 = "0x0000000000000000000000000000000000000001"
+LIVE_FEES = (500, 3000)  # the 1% tier has no pool, which exercises pool_not_found handling
+
+SEL_GET_POOL = function_signature_to_4byte_selector("getPool(address,address,uint24)")
+SEL_SLOT0 = function_signature_to_4byte_selector("slot0()")
+SEL_LIQUIDITY = function_signature_to_4byte_selector("liquidity()")
+SEL_QUOTE_V2 = function_signature_to_4byte_selector("quoteExactInputSingle((address,address,uint24,uint256,uint160))")
+SEL_QUOTE_V1 = function_signature_to_4byte_selector("quoteExactInputSingle(address,address,uint24,uint256,uint160)")
+SEL_QUOTE_PATH = function_signature_to_4byte_selector("quoteExactInput(bytes,uint256)")
+
+
+class Profile:
+    """Scripted behaviour for a stand-in server: latency, jitter, and injected 429 / 5xx rates."""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0, rate_limit_rate: float = 0.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def draw(self) -> tuple[float, int | None]:
+        with self._lock:
+            delay = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            roll = self._rng.random()
+        if roll < self.rate_limit_rate:
+            return delay, 429
+        if roll < self.rate_limit_rate + self.error_rate:
+            return delay, 503
+        return delay, None
+
+
+def _pool_address(a: str, b: str, fee: int) -> str:
+    lo, hi = sorted((a.lower(), b.lower()))
+    return to_checksum_address(f"0x{(int(lo, 16) ^ int(hi, 16) ^ fee) & (2**160 - 1):040x}")
+
+
+def _quote(token_in: str, token_out: str, amount_in: int, fee: int) -> int:
+    num, den = RATES[(token_in, token_out)]
+    return amount_in * num * (1_000_000 - fee) // (den * 1_000_000)
+
+
+def _sqrt_price_x96(token0: str, token1: str) -> int:
+    num, den = RATES[(token0, token1)]
+    return math.isqrt(num * 2**192 // den)
+
+
+class StandInServer:
+    """Threaded local HTTP server with a Profile applied to every request."""
+
+    def __init__(self, profile: Profile) -> None:
+        self.profile = profile
+        self.requests = 0
+        self.injected: Counter[int] = Counter()
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, so client connection pooling is part of what gets measured.
+            protocol_version = "HTTP/1.1"
+
+            def setup(self) -> None:
+                super().setup()
+                # Headers and body go out in separate writes; without this Nagle + delayed ACK adds ~40ms.
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def _serve(self) -> None:
+                # Always drain the body so an injected error doesn't desync a kept-alive connection.
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                delay, status = server.profile.draw()
+                with server._lock:
+                    server.requests += 1
+                    if status is not None:
+                        server.injected[status] += 1
+                time.sleep(delay)
+                if status is not None:
+                    self._reply(status, {"error": "injected"})
+                    return
+                self._reply(*server.handle(self.path, body))
+
+            def _reply(self, status: int, body: Any) -> None:
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = _serve  # noqa: N815
+            do_POST = _serve  # noqa: N815
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+
+    def handle(self, path: str, body: bytes) -> tuple[int, Any]:
+        # Subclasses answer the endpoints they model; anything else is a plain miss.
+        return 404, {"error": "not_found"}
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {"requests": self.requests, "injected": dict(self.injected)}
+
+    def __enter__(self) -> "StandInServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class OneInchStandIn(StandInServer):
+    """Answers `GET /<chain_id>/quote?src&dst&amount` like the 1inch swap API."""
+
+    def __init__(self, profile: Profile, tokens: dict[str, dict[str, Any]] = TOKENS) -> None:
+        super().__init__(profile)
+        self.symbols = {t["address"].lower(): s for s, t in tokens.items()}
+
+    def handle(self, path: str, body: bytes) -> tuple[int, Any]:
+        parts = urlsplit(path)
+        if not parts.path.endswith("/quote"):
+            return 404, {"error": "not_found"}
+        q = parse_qs(parts.query)
+        src = self.symbols.get(q.get("src", [""])[0].lower())
+        dst = self.symbols.get(q.get("dst", [""])[0].lower())
+        if src is None or dst is None or (src, dst) not in RATES:
+            return 400, {"error": "unsupported_pair"}
+        # 1inch routes across venues, so model it as the cheapest fee tier.
+        return 200, {"dstAmount": str(_quote(src, dst, int(q["amount"][0]), 100))}
+
+
+class JsonRpcStandIn(StandInServer):
+    """Minimal Ethereum JSON-RPC: gas price, block number, logs, and eth_call against factory/pool/quoter."""
+
+    def __init__(
+        self,
+        profile: Profile,
+        tokens: dict[str, dict[str, Any]] = TOKENS,
+        gas_price_wei: int = 10**7,
+        max_log_range: int | None = None,
+    ) -> None:
+        super().__init__(profile)
+        self.gas_price_wei = gas_price_wei
+        self.tokens = tokens
+        self.max_log_range = max_log_range
+        self.symbols = {t["address"].lower(): s for s, t in tokens.items()}
+        # pool address -> (token0, token1) symbols, ordered by address like the real factory.
+        self.pools = {
+            _pool_address(tokens[a]["address"], tokens[b]["address"], fee).lower(): (a, b)
+            for a, b in RATES
+            if tokens[a]["address"].lower() < tokens[b]["address"].lower()
+            for fee in LIVE_FEES
+        }
+        self.block = 1_000_000
+
+    def handle(self, path: str, body: bytes) -> tuple[int, Any]:
+        payload = json.loads(body)
+        if isinstance(payload, list):
+            return 200, [self._dispatch(item) for item in payload]
+        return 200, self._dispatch(payload)
+
+    def _dispatch(self, body: dict[str, Any]) -> dict[str, Any]:
+        method, params = body["method"], body.get("params") or []
+        out: dict[str, Any] = {"jsonrpc": "2.0", "id": body["id"]}
+        try:
+            if method == "eth_gasPrice":
+                out["result"] = hex(self.gas_price_wei)
+            elif method == "eth_blockNumber":
+                self.block += 1
+                out["result"] = hex(self.block)
+            elif method == "eth_chainId":
+                out["result"] = hex(8453)
+            elif method == "eth_getLogs":
+                out["result"] = self._logs(params[0])
+            elif method == "web3_clientVersion":
+                out["result"] = "loadtest-standin/1"
+            elif method == "eth_call":
+                out["result"] = "0x" + self._call(params[0]["to"].lower(), bytes.fromhex(params[0]["data"][2:])).hex()
+            else:
+                out["error"] = {"code": -32601, "message": f"method not found: {method}"}
+        except Exception as exc:  # noqa: BLE001
+            out["error"] = {"code": 3, "message": f"execution reverted: {exc}"}
+        return out
+
+    def _logs(self, flt: dict[str, Any]) -> list[dict[str, Any]]:
+        lo, hi = int(flt["fromBlock"], 16), int(flt["toBlock"], 16)
+        if self.max_log_range is not None and hi - lo + 1 > self.max_log_range:
+            raise ValueError(f"block range exceeds {self.max_log_range}")
+        addresses = flt.get("address") or []
+        addresses = [addresses] if isinstance(addresses, str) else addresses
+        if FACTORY not in {a.lower() for a in addresses} or (flt.get("topics") or [None])[0] != POOL_CREATED_TOPIC:
+            return []
+        logs = []
+        # Pool i is "created" at block 100 + 10 * i.
+        for i, (pool, (a, b)) in enumerate(sorted(self.pools.items())):
+            block = 100 + 10 * i
+            if not lo <= block <= hi:
+                continue
+            fee = int(pool, 16) ^ int(self.tokens[a]["address"], 16) ^ int(self.tokens[b]["address"], 16)
+            logs.append(
+                {
+                    "address": to_checksum_address(FACTORY),
+                    "topics": [POOL_CREATED_TOPIC]
+                    + ["0x" + encode(["address"], [self.tokens[t]["address"]]).hex() for t in (a, b)]
+                    + ["0x" + encode(["uint24"], [fee]).hex()],
+                    "data": "0x" + encode(["int24", "address"], [fee // 50, pool]).hex(),
+                    "blockNumber": hex(block),
+                    "blockHash": "0x" + f"{block:064x}",
+                    "transactionHash": "0x" + f"{i + 1:064x}",
+                    "transactionIndex": "0x0",
+                    "logIndex": "0x0",
+                    "removed": False,
+                }
+            )
+        return logs
+
+    def _call(self, to: str, data: bytes) -> bytes:
+        selector, args = data[:4], data[4:]
+        if to == FACTORY and selector == SEL_GET_POOL:
+            a, b, fee = decode(["address", "address", "uint24"], args)
+            pool = _pool_address(a, b, fee)
+            return encode(["address"], [pool if pool.lower() in self.pools else "0x" + "00" * 20])
+        if to in self.pools and selector == SEL_SLOT0:
+            sqrt_price = _sqrt_price_x96(*self.pools[to])
+            return encode(["uint160", "int24", "uint16", "uint16", "uint16", "uint8", "bool"], [sqrt_price, 0, 0, 1, 1, 0, True])
+        if to in self.pools and selector == SEL_LIQUIDITY:
+            return encode(["uint128"], [10**24])
+        if to == QUOTER_V2 and selector == SEL_QUOTE_V2:
+            ((a, b, fee, amount, _),) = decode(["(address,address,uint24,uint256,uint160)"], args)
+            out = _quote(self.symbols[a.lower()], self.symbols[b.lower()], amount, fee)
+            return encode(["uint256", "uint160", "uint32", "uint256"], [out, 2**96, 1, 90_000])
+        if to == QUOTER_V2 and selector == SEL_QUOTE_PATH:
+            path, amount = decode(["bytes", "uint256"], args)
+            after = []
+            while len(path) > 20:
+                a, fee, b = "0x" + path[:20].hex(), int.from_bytes(path[20:23], "big"), "0x" + path[23:43].hex()
+                pool = _pool_address(a, b, fee).lower()
+                if pool not in self.pools:
+                    raise ValueError("pool does not exist")
+                amount = _quote(self.symbols[a], self.symbols[b], amount, fee)
+                # Infinite-liquidity stand-in: swaps don't move the price.
+                after.append(_sqrt_price_x96(*self.pools[pool]))
+                path = path[23:]
+            return encode(["uint256", "uint160[]", "uint32[]", "uint256"], [amount, after, [0] * len(after), 90_000 * len(after)])
+        if to == QUOTER_V1 and selector == SEL_QUOTE_V1:
+            a, b, fee, amount, _ = decode(["address", "address", "uint24", "uint256", "uint160"], args)
+            return encode(["uint256"], [_quote(self.symbols[a.lower()], self.symbols[b.lower()], amount, fee)])
+        raise ValueError(f"unsupported call to {to} selector 0x{selector.hex()}")
+
+
+def loadtest_cfg(
+    rpc_url: str, oneinch_url: str, quote_source: str, amounts_per_token: int, concurrency: int, path_quotes: bool = False
+) -> dict[str, Any]:
+    return {
+        "rpc_url": rpc_url,
+        "chain_id": 8453,
+        "quote_source": quote_source,
+        "tokens": TOKENS,
+        "route_sets": {"loops2": [["USDC", "WETH"], ["USDC", "DAI"]], "triangles3": [["USDC", "WETH", "DAI"]]},
+        "amounts": {"USDC": [100 + 50 * i for i in range(amounts_per_token)]},
+        "loop_interval_sec": 0,
+        "slippage_bps_buffer": 10,
+        "gas_units_estimate": {"loop2": 180000, "triangle3": 260000},
+        "path_enum_rules": {"triangle_only_if_all_tokens_whitelisted": True, "max_triangles_per_base_token": 50, "dedup_by_sorted_symbols": True},
+        "pricing": {"token_price_mode": "static", "static_prices": {"WETH": 3000}, "eth_usd_static": 3000},
+        # USDC->WETH multiplies wei amounts by ~3e8, which the default jump guard would flag.
+        "sanity": {"enabled": True, "max_jump_ratio": 10**15},
+        "max_concurrency": concurrency,
+        "oneinch": {"base_url": oneinch_url, "timeout_sec": 5, "max_retries": 4},
+        "uniswap": {"factory_address": FACTORY, "quoter_v2_address": QUOTER_V2, "quoter_address": QUOTER_V1, "path_quotes": path_quotes},
+        # Each cycle should cost the same, so don't let the block cache or breakers hide upstream work.
+        "quote_cache": {"enabled": False},
+        "circuit_breaker": {"enabled": False},
+    }
+
+
+def _percentile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run_loadtest(
+    quote_source: str = "1inch",
+    cycles: int = 5,
+    amounts_per_token: int = 10,
+    concurrency: int = 8,
+    oneinch_profile: Profile | None = None,
+    rpc_profile: Profile | None = None,
+    path_quotes: bool = False,
+) -> dict[str, Any]:
+    route_ms: list[float] = []
+    statuses: Counter[str] = Counter()
+    rows = 0
+
+    def on_cycle(scanner, results) -> None:
+        nonlocal rows
+        rows += len(results)
+        statuses.update(r.status for r in results)
+        route_ms.extend(t * 1000 for t in scanner.route_costs.values())
+        scanner.route_costs.clear()
+
+    with OneInchStandIn(oneinch_profile or Profile()) as oneinch, JsonRpcStandIn(rpc_profile or Profile()) as rpc:
+        with tempfile.TemporaryDirectory() as tmp:
+            cfg = loadtest_cfg(rpc.url, oneinch.url, quote_source, amounts_per_token, concurrency, path_quotes)
+            config_path = Path(tmp) / "config.json"
+            config_path.write_text(json.dumps(cfg), encoding="utf-8")
+            started = time.perf_counter()
+            # The scanner's per-cycle prints are noise here; the report below replaces them.
+            with contextlib.redirect_stdout(io.StringIO()):
+                asyncio.run(run(str(config_path), log_dir=str(Path(tmp) / "logs"), max_cycles=cycles, on_cycle=on_cycle))
+            elapsed = time.perf_counter() - started
+
+    return {
+        "quote_source": quote_source,
+        "cycles": cycles,
+        "rows": rows,
+        "elapsed_sec": elapsed,
+        "rows_per_sec": rows / elapsed if elapsed > 0 else 0.0,
+        "route_p50_ms": _percentile(route_ms, 0.50),
+        "route_p95_ms": _percentile(route_ms, 0.95),
+        "route_p99_ms": _percentile(route_ms, 0.99),
+        "route_max_ms": max(route_ms) if route_ms else None,
+        "statuses": dict(statuses),
+        "oneinch_server": oneinch.stats(),
+        "rpc_server": rpc.stats(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the scanner loop against local stand-in 1inch and JSON-RPC servers")
+    parser.add_argument("--quote-source", choices=["1inch", "uniswap", "composite"], default="1inch")
+    parser.add_argument("--cycles", type=int, default=5)
+    parser.add_argument("--amounts-per-token", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Base latency for both stand-ins")
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with HTTP 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of requests answered with HTTP 429")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--path-quotes", action="store_true", help="Quote Uniswap routes with one quoteExactInput call per fee combination")
+    args = parser.parse_args()
+
+    profile = dict(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate)
+    report = run_loadtest(
+        quote_source=args.quote_source,
+        cycles=args.cycles,
+        amounts_per_token=args.amounts_per_token,
+        concurrency=args.concurrency,
+        oneinch_profile=Profile(seed=args.seed, **profile),
+        rpc_profile=Profile(seed=args.seed + 1, **profile),
+        path_quotes=args.path_quotes,
+    )
+    for k, v in report.items():
+        print(f"{k}: {v:.2f}" if isinstance(v, float) else f"{k}: {v}")
+
+
+if __name__ == "__main__":
+    main()
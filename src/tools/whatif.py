@@ -0,0 +1,534 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import sys
+import time
+from array import array
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+try:
+    import numpy as np
+except ImportError:  # optional: pip install -r requirements-whatif.txt
+    np = None
+
+# Bump when the cached column layout changes.
+CACHE_VERSION = 2
+
+# Derived gas/buffer columns: each grid setting picks one and scales it by a single factor.
+#   gas_usd                      -> recorded gas cost         (factor 1)
+#   gas_usd / units              -> cost per gas unit         (factor units)
+#   gas_usd / gwei               -> cost per gwei             (factor gwei)
+#   gas_usd / (units * gwei)     -> cost per unit-gwei        (factor units * gwei)
+#   buffer_usd                   -> recorded buffer           (factor 1)
+#   amount_usd / 1e4             -> buffer per bps            (factor bps)
+ROW_COLUMNS = ("gross", "net", "gas", "gas_per_unit", "gas_per_gwei", "gas_per_unit_gwei", "buffer", "buffer_per_bps")
+
+LadderSpec = dict[str, set[float]]
+
+
+class RecordedRows:
+    """Priced `ok` rows from route logs as float columns; routes are interned into a small table."""
+
+    __slots__ = ("routes", "route_meta", "route_idx", "skipped", "change_only", *ROW_COLUMNS)
+
+    def __init__(self) -> None:
+        self.routes: dict[str, int] = {}
+        self.route_meta: list[tuple[str, str, float]] = []  # route_type, start symbol, amount_in_human
+        self.route_idx = array("i")
+        self.skipped: Counter[str] = Counter()
+        # Route rows written by `logging.mode: changes`: only the evaluations that moved, so counts run low.
+        self.change_only = 0
+        for name in ROW_COLUMNS:
+            setattr(self, name, array("d"))
+
+    def __len__(self) -> int:
+        return len(self.route_idx)
+
+    def _route(self, rid: str, meta: tuple[str, str, float]) -> int:
+        idx = self.routes.get(rid)
+        if idx is None:
+            idx = self.routes[rid] = len(self.route_meta)
+            self.route_meta.append(meta)
+        return idx
+
+    def add(self, rec: dict[str, Any]) -> str | None:
+        """Append one log row; returns the skip reason when the row can't be re-priced."""
+        if rec.get("kind") is not None:
+            return "not_a_route_row"
+        if rec.get("log_mode") == "changes":
+            self.change_only += 1
+        if rec.get("status") != "ok":
+            return "status_not_ok"
+        gross, gas, buffer, net = (rec.get(k) for k in ("gross_return_usd_est", "gas_cost_usd_est", "buffer_usd_est", "net_usd_est"))
+        if gross is None or gas is None or buffer is None or net is None:
+            return "incomplete_pricing"
+        units = float(rec.get("gas_units_est") or 0)
+        gwei = float(rec.get("gas_price_wei") or 0) / 1e9
+        if units <= 0 or gwei <= 0:
+            return "no_gas_inputs"
+        bps = float(rec.get("buffer_bps") or 0)
+        if bps > 0:
+            amount_usd = buffer * 1e4 / bps
+        else:
+            # A zero buffer leaves the position size to the gross return's implied token price.
+            gross_wei = int(rec.get("gross_return_wei") or 0)
+            if gross_wei == 0:
+                return "no_amount_price"
+            amount_usd = gross * int(rec["amount_in_wei"]) / gross_wei
+        symbols = rec["route_symbols"]
+        amount = float(rec["amount_in_human"])
+        rid = f"{rec.get('chainId')}:{rec['route_type']}:{'-'.join(symbols[:-1])}:{rec['amount_in_human']}"
+        self.route_idx.append(self._route(rid, (rec["route_type"], symbols[0], amount)))
+        self.gross.append(gross)
+        self.net.append(net)
+        self.gas.append(gas)
+        self.gas_per_unit.append(gas / units)
+        self.gas_per_gwei.append(gas / gwei)
+        self.gas_per_unit_gwei.append(gas / (units * gwei))
+        self.buffer.append(buffer)
+        self.buffer_per_bps.append(amount_usd / 1e4)
+        return None
+
+    def extend(self, other: RecordedRows) -> None:
+        # Route indices are dense and in insertion order, so the remap is a plain list lookup.
+        lookup = [self._route(rid, meta) for rid, meta in zip(other.routes, other.route_meta)]
+        self.route_idx.extend(array("i", map(lookup.__getitem__, other.route_idx)))
+        for name in ROW_COLUMNS:
+            getattr(self, name).extend(getattr(other, name))
+        self.skipped.update(other.skipped)
+        self.change_only += other.change_only
+
+
+def log_files(paths: Iterable[str]) -> list[Path]:
+    """Route logs under the given files/directories; route summaries are not rows and are left out."""
+    out: list[Path] = []
+    for p in map(Path, paths):
+        found = sorted(p.rglob("*.jsonl")) if p.is_dir() else [p]
+        out.extend(f for f in found if not f.name.endswith(".summary.jsonl"))
+    return out
+
+
+def parse_log(path: Path) -> RecordedRows:
+    rows = RecordedRows()
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                rows.skipped["bad_json"] += 1
+                continue
+            reason = rows.add(rec)
+            if reason is not None:
+                rows.skipped[reason] += 1
+    return rows
+
+
+def _cache_key(path: Path) -> list[Any]:
+    st = path.stat()
+    # Arrays are written raw, so a cache from a machine with another byte order or item size is not reused.
+    return [CACHE_VERSION, st.st_size, st.st_mtime_ns, sys.byteorder, array("i").itemsize, array("d").itemsize]
+
+
+def _write_cache(cache_path: Path, key: list[Any], rows: RecordedRows) -> None:
+    # One JSON header line, then the raw columns: nothing in the file is executed on load (unlike pickle).
+    header = {
+        "key": key,
+        "rows": len(rows),
+        "routes": list(rows.routes),
+        "route_meta": rows.route_meta,
+        "skipped": rows.skipped,
+        "change_only": rows.change_only,
+    }
+    tmp = cache_path.with_suffix(".tmp")
+    with tmp.open("wb") as f:
+        f.write(json.dumps(header).encode() + b"\n")
+        rows.route_idx.tofile(f)
+        for name in ROW_COLUMNS:
+            getattr(rows, name).tofile(f)
+    os.replace(tmp, cache_path)
+
+
+def _read_cache(cache_path: Path, key: list[Any]) -> RecordedRows | None:
+    try:
+        with cache_path.open("rb") as f:
+            header = json.loads(f.readline())
+            if header["key"] != key:
+                return None
+            rows = RecordedRows()
+            rows.routes = {rid: i for i, rid in enumerate(header["routes"])}
+            rows.route_meta = [tuple(meta) for meta in header["route_meta"]]
+            rows.skipped = Counter(header["skipped"])
+            rows.change_only = int(header["change_only"])
+            n = int(header["rows"])
+            rows.route_idx.fromfile(f, n)
+            for name in ROW_COLUMNS:
+                getattr(rows, name).fromfile(f, n)
+    except (OSError, ValueError, KeyError, EOFError):
+        # Missing, truncated or foreign: parse the log again.
+        return None
+    return rows
+
+
+def _cached_parse(path: Path, cache_dir: Path | None) -> RecordedRows:
+    if cache_dir is None:
+        return parse_log(path)
+    key = _cache_key(path)
+    cache_path = cache_dir / (hashlib.sha1(str(path.resolve()).encode()).hexdigest() + ".cols")
+    rows = _read_cache(cache_path, key)
+    if rows is not None:
+        return rows
+    rows = parse_log(path)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    # Today's file keeps growing; its key changes with it, closed days are parsed once.
+    _write_cache(cache_path, key, rows)
+    return rows
+
+
+def iter_rows(paths: Iterable[str], cache_dir: str | None = None, jobs: int = 1) -> Iterator[RecordedRows]:
+    """Parsed rows one log file at a time, in file order; `jobs` > 1 parses files in worker processes."""
+    files = log_files(paths)
+    cache = None if cache_dir is None else Path(cache_dir)
+    if jobs <= 1 or len(files) <= 1:
+        for path in files:
+            yield _cached_parse(path, cache)
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        # Keep a bounded window in flight so parsed-but-unswept files don't pile up in memory.
+        pending: deque = deque()
+        for path in files:
+            pending.append(pool.submit(_cached_parse, path, cache))
+            if len(pending) >= 2 * jobs:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def load_rows(paths: Iterable[str], cache_dir: str | None = None) -> RecordedRows:
+    rows = RecordedRows()
+    for chunk in iter_rows(paths, cache_dir):
+        rows.extend(chunk)
+    return rows
+
+
+def _gas_column(gas_units: dict[str, int] | None, route_type: str, gwei: float | None) -> tuple[str, float]:
+    units = None if gas_units is None else gas_units.get(route_type)
+    if units is None:
+        return ("gas", 1.0) if gwei is None else ("gas_per_gwei", gwei)
+    return ("gas_per_unit", float(units)) if gwei is None else ("gas_per_unit_gwei", units * gwei)
+
+
+def _buffer_column(bps: float | None) -> tuple[str, float]:
+    return ("buffer", 1.0) if bps is None else ("buffer_per_bps", float(bps))
+
+
+class _Partition:
+    """Columns of one route type restricted to one ladder, ready for per-setting passes (pure Python)."""
+
+    __slots__ = ("rows", "_columns", "_mask", "_chunk")
+
+    def __init__(self, chunk: RecordedRows, keep_route: list[bool]) -> None:
+        self._mask = [keep_route[r] for r in chunk.route_idx]
+        self.rows = sum(self._mask)
+        self._chunk = chunk
+        self._columns: dict[str, array] = {}
+
+    def column(self, name: str) -> array:
+        # Only the columns a setting actually reads are copied out of the chunk.
+        col = self._columns.get(name)
+        if col is None:
+            col = self._columns[name] = array("d", itertools.compress(getattr(self._chunk, name), self._mask))
+        return col
+
+    def profitable(self, gas: tuple[str, float], buffer: tuple[str, float]) -> tuple[int, float]:
+        fg, fb = gas[1], buffer[1]
+        cols = zip(self.column("gross"), self.column(gas[0]), self.column(buffer[0]))
+        wins = [n for g, c, b in cols if (n := g - fg * c - fb * b) > 0]
+        return len(wins), sum(wins)
+
+
+class _VectorPartition:
+    """Same passes as `_Partition`, as numpy expressions over zero-copy views of the chunk's columns."""
+
+    __slots__ = ("rows", "_columns", "_mask", "_chunk")
+
+    def __init__(self, chunk: RecordedRows, keep_route: list[bool]) -> None:
+        idx = np.frombuffer(chunk.route_idx, dtype=f"i{chunk.route_idx.itemsize}")
+        self._mask = np.array(keep_route, dtype=bool)[idx] if keep_route else np.zeros(0, dtype=bool)
+        self.rows = int(self._mask.sum())
+        self._chunk = chunk
+        self._columns: dict[str, Any] = {}
+
+    def column(self, name: str) -> Any:
+        col = self._columns.get(name)
+        if col is None:
+            col = self._columns[name] = np.frombuffer(getattr(self._chunk, name), dtype=np.float64)[self._mask]
+        return col
+
+    def profitable(self, gas: tuple[str, float], buffer: tuple[str, float]) -> tuple[int, float]:
+        net = self.column("gross") - gas[1] * self.column(gas[0]) - buffer[1] * self.column(buffer[0])
+        wins = net[net > 0]
+        return int(wins.size), float(wins.sum())
+
+
+def _chunk_sums(chunk: RecordedRows, vectorized: bool) -> list[dict[str, float]]:
+    """Per-route column sums of one chunk, indexed like `chunk.route_meta`."""
+    n_routes = len(chunk.route_meta)
+    if vectorized:
+        idx = np.frombuffer(chunk.route_idx, dtype=f"i{chunk.route_idx.itemsize}")
+        totals = {"n": np.bincount(idx, minlength=n_routes)}
+        for name in ROW_COLUMNS:
+            totals[name] = np.bincount(idx, weights=np.frombuffer(getattr(chunk, name), dtype=np.float64), minlength=n_routes)
+        return [{k: float(v[r]) for k, v in totals.items()} for r in range(n_routes)]
+    sums = [dict.fromkeys(("n", *ROW_COLUMNS), 0.0) for _ in range(n_routes)]
+    for name in ROW_COLUMNS:
+        for r, v in zip(chunk.route_idx, getattr(chunk, name)):
+            sums[r][name] += v
+    for r in chunk.route_idx:
+        sums[r]["n"] += 1
+    return sums
+
+
+def ladder_keeps(route_meta: list[tuple[str, str, float]], ladder: LadderSpec | None) -> list[bool]:
+    """Routes inside an amount ladder; tokens the ladder doesn't mention keep every recorded amount."""
+    if ladder is None:
+        return [True] * len(route_meta)
+    return [start not in ladder or amount in ladder[start] for _, start, amount in route_meta]
+
+
+def sweep(
+    rows: RecordedRows | Iterable[RecordedRows],
+    slippage_bps: Iterable[float | None] = (None,),
+    gas_price_gwei: Iterable[float | None] = (None,),
+    gas_units: Iterable[dict[str, int] | None] = (None,),
+    ladders: Iterable[tuple[str, LadderSpec | None]] = (("recorded", None),),
+    top: int = 5,
+    vectorized: bool | None = None,
+) -> dict[str, Any]:
+    """Re-price every recorded row under each grid setting; `None` keeps the recorded value.
+
+    `rows` may be one `RecordedRows` or an iterable of them (one per log file, see `iter_rows`): every count,
+    total and route sum is additive, so chunks are folded in one at a time and only one is held in memory.
+    With numpy installed (`requirements-whatif.txt`) each pass is a vectorized column expression; without it
+    the same passes run as Python loops, roughly a hundred times slower.
+    """
+    if vectorized is None:
+        vectorized = np is not None
+    elif vectorized and np is None:
+        raise RuntimeError("vectorized sweep needs numpy: pip install -r requirements-whatif.txt")
+    partition = _VectorPartition if vectorized else _Partition
+    chunks = [rows] if isinstance(rows, RecordedRows) else rows
+    ladders = list(ladders)
+    grid = list(itertools.product(range(len(ladders)), list(gas_units), list(gas_price_gwei), list(slippage_bps)))
+
+    routes: dict[str, int] = {}
+    route_meta: list[tuple[str, str, float]] = []
+    sums: list[dict[str, float]] = []
+    base_rows = base_wins = 0
+    base_won = 0.0
+    point_rows = [0] * len(grid)
+    point_wins = [0] * len(grid)
+    point_won = [0.0] * len(grid)
+
+    for chunk in chunks:
+        lookup = []
+        for rid, meta in zip(chunk.routes, chunk.route_meta):
+            r = routes.get(rid)
+            if r is None:
+                r = routes[rid] = len(route_meta)
+                route_meta.append(meta)
+                sums.append(dict.fromkeys(("n", *ROW_COLUMNS), 0.0))
+            lookup.append(r)
+        for r, local in zip(lookup, _chunk_sums(chunk, vectorized)):
+            for k, v in local.items():
+                sums[r][k] += v
+        base_rows += len(chunk)
+        if vectorized:
+            net = np.frombuffer(chunk.net, dtype=np.float64)
+            wins = net[net > 0]
+            base_wins += int(wins.size)
+            base_won += float(wins.sum())
+        else:
+            wins = [n for n in chunk.net if n > 0]
+            base_wins += len(wins)
+            base_won += sum(wins)
+
+        types = sorted({meta[0] for meta in chunk.route_meta})
+        for li, (_, ladder) in enumerate(ladders):
+            keep = ladder_keeps(chunk.route_meta, ladder)
+            for route_type in types:
+                part = partition(chunk, [k and meta[0] == route_type for k, meta in zip(keep, chunk.route_meta)])
+                if not part.rows:
+                    continue
+                for p, (pl, units, gwei, bps) in enumerate(grid):
+                    if pl != li:
+                        continue
+                    count, total = part.profitable(_gas_column(units, route_type, gwei), _buffer_column(bps))
+                    point_rows[p] += part.rows
+                    point_wins[p] += count
+                    point_won[p] += total
+
+    names = list(routes)
+
+    def ranking(keep: list[bool], gwei: float | None, units: dict[str, int] | None, bps: float | None) -> list[tuple[float, int]]:
+        # Net is linear in every swept knob, so a route's mean net comes straight from its column sums.
+        scored = []
+        buf_col, fb = _buffer_column(bps)
+        for r, s in enumerate(sums):
+            if keep[r] and s["n"]:
+                gas_col, fg = _gas_column(units, route_meta[r][0], gwei)
+                scored.append(((s["gross"] - fg * s[gas_col] - fb * s[buf_col]) / s["n"], r))
+        scored.sort(key=lambda x: (-x[0], names[x[1]]))
+        return scored
+
+    base_rank = ranking([True] * len(names), None, None, None)
+    base_pos = {r: i + 1 for i, (_, r) in enumerate(base_rank)}
+    base_top = {r for _, r in base_rank[:top]}
+    baseline = {
+        "rows": base_rows,
+        "routes": len(names),
+        "profitable": base_wins,
+        "profitable_net_usd": base_won,
+        "top": [{"route": names[r], "mean_net_usd": m} for m, r in base_rank[:top]],
+    }
+
+    points = []
+    for p, (li, units, gwei, bps) in enumerate(grid):
+        ladder_name, ladder = ladders[li]
+        ranked = ranking(ladder_keeps(route_meta, ladder), gwei, units, bps)
+        top_routes = [r for _, r in ranked[:top]]
+        points.append(
+            {
+                "slippage_bps": bps,
+                "gas_price_gwei": gwei,
+                "gas_units": units,
+                "ladder": ladder_name,
+                "rows": point_rows[p],
+                "profitable": point_wins[p],
+                "profitable_share": point_wins[p] / point_rows[p] if point_rows[p] else 0.0,
+                "profitable_net_usd": point_won[p],
+                "top_overlap": len(base_top.intersection(top_routes)),
+                "top": [{"route": names[r], "mean_net_usd": m, "baseline_rank": base_pos[r]} for m, r in ranked[:top]],
+            }
+        )
+    return {"baseline": baseline, "points": points}
+
+
+def _floats(text: str) -> list[float | None]:
+    return [None if x in ("recorded", "none") else float(x) for x in text.split(",")]
+
+
+def parse_gas_units(text: str) -> dict[str, int] | None:
+    """`loop2=150000,triangle3=220000`; `recorded` keeps the logged units."""
+    if text == "recorded":
+        return None
+    return {k.strip(): int(v) for k, v in (item.split("=", 1) for item in text.split(","))}
+
+
+def parse_ladder(text: str) -> tuple[str, LadderSpec | None]:
+    """`USDC=10,50;DAI=10` keeps only those amounts for USDC and DAI routes."""
+    if text == "recorded":
+        return text, None
+    ladder = {}
+    for item in text.split(";"):
+        token, amounts = item.split("=", 1)
+        ladder[token.strip()] = {float(a) for a in amounts.split(",")}
+    return text, ladder
+
+
+def _fmt_setting(v: Any) -> str:
+    if v is None:
+        return "recorded"
+    if isinstance(v, dict):
+        return ",".join(f"{k}={x}" for k, x in sorted(v.items()))
+    return f"{v:g}" if isinstance(v, float) else str(v)
+
+
+def print_report(report: dict[str, Any], top: int) -> None:
+    base = report["baseline"]
+    print(
+        f"baseline: rows={base['rows']} routes={base['routes']} profitable={base['profitable']} "
+        f"net_usd={base['profitable_net_usd']:.4f}"
+    )
+    for row in base["top"]:
+        print(f"   {row['route']}  mean_net={row['mean_net_usd']:.6f}")
+    for p in report["points"]:
+        print(
+            f"slippage_bps={_fmt_setting(p['slippage_bps'])} gas_gwei={_fmt_setting(p['gas_price_gwei'])} "
+            f"gas_units={_fmt_setting(p['gas_units'])} ladder={p['ladder']}  "
+            f"profitable={p['profitable']}/{p['rows']} ({p['profitable_share']:.2%}) net_usd={p['profitable_net_usd']:.4f} "
+            f"top{top}_overlap={p['top_overlap']}/{len(p['top'])}"
+        )
+        for row in p["top"]:
+            print(f"   {row['route']}  mean_net={row['mean_net_usd']:.6f}  (baseline #{row['baseline_rank']})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Re-price recorded route logs across a grid of cost settings")
+    parser.add_argument("paths", nargs="+", help="JSONL log files or directories (searched recursively)")
+    parser.add_argument("--slippage-bps", type=_floats, default=[None], help="Comma list of buffers in bps; 'recorded' keeps the logged one")
+    parser.add_argument("--gas-price-gwei", type=_floats, default=[None], help="Comma list of gas prices; 'recorded' keeps each row's price")
+    parser.add_argument("--gas-units", type=parse_gas_units, action="append", help="e.g. loop2=150000,triangle3=220000; repeat per grid value")
+    parser.add_argument("--ladder", type=parse_ladder, action="append", help="e.g. 'USDC=10,50;DAI=10'; repeat per grid value")
+    parser.add_argument("--top", type=int, default=5, help="Routes to rank per setting")
+    parser.add_argument("--cache-dir", default="state/whatif-cache", help="Where parsed columns are cached per log file")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Processes parsing uncached log files")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument(
+        "--allow-change-only", action="store_true", help="Sweep logs written with logging.mode: changes anyway (counts run low)"
+    )
+    args = parser.parse_args()
+
+    skipped: Counter[str] = Counter()
+    change_only = 0
+
+    def chunks() -> Iterator[RecordedRows]:
+        # Logs stream through the sweep one file at a time; the change-only check happens as each file arrives.
+        nonlocal change_only
+        for chunk in iter_rows(args.paths, cache_dir=None if args.no_cache else args.cache_dir, jobs=args.jobs):
+            if chunk.change_only and not args.allow_change_only:
+                parser.exit(
+                    2,
+                    "whatif: rows come from change-only logs (logging.mode: changes); unchanged evaluations were never "
+                    "written. Use full-mode logs, or pass --allow-change-only to sweep them anyway.\n",
+                )
+            skipped.update(chunk.skipped)
+            change_only += chunk.change_only
+            yield chunk
+
+    started = time.perf_counter()
+    report = sweep(
+        chunks(),
+        slippage_bps=args.slippage_bps,
+        gas_price_gwei=args.gas_price_gwei,
+        gas_units=args.gas_units or [None],
+        ladders=args.ladder or [("recorded", None)],
+        top=args.top,
+    )
+    done = time.perf_counter()
+    if change_only:
+        print(
+            f"warning: {change_only} rows come from change-only logs (logging.mode: changes); "
+            "profitable counts and totals are lower bounds, route means lean toward changes",
+            file=sys.stderr,
+        )
+    report["skipped"] = dict(skipped)
+    report["change_only_rows"] = change_only
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False))
+        return
+    print_report(report, args.top)
+    if skipped:
+        print("skipped rows: " + ", ".join(f"{k}={v}" for k, v in sorted(skipped.items())))
+    engine = "numpy" if np is not None else "pure Python (install requirements-whatif.txt for numpy)"
+    print(f"{report['baseline']['rows']} rows, {len(report['points'])} settings in {done - started:.2f}s ({engine})")
+
+if __name__ == "__main__":
+    main()
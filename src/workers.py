@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+from concurrent.futures import Executor
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from typing import Any, Callable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+# Executor for blocking calls made by the current task. Tasks copy the context when they are created, so a
+# chain that sets its own executor keeps every quote, gas and sync call it starts on its own threads.
+_executor: ContextVar[Executor | None] = ContextVar("executor", default=None)
+
+
+@contextmanager
+def use_executor(executor: Executor | None) -> Iterator[Executor | None]:
+    token = _executor.set(executor)
+    try:
+        yield executor
+    finally:
+        _executor.reset(token)
+
+
+async def to_thread(func: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+    """asyncio.to_thread that runs on the current task's executor (the loop default when none is set)."""
+    loop = asyncio.get_running_loop()
+    call = functools.partial(copy_context().run, func, *args, **kwargs)
+    return await loop.run_in_executor(_executor.get(), call)
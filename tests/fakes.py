@@ -1,6 +1,10 @@
 from __future__ import annotations
 
+import json
+import threading
+import time
 from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 from src.quote.base import QuoteResult
 
@@ -34,3 +38,42 @@ class FakeQuoteProvider:
             token_out=token_out,
             error="missing_fake_quote",
         )
+
+
+class StubRpcServer:
+    """Local JSON-RPC stand-in with an injectable delay and HTTP status."""
+
+    def __init__(self, results: dict[str, object], delay_sec: float = 0.0, status: int = 200):
+        self.results = results
+        self.delay_sec = delay_sec
+        self.status = status
+        self.calls = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:  # noqa: N802
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                stub.calls += 1
+                time.sleep(stub.delay_sec)
+                payload = json.dumps({"jsonrpc": "2.0", "id": body["id"], "result": stub.results.get(body["method"])}).encode()
+                self.send_response(stub.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+
+    def __enter__(self) -> "StubRpcServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
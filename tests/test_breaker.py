@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import asyncio
+
+from src.quote.base import QuoteResult
+from src.quote.breaker import CIRCUIT_OPEN_ERROR, CLOSED, HALF_OPEN, OPEN, BreakerQuoteProvider, BreakerRegistry
+
+from tests.fakes import FakeQuoteProvider
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_breaker_opens_after_threshold_and_probes_once_after_cooldown() -> None:
+    clock = FakeClock()
+    reg = BreakerRegistry(failure_threshold=2, base_cooldown_sec=10, clock=clock)
+    key = ("pair", "A", "B")
+
+    reg.record_failure(key)
+    assert reg.allow(key)
+    reg.record_failure(key)
+    assert reg.state(key) == OPEN
+    assert not reg.allow(key)
+
+    clock.now = 10
+    assert reg.allow(key)
+    assert reg.state(key) == HALF_OPEN
+    assert not reg.allow(key)  # only one probe in flight
+
+    reg.record_success(key)
+    assert reg.state(key) == CLOSED
+    assert reg.allow(key)
+
+
+def test_failed_probe_doubles_cooldown_up_to_cap() -> None:
+    clock = FakeClock()
+    reg = BreakerRegistry(failure_threshold=1, base_cooldown_sec=10, max_cooldown_sec=25, clock=clock)
+    key = ("pool", "A", "B", 500)
+
+    reg.record_failure(key)
+    clock.now = 10
+    assert reg.allow(key)
+    reg.record_failure(key)
+    assert reg.breakers[key].cooldown_sec == 20
+
+    clock.now = 30
+    assert reg.allow(key)
+    reg.record_failure(key)
+    assert reg.breakers[key].cooldown_sec == 25
+
+    report = reg.report()
+    assert report["open"] == 1
+    assert report["transitions"][0] == "pool:A/B/500 -> open cooldown=10s"
+    assert reg.report()["transitions"] == []
+
+
+def test_provider_short_circuits_tracked_errors_only() -> None:
+    reg = BreakerRegistry(failure_threshold=2, base_cooldown_sec=60, clock=FakeClock())
+    calls = []
+
+    class Counting(FakeQuoteProvider):
+        async def quote(self, token_in, token_out, amount_in_wei):
+            calls.append((token_in, token_out))
+            return await super().quote(token_in, token_out, amount_in_wei)
+
+    inner = Counting({("A", "C", 1): QuoteResult(False, 1, 0, "A", "C", error="timeout")})
+    provider = BreakerQuoteProvider(inner, reg, ["missing_fake_quote"])
+
+    async def run():
+        return [await provider.quote("A", "B", 1) for _ in range(3)] + [await provider.quote("A", "C", 1) for _ in range(3)]
+
+    results = asyncio.run(run())
+    assert [r.error for r in results[:3]] == ["missing_fake_quote", "missing_fake_quote", CIRCUIT_OPEN_ERROR]
+    assert [r.error for r in results[3:]] == ["timeout"] * 3
+    assert calls.count(("A", "B")) == 2
+    assert reg.report()["short_circuited"] == 1
+
+
+def test_scanner_wraps_provider_and_reports_breakers() -> None:
+    from src.config_loader import validate_config
+    from src.main import Scanner, cycle_summary
+
+    from tests.test_config_loader_minimal import _valid_cfg
+
+    cfg = _valid_cfg()
+    cfg["quote_source"] = "1inch"
+    cfg["gas_price_gwei_override"] = 1
+    scanner = Scanner(validate_config(cfg))
+    try:
+        assert isinstance(scanner.provider, BreakerQuoteProvider)
+        summary = cycle_summary([], {}, scanner.breaker_report())
+        assert summary["breakers"] == {"open": 0, "half_open": 0, "short_circuited": 0, "transitions": []}
+    finally:
+        asyncio.run(scanner.close())
+
+
+def test_path_quotes_respect_pair_breakers() -> None:
+    reg = BreakerRegistry(failure_threshold=1, base_cooldown_sec=60, clock=FakeClock())
+    path = [QuoteResult(True, 1, 2, "A", "B"), QuoteResult(True, 2, 3, "B", "A")]
+    calls = []
+
+    class PathInner(FakeQuoteProvider):
+        async def quote_path(self, tokens, amount_in_wei):
+            calls.append(tokens)
+            return path
+
+    provider = BreakerQuoteProvider(PathInner({}), reg, ["missing_fake_quote"])
+    assert asyncio.run(provider.quote_path(["A", "B", "A"], 1)) is path
+
+    # One open hop sends the whole route to hop-by-hop quoting, where `quote` short-circuits it.
+    reg.record_failure(("pair", "B", "A"))
+    assert asyncio.run(provider.quote_path(["A", "B", "A"], 1)) is None
+    assert len(calls) == 1
+    assert asyncio.run(provider.quote("B", "A", 2)).error == CIRCUIT_OPEN_ERROR
+
+    # Providers without path quoting stay hop-by-hop.
+    assert asyncio.run(BreakerQuoteProvider(FakeQuoteProvider({}), reg, []).quote_path(["A", "B", "A"], 1)) is None
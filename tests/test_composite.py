@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import asyncio
+
+from src.quote.base import QuoteResult
+from src.quote.composite import CompositeQuoteProvider
+
+
+class DelayedSource:
+    def __init__(self, out: int, delay_sec: float = 0.0, error: str | None = None) -> None:
+        self.out = out
+        self.delay_sec = delay_sec
+        self.error = error
+        self.calls = 0
+        self.cancelled = 0
+
+    async def quote(self, token_in: str, token_out: str, amount_in_wei: int) -> QuoteResult:
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay_sec)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error:
+            return QuoteResult(False, amount_in_wei, 0, token_in, token_out, error=self.error)
+        return QuoteResult(True, amount_in_wei, self.out, token_in, token_out, meta={"fee_tier_used": 500})
+
+
+def _cfg(**overrides) -> dict:
+    cfg = {"deadline_ms": 500, "min_samples": 3, "stats_window": 100, "reprobe_every": 5, "early_cancel_win_rate": None}
+    cfg.update(overrides)
+    return cfg
+
+
+def test_composite_takes_best_amount_and_records_winner() -> None:
+    fast, best = DelayedSource(100), DelayedSource(110, delay_sec=0.01)
+    provider = CompositeQuoteProvider({"1inch": fast, "uniswap": best}, _cfg())
+
+    q = asyncio.run(provider.quote("A", "B", 10))
+
+    assert q.ok and q.amount_out_wei == 110
+    assert q.meta["source_used"] == "uniswap"
+    assert q.meta["fee_tier_used"] == 500
+    assert set(q.meta["composite"]["latency_ms"]) == {"1inch", "uniswap"}
+    report = provider.report()
+    assert report["uniswap"]["wins"] == 1 and report["1inch"]["wins"] == 0
+    assert provider.report()["uniswap"]["requests"] == 0
+
+
+def test_composite_deadline_drops_slow_source() -> None:
+    slow = DelayedSource(999, delay_sec=5)
+    provider = CompositeQuoteProvider({"1inch": slow, "uniswap": DelayedSource(100)}, _cfg(deadline_ms=50))
+
+    q = asyncio.run(provider.quote("A", "B", 10))
+
+    assert q.amount_out_wei == 100
+    assert q.meta["composite"]["timed_out"] == ["1inch"]
+    assert slow.cancelled == 1
+    assert provider.report()["1inch"]["timeouts"] == 1
+
+
+def test_never_winning_source_is_skipped_per_pair_and_reprobed() -> None:
+    loser, winner = DelayedSource(0, error="missing_dst_amount"), DelayedSource(100)
+    provider = CompositeQuoteProvider({"1inch": loser, "uniswap": winner}, _cfg())
+
+    async def run():
+        for _ in range(10):
+            await provider.quote("A", "B", 10)
+        await provider.quote("B", "A", 10)
+
+    asyncio.run(run())
+
+    # 3 samples to learn the pair, reprobes on calls 5 and 10, then a fresh pair asks everyone again.
+    assert loser.calls == 6
+    assert winner.calls == 11
+    assert provider.report()["1inch"]["skipped"] == 5
+
+
+def test_early_cancel_once_dominant_source_answers() -> None:
+    slow = DelayedSource(90, delay_sec=5)
+    fast = DelayedSource(100)
+    provider = CompositeQuoteProvider({"1inch": slow, "uniswap": fast}, _cfg(min_samples=1, early_cancel_win_rate=0.9, deadline_ms=20))
+
+    async def run():
+        await provider.quote("A", "B", 10)
+        provider.reprobe_every = 1  # keep asking the slow source so cancellation is observable
+        return await provider.quote("A", "B", 10)
+
+    q = asyncio.run(run())
+
+    assert q.meta["composite"]["early_cancelled"] is True
+    assert q.meta["composite"]["timed_out"] == []
+    assert slow.cancelled == 2
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import pytest
 
-from src.config_loader import ConfigError, validate_config
+from src.config_loader import ConfigError, compile_config, validate_config
 
 
 def _valid_cfg() -> dict:
@@ -41,3 +41,22 @@ def test_validate_config_rejects_invalid_quote_source() -> None:
 
     with pytest.raises(ConfigError, match="quote_source must be '1inch' or 'uniswap'"):
         validate_config(cfg)
+
+
+def test_compile_config_precomputes_checksums() -> None:
+    cfg = validate_config(_valid_cfg())
+    cfg["tokens"]["USDC"]["address"] = "0x833589fcd6edb6e08f4c7c32d4f71b54bda02913"
+    cfg["tokens"]["WETH"]["address"] = "0x4200000000000000000000000000000000000006"
+
+    runtime = compile_config(cfg)
+
+    assert runtime.tokens["USDC"].checksum_address == "0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913"
+    with pytest.raises(TypeError):
+        runtime.tokens["DAI"] = runtime.tokens["USDC"]  # type: ignore[index]
+
+
+def test_compile_config_rejects_invalid_address() -> None:
+    cfg = validate_config(_valid_cfg())
+
+    with pytest.raises(ConfigError, match="token USDC has invalid address"):
+        compile_config(cfg)
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import asyncio
+
+from src.quote.curve import CURVE_SCREENED, QuoteCurveModel
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_estimate_requires_a_checked_curve_and_interpolates_rate() -> None:
+    model = QuoteCurveModel(max_error_bps=25, clock=FakeClock())
+    model.observe("A", "B", 1000, 2000)
+    assert model.estimate("A", "B", 1000) is None  # never checked against a real quote
+
+    model.observe("A", "B", 1000, 2000)
+    model.observe("A", "B", 4000, 7600)
+    assert model.error_bps("A", "B") == 0
+
+    # Halfway in log-size between the anchors -> halfway between rates 2.0 and 1.9.
+    assert model.estimate("A", "B", 2000) == 3900
+    assert model.estimate("A", "B", 8000) == 15200
+    assert model.estimate("A", "B", 8001) is None  # beyond extrapolate_factor
+
+
+def test_inaccurate_or_stale_curves_stop_answering() -> None:
+    clock = FakeClock()
+    model = QuoteCurveModel(ttl_sec=10, max_error_bps=25, clock=clock)
+    model.observe("A", "B", 1000, 2000)
+    model.observe("A", "B", 1000, 1900)  # 500 bps off what the curve said
+    assert model.error_bps("A", "B") > 25
+    assert model.estimate("A", "B", 1000) is None
+
+    model.observe("C", "D", 1000, 1000)
+    model.observe("C", "D", 1000, 1000)
+    assert model.estimate("C", "D", 1000) == 1000
+    clock.now = 11
+    assert model.estimate("C", "D", 1000) is None
+    assert model.error_bps("C", "D") is None
+
+
+def test_scanner_screen_keeps_unknown_routes_and_top_net_usd_finalists() -> None:
+    from src.config_loader import validate_config
+    from src.main import Scanner
+    from src.tokens import PRICE_SCALE
+
+    from tests.test_config_loader_minimal import _valid_cfg
+
+    cfg = _valid_cfg()
+    cfg["quote_source"] = "1inch"
+    cfg["gas_price_gwei_override"] = 1
+    cfg["curve_model"] = {"enabled": True, "finalists": 1}
+    scanner = Scanner(validate_config(cfg))
+    try:
+        for pair, amount, rate in (
+            (("USDC", "WETH"), 100, 1.0),
+            (("WETH", "USDC"), 100, 1.01),
+            (("USDC", "DAI"), 10, 1.0),
+            (("DAI", "USDC"), 10, 1.02),
+        ):
+            for _ in range(2):
+                scanner.curves.observe(*pair, amount * 10**6, int(amount * 10**6 * rate))
+        small = ("loop2", ("USDC", "DAI"), 10.0)
+        large = ("loop2", ("USDC", "WETH"), 150.0)
+        unpriced = ("loop2", ("USDC", "WETH"), 100.0)
+        unknown = ("loop2", ("USDC", "CBBTC"), 100.0)
+        # No USDC or gas price yet: nothing can be ranked, so everything is confirmed with a real quote.
+        assert scanner.screen([small, large, unknown]) == [small, large, unknown]
+
+        # $0.50 of gas per loop: the 2% loop on $10 nets less than the 1% loop on $150.
+        scanner.pruner.observe_prices("USDC", PRICE_SCALE, PRICE_SCALE // 2, 180000)
+        kept = scanner.screen([small, unpriced, large, unknown])
+
+        assert kept == [unknown, large]
+        assert scanner.last_skipped[CURVE_SCREENED] == 2
+    finally:
+        asyncio.run(scanner.close())
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import httpx
+
+from src.config_loader import validate_config
+from src.deadline import DEADLINE_EXCEEDED, cycle_deadline
+from src.main import Scanner, cycle_summary
+from src.quote.base import QuoteResult
+from src.quote.breaker import BreakerQuoteProvider, BreakerRegistry
+from src.quote.oneinch import OneInchQuoteProvider
+
+from tests.test_config_loader_minimal import _valid_cfg
+
+
+class StallingProvider:
+    """Answers 1:1 instantly, except legs touching `stall` which hang forever."""
+
+    def __init__(self, stall: str) -> None:
+        self.stall = stall
+
+    async def quote(self, token_in: str, token_out: str, amount_in_wei: int) -> QuoteResult:
+        if self.stall in (token_in, token_out):
+            await asyncio.sleep(3600)
+        return QuoteResult(True, amount_in_wei, amount_in_wei, token_in, token_out)
+
+
+def test_scan_cancels_routes_past_the_cycle_deadline() -> None:
+    cfg = _valid_cfg()
+    cfg["quote_source"] = "1inch"
+    cfg["gas_price_gwei_override"] = 1
+    cfg["cycle_deadline_sec"] = 0.2
+    scanner = Scanner(validate_config(cfg))
+    scanner.provider = StallingProvider("DAI")
+    candidates = [("loop2", ("USDC", "WETH"), 100.0), ("loop2", ("USDC", "DAI"), 100.0)]
+
+    async def scenario():
+        try:
+            started = time.perf_counter()
+            rows = await scanner.scan(candidates)
+            return rows, time.perf_counter() - started
+        finally:
+            await scanner.close()
+
+    rows, elapsed = asyncio.run(scenario())
+
+    assert elapsed < 1.0
+    assert [r.status for r in rows] == ["ok", DEADLINE_EXCEEDED]
+    assert rows[1].error_message == DEADLINE_EXCEEDED
+    assert scanner.route_costs[candidates[1]] >= 0.2
+    assert cycle_summary(rows, {})["statuses"] == {"ok": 1, DEADLINE_EXCEEDED: 1}
+
+
+def test_oneinch_retries_stay_within_remaining_budget() -> None:
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.extensions["timeout"]["read"])
+        return httpx.Response(429)
+
+    oneinch_cfg = {"base_url": "http://x", "timeout_sec": 8, "max_retries": 4}
+    tokens = {"A": {"address": "0xa"}, "B": {"address": "0xb"}}
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            provider = OneInchQuoteProvider(1, tokens, oneinch_cfg, client=client)
+            with cycle_deadline(0.3):
+                started = time.perf_counter()
+                limited = await provider.quote("A", "B", 1)
+                elapsed = time.perf_counter() - started
+            with cycle_deadline(0):
+                expired = await provider.quote("A", "B", 1)
+            return limited, elapsed, expired
+
+    limited, elapsed, expired = asyncio.run(scenario())
+
+    assert elapsed < 0.3
+    assert limited.error == "retryable_http_429"  # rate-limit exhaustion, not a 4xx client error
+    assert len(calls) == 1 and calls[0] <= 0.3  # per-attempt timeout clipped to the budget
+    assert expired.error == DEADLINE_EXCEEDED
+
+
+def test_cancelled_half_open_probe_is_released() -> None:
+    reg = BreakerRegistry(failure_threshold=1, base_cooldown_sec=0)
+    key = ("pair", "A", "B")
+    reg.record_failure(key)
+    provider = BreakerQuoteProvider(StallingProvider("A"), reg, ["x"])
+
+    async def scenario() -> None:
+        task = asyncio.create_task(provider.quote("A", "B", 1))
+        await asyncio.sleep(0.01)
+        assert not reg.allow(key)  # the stalled call holds the only probe slot
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(scenario())
+
+    assert reg.allow(key)
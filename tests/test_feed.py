@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import os
+
+from src.feed import FeedClient, FeedServer, _read_ws_frame, _ws_frame
+from src.records import RouteFlags, RouteResult
+
+
+def _row(route: tuple[str, ...], net: float | None, status: str = "ok") -> RouteResult:
+    row = RouteResult(0.0, 1, "uniswap", "loop2", route, 100.0, 10**8, [], 180000, 10, RouteFlags())
+    row.net_usd_est = net
+    row.status = status
+    return row
+
+
+def _drain(client: FeedClient) -> list[str]:
+    events = []
+    while not client.queue.empty():
+        events.append(client.queue.get_nowait()[0])
+    return events
+
+
+def test_publish_cycle_emits_only_changes() -> None:
+    feed = FeedServer(top_n=1)
+    client = FeedClient("test", 16)
+    feed.clients.add(client)
+
+    feed.publish_cycle([_row(("USDC", "WETH"), 1.0), _row(("USDC", "DAI"), -1.0)])
+    assert _drain(client) == ["route", "route", "top"]
+
+    feed.publish_cycle([_row(("USDC", "WETH"), 1.0), _row(("USDC", "DAI"), -0.5)])
+    assert _drain(client) == ["route"]  # top-1 unchanged
+
+    feed.publish_cycle([_row(("USDC", "WETH"), 1.0), _row(("USDC", "DAI"), 2.0)])
+    assert _drain(client) == ["route", "top"]
+    assert feed.top[0]["route_symbols"] == ["USDC", "DAI", "USDC"]
+
+
+def test_slow_client_is_resynced_instead_of_blocking() -> None:
+    feed = FeedServer()
+    client = FeedClient("test", 2)
+    feed.clients.add(client)
+
+    feed.publish_cycle([_row(("USDC", f"T{i}"), float(i)) for i in range(5)])
+
+    events = [client.queue.get_nowait() for _ in range(client.queue.qsize())]
+    assert events[0][0] == "resync"
+    assert len(events[0][1]["routes"]) == 5
+    assert client.dropped > 0
+
+
+def test_snapshot_sse_and_websocket_over_the_wire() -> None:
+    async def scenario() -> None:
+        feed = FeedServer(port=0)
+        await feed.start()
+        try:
+            feed.publish_cycle([_row(("USDC", "WETH"), 1.0)])
+
+            reader, writer = await asyncio.open_connection("127.0.0.1", feed.port)
+            writer.write(b"GET /snapshot HTTP/1.1\r\nHost: x\r\n\r\n")
+            raw = await reader.read()
+            assert raw.startswith(b"HTTP/1.1 200")
+            assert json.loads(raw.split(b"\r\n\r\n", 1)[1])["top"][0]["net_usd_est"] == 1.0
+            writer.close()
+
+            sse_r, sse_w = await asyncio.open_connection("127.0.0.1", feed.port)
+            sse_w.write(b"GET /events HTTP/1.1\r\nHost: x\r\n\r\n")
+            await sse_r.readuntil(b"\r\n\r\n")
+            assert (await sse_r.readuntil(b"\n\n")).startswith(b"event: snapshot\n")
+
+            key = base64.b64encode(os.urandom(16)).decode()
+            ws_r, ws_w = await asyncio.open_connection("127.0.0.1", feed.port)
+            ws_w.write(f"GET /ws HTTP/1.1\r\nHost: x\r\nUpgrade: websocket\r\nConnection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n\r\n".encode())
+            assert (await ws_r.readuntil(b"\r\n\r\n")).startswith(b"HTTP/1.1 101")
+            opcode, payload = await _read_ws_frame(ws_r)
+            assert opcode == 0x1 and json.loads(payload)["event"] == "snapshot"
+
+            feed.publish_cycle([_row(("USDC", "WETH"), 3.0)])
+            assert (await sse_r.readuntil(b"\n\n")).startswith(b"event: route\n")
+            _, payload = await _read_ws_frame(ws_r)
+            assert json.loads(payload)["data"]["net_usd_est"] == 3.0
+
+            mask = os.urandom(4)
+            body = b"snapshot"
+            ws_w.write(bytes([0x81, 0x80 | len(body)]) + mask + bytes(c ^ mask[i % 4] for i, c in enumerate(body)))
+            seen = []
+            while "snapshot" not in seen:
+                _, payload = await asyncio.wait_for(_read_ws_frame(ws_r), 2)
+                seen.append(json.loads(payload)["event"])
+            ws_w.write(_ws_frame(b"", opcode=0x8))
+            sse_w.close()
+        finally:
+            await feed.close()
+
+    asyncio.run(scenario())
+
+
+def test_retain_drops_routes_removed_by_reload_and_refreshes_top() -> None:
+    feed = FeedServer(top_n=1)
+    client = FeedClient("test", 16)
+    feed.clients.add(client)
+    feed.publish_cycle([_row(("USDC", "WETH"), 2.0), _row(("USDC", "DAI"), 1.0)])
+    _drain(client)
+    keep = _row(("USDC", "DAI"), 1.0).route_id
+
+    feed.retain({keep})
+
+    assert list(feed.routes) == [keep]
+    assert [v["id"] for v in feed.top] == [keep]
+    assert _drain(client) == ["route_removed", "top"]
+
+
+def test_websocket_rejects_oversized_frame_with_1009() -> None:
+    async def scenario() -> None:
+        feed = FeedServer(port=0)
+        await feed.start()
+        try:
+            key = base64.b64encode(os.urandom(16)).decode()
+            ws_r, ws_w = await asyncio.open_connection("127.0.0.1", feed.port)
+            ws_w.write(f"GET /ws HTTP/1.1\r\nHost: x\r\nUpgrade: websocket\r\nConnection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n\r\n".encode())
+            await ws_r.readuntil(b"\r\n\r\n")
+            await _read_ws_frame(ws_r)  # initial snapshot
+
+            # Only the header of a 1 MiB frame is sent: the server must refuse on the declared length alone.
+            ws_w.write(bytes([0x81, 0x80 | 127]) + (1 << 20).to_bytes(8, "big") + os.urandom(4))
+            opcode, payload = await asyncio.wait_for(_read_ws_frame(ws_r), 2)
+            assert opcode == 0x8
+            assert int.from_bytes(payload[:2], "big") == 1009
+            ws_w.close()
+        finally:
+            await feed.close()
+
+    asyncio.run(scenario())
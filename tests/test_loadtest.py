@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+
+from web3 import Web3
+
+from src.quote.oneinch import OneInchQuoteProvider
+from src.quote.uniswap_v3 import UniswapV3QuoteProvider
+from src.tools.loadtest import FACTORY, QUOTER_V1, QUOTER_V2, TOKENS, JsonRpcStandIn, OneInchStandIn, Profile, StandInServer, run_loadtest
+
+
+def test_oneinch_standin_serves_real_provider_through_injected_429s() -> None:
+    with OneInchStandIn(Profile(rate_limit_rate=0.5, seed=6)) as server:
+        provider = OneInchQuoteProvider(8453, TOKENS, {"base_url": server.url, "timeout_sec": 2, "max_retries": 6})
+
+        async def run():
+            try:
+                return [await provider.quote("USDC", "WETH", 3000 * 10**6) for _ in range(2)]
+            finally:
+                await provider.close()
+
+        results = asyncio.run(run())
+        stats = server.stats()
+
+    assert all(q.ok for q in results)
+    assert results[0].amount_out_wei == 10**18 * 9999 // 10000
+    assert stats == {"requests": 3, "injected": {429: 1}}
+
+
+def test_jsonrpc_standin_answers_factory_pool_and_quoter_calls() -> None:
+    with JsonRpcStandIn(Profile()) as server:
+        w3 = Web3(Web3.HTTPProvider(server.url))
+        provider = UniswapV3QuoteProvider(
+            w3, TOKENS, {"factory_address": FACTORY, "quoter_v2_address": QUOTER_V2, "quoter_address": QUOTER_V1}
+        )
+        q = asyncio.run(provider.quote("WETH", "USDC", 10**18))
+        gas_price = w3.eth.gas_price
+
+    assert q.ok
+    assert q.meta["fee_tier_used"] == 500
+    assert q.meta["quoter_used"] == "QuoterV2"
+    assert q.amount_out_wei == 3003 * 10**6 * 9995 // 10000
+    assert gas_price == 10**7
+
+
+def test_run_loadtest_reports_throughput_and_tail_latency() -> None:
+    report = run_loadtest(quote_source="1inch", cycles=2, amounts_per_token=1, concurrency=4)
+
+    assert report["rows"] == 6
+    assert report["statuses"] == {"ok": 6}
+    assert report["rows_per_sec"] > 0
+    assert report["route_p50_ms"] <= report["route_p99_ms"] <= report["route_max_ms"]
+    assert report["oneinch_server"]["requests"] >= 14  # two cycles of 7 hop quotes, plus price lookups
+
+
+def test_base_standin_answers_404_instead_of_crashing_the_handler() -> None:
+    with StandInServer(Profile()) as server:
+        resp = httpx.get(f"{server.url}/anything")
+
+    assert resp.status_code == 404
+    assert resp.json() == {"error": "not_found"}
+    assert server.stats()["requests"] == 1
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+from collections import Counter
+
+import src.multichain as multichain
+from src.multichain import SharedHttpPools, chain_label, run_multi
+from src.workers import to_thread
+
+from tests.test_reload import _cfg
+
+
+def test_shared_pools_reuse_clients_per_host() -> None:
+    async def scenario() -> None:
+        pools = SharedHttpPools()
+        a = pools.client_for("https://api.1inch.dev/swap/v6.0")
+        b = pools.client_for("https://api.1inch.dev/other")
+        c = pools.client_for("https://example.org/swap")
+        assert a is b
+        assert a is not c
+        assert pools.session_for("https://rpc.example/v2/k1") is pools.session_for("https://rpc.example/v2/k2")
+        await pools.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_chain_label_prefers_chain_name() -> None:
+    assert chain_label({"chain_id": 8453}) == "8453"
+    assert chain_label({"chain_id": 8453, "chain_name": "base"}) == "base"
+
+
+class _ChainScanner:
+    def __init__(self, cfg: dict, threads: dict) -> None:
+        self.cfg = cfg
+        self.label = cfg["chain_name"]
+        self.threads = threads
+        self.cycles = 0
+        self.last_skipped: Counter = Counter()
+
+    async def scan(self) -> list:
+        self.cycles += 1
+        self.threads.setdefault(self.label, set()).add(await to_thread(lambda: threading.current_thread().name))
+        return []
+
+    def breaker_report(self) -> None:
+        return None
+
+    def source_report(self) -> None:
+        return None
+
+    async def maybe_catch_up_pool_index(self, label=None) -> None:
+        if self.label == "a":
+            raise RuntimeError("index sync exploded")
+
+    async def close(self) -> None:
+        pass
+
+
+def test_failing_chain_does_not_stop_the_others(tmp_path, monkeypatch, capsys) -> None:
+    scanners: dict = {}
+    threads: dict = {}
+
+    def build(cfg, pools):
+        scanners[cfg["chain_name"]] = _ChainScanner(cfg, threads)
+        return scanners[cfg["chain_name"]]
+
+    monkeypatch.setattr(multichain, "build_scanner", build)
+    monkeypatch.chdir(tmp_path)
+    paths = []
+    for name in ("a", "b"):
+        cfg = _cfg()
+        cfg.update(chain_name=name, loop_interval_sec=0.01)
+        path = tmp_path / f"{name}.json"
+        path.write_text(json.dumps(cfg), encoding="utf-8")
+        paths.append(str(path))
+
+    async def scenario() -> None:
+        task = asyncio.create_task(run_multi(paths))
+        await asyncio.sleep(0.5)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(scenario())
+
+    assert scanners["b"].cycles > 5
+    assert "[a] cycle failed" in capsys.readouterr().out
+    assert all(name.startswith("chain-a") for name in threads["a"])
+    assert all(name.startswith("chain-b") for name in threads["b"])
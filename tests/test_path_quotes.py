@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import asyncio
+
+from web3 import Web3
+
+from src.main import process_route
+from src.quote.base import QuoteResult
+from src.quote.cache import BlockQuoteCache
+from src.quote.uniswap_v3 import PATH_QUOTER, UniswapV3QuoteProvider, encode_path, estimate_hop_out
+from src.tools.loadtest import FACTORY, QUOTER_V1, QUOTER_V2, TOKENS, JsonRpcStandIn, Profile, _quote
+
+from tests.fakes import FakeQuoteProvider, FakeWeb3
+from tests.test_process_route_minimal import _base_cfg
+
+
+def test_encode_path_and_single_range_estimate() -> None:
+    a, b, c = "0x" + "11" * 20, "0x" + "22" * 20, "0x" + "33" * 20
+    path = encode_path([a, b, c], [500, 3000])
+    assert len(path) == 20 + 3 + 20 + 3 + 20
+    assert path[20:23] == (500).to_bytes(3, "big") and path[43:46] == (3000).to_bytes(3, "big")
+
+    # Price moves from 4.0 to 2.25 (sqrt 2.0 -> 1.5): the average execution price is 2.0 * 1.5 = 3.0.
+    q96 = 2**96
+    assert estimate_hop_out(1000, 0, 2 * q96, 3 * q96 // 2, zero_for_one=True) == 3000
+    assert estimate_hop_out(3000, 0, 2 * q96, 3 * q96 // 2, zero_for_one=False) == 1000
+    assert estimate_hop_out(1000, 3000, q96, q96, zero_for_one=True) == 997
+
+
+def test_quote_path_prices_triangle_with_one_call_per_fee_combination() -> None:
+    uni_cfg = {"factory_address": FACTORY, "quoter_v2_address": QUOTER_V2, "quoter_address": QUOTER_V1, "path_quotes": True}
+    with JsonRpcStandIn(Profile()) as server:
+        provider = UniswapV3QuoteProvider(Web3(Web3.HTTPProvider(server.url)), TOKENS, uni_cfg)
+        amount_in = 100 * 10**6
+        calls = []
+        path_call = provider._quote_path_call
+        provider._quote_path_call = lambda *args: calls.append(args[1]) or path_call(*args)
+        quotes = asyncio.run(provider.quote_path(["USDC", "WETH", "DAI", "USDC"], amount_in))
+        assert len(calls) == 8  # two live fee tiers per hop, one quoter call per combination
+        provider.max_path_combos = 3
+        asyncio.run(provider.quote_path(["USDC", "WETH", "DAI", "USDC"], amount_in))
+        assert len(calls) == 11
+        provider.path_quotes = False
+        assert asyncio.run(provider.quote_path(["USDC", "WETH"], amount_in)) is None
+
+    exact = _quote("DAI", "USDC", _quote("WETH", "DAI", _quote("USDC", "WETH", amount_in, 500), 500), 500)
+    assert [q.meta["fee_tier_used"] for q in quotes] == [500, 500, 500]
+    assert quotes[-1].amount_out_wei == exact
+    assert quotes[0].amount_in_wei == amount_in
+    assert all(q.meta["quoter_used"] == PATH_QUOTER for q in quotes)
+    assert [q.meta["amount_out_estimated"] for q in quotes] == [True, True, False]
+    assert quotes[1].amount_in_wei == quotes[0].amount_out_wei
+
+
+class PathProvider(FakeQuoteProvider):
+    def __init__(self, path_quotes: list[QuoteResult] | None) -> None:
+        super().__init__({})
+        self.path_quotes = path_quotes
+        self.hop_calls = 0
+
+    async def quote_path(self, tokens: list[str], amount_in_wei: int) -> list[QuoteResult] | None:
+        return self.path_quotes
+
+    async def quote(self, token_in: str, token_out: str, amount_in_wei: int) -> QuoteResult:
+        if token_in != "WETH" or amount_in_wei != 10**18:  # the ETH price lookup is not a route hop
+            self.hop_calls += 1
+        return await super().quote(token_in, token_out, amount_in_wei)
+
+
+def test_process_route_uses_path_quotes_and_falls_back_per_hop() -> None:
+    cfg = _base_cfg()
+    weth_out = 10**16
+    path = [
+        QuoteResult(True, 100 * 10**6, weth_out, "USDC", "WETH", meta={"amount_out_estimated": True}),
+        QuoteResult(True, weth_out, 101 * 10**6, "WETH", "USDC", meta={"amount_in_estimated": True}),
+    ]
+    provider = PathProvider(path)
+    row = asyncio.run(process_route(provider, cfg, FakeWeb3(10**9), "loop2", ("USDC", "WETH"), 100.0))
+    assert row.status == "ok" and provider.hop_calls == 0
+    assert row.gross_return_wei == 10**6
+
+    fallback = PathProvider(None)
+    row = asyncio.run(process_route(fallback, cfg, FakeWeb3(10**9), "loop2", ("USDC", "WETH"), 100.0))
+    assert row.error_message == "missing_fake_quote" and fallback.hop_calls == 1
+
+
+def test_path_hops_carry_pool_checks_and_reuse_block_pool_state() -> None:
+    uni_cfg = {"factory_address": FACTORY, "quoter_v2_address": QUOTER_V2, "quoter_address": QUOTER_V1, "path_quotes": True}
+    cache = BlockQuoteCache()
+    cache.advance(1)
+    with JsonRpcStandIn(Profile()) as server:
+        provider = UniswapV3QuoteProvider(Web3(Web3.HTTPProvider(server.url)), TOKENS, uni_cfg, cache=cache)
+        reads = []
+        contract = provider._pool_contract
+        provider._pool_contract = lambda pool: reads.append(pool) or contract(pool)
+        amount_in = 100 * 10**6
+        quotes = asyncio.run(provider.quote_path(["USDC", "WETH", "DAI", "USDC"], amount_in))
+        # Two live tiers per hop, each pool read once for the checks and reused for the pre-swap price.
+        assert len(reads) == 6
+        asyncio.run(provider.quote_path(["USDC", "WETH", "DAI", "USDC"], 2 * amount_in))
+        single = asyncio.run(provider.quote("USDC", "WETH", amount_in))
+        assert len(reads) == 6
+
+    checks = {"exists": True, "liquidity": 10**24, "slot0_ok": True, "incomplete_pool_state": False}
+    assert [q.meta["pool_checks"] for q in quotes] == [checks] * 3
+    assert single.meta["pool_checks"] == {**checks, "gasEstimate": 90_000}
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import asyncio
+
+from web3 import Web3
+
+from src.config_loader import validate_config
+from src.main import Scanner
+from src.pool_index import PoolIndex, sync_pool_index
+from src.routes.enumerate import enumerate_linked_routes
+from src.tools.loadtest import FACTORY, TOKENS, JsonRpcStandIn, Profile, loadtest_cfg
+
+WETH = TOKENS["WETH"]["address"]
+
+
+def test_sync_is_chunked_resumable_and_indexed_by_token(tmp_path) -> None:
+    path = str(tmp_path / "pools.sqlite")
+    with JsonRpcStandIn(Profile(), max_log_range=64) as server:
+        w3 = Web3(Web3.HTTPProvider(server.url))
+        index = PoolIndex(path, 8453, FACTORY)
+        # The stand-in creates its six pools at blocks 100..150 and rejects ranges over 64 blocks.
+        assert sync_pool_index(w3, index, chunk_blocks=100, to_block=125, log=None) == 3
+        assert index.next_block() == 126
+        index.close()
+
+        reopened = PoolIndex(path, 8453, FACTORY)
+        assert sync_pool_index(w3, reopened, chunk_blocks=100, to_block=300, log=None) == 3
+        assert sync_pool_index(w3, reopened, chunk_blocks=100, to_block=300, log=None) == 0
+
+    weth_pools = reopened.pools_for_token(WETH.upper().replace("0X", "0x"))
+    assert reopened.count() == 6
+    assert len(weth_pools) == 4 and {fee for _, _, fee, _ in weth_pools} == {500, 3000}
+    assert len(reopened.pools_among([TOKENS["USDC"]["address"], WETH])) == 2
+    assert PoolIndex(path, 1, FACTORY).count() == 0  # other chains stay separate
+    reopened.close()
+
+
+def test_enumerate_linked_routes_follows_pools_and_rules() -> None:
+    cfg = {
+        "tokens": {s: {} for s in ("A", "B", "C", "D")},
+        "amounts": {"A": [1]},
+        "path_enum_rules": {"max_triangles_per_base_token": 50, "dedup_by_sorted_symbols": True},
+    }
+    linked = {frozenset(p) for p in (("A", "B"), ("A", "C"), ("B", "C"), ("C", "D"))}
+
+    loops, triangles = enumerate_linked_routes(cfg, linked)
+
+    assert loops == [("A", "B"), ("A", "C")]
+    assert triangles == [("A", "B", "C")]  # D has no pool back to A; A-C-B is the same set
+
+
+def test_scanner_enumerates_and_quotes_from_index_without_get_pool(tmp_path) -> None:
+    with JsonRpcStandIn(Profile()) as server:
+        cfg = loadtest_cfg(server.url, "http://unused", "uniswap", 1, 4)
+        cfg["route_sets"] = {"loops2": [], "triangles3": []}
+        cfg["pool_index"] = {"enabled": True, "path": str(tmp_path / "pools.sqlite"), "chunk_blocks": 10**7, "enumerate_routes": True}
+        scanner = Scanner(validate_config(cfg))
+
+        async def scenario():
+            try:
+                await scanner.catch_up_pool_index()
+                uni = scanner.provider
+
+                def no_factory(*args):
+                    raise AssertionError("getPool called despite a synced index")
+
+                uni._get_pool_fn = no_factory
+                return await scanner.scan()
+            finally:
+                await scanner.close()
+
+        rows = asyncio.run(scenario())
+
+    assert scanner.loops2 == [("USDC", "WETH"), ("USDC", "DAI")]
+    assert scanner.triangles3 == [("USDC", "WETH", "DAI")]
+    assert [r.status for r in rows] == ["ok"] * 3
+
+
+def test_index_answers_misses_only_while_kept_caught_up(tmp_path) -> None:
+    with JsonRpcStandIn(Profile()) as server:
+        cfg = loadtest_cfg(server.url, "http://unused", "uniswap", 1, 4)
+        # Fresh DB and no sync on start: the empty index must not be taken as "no pools exist".
+        cfg["pool_index"] = {"enabled": True, "path": str(tmp_path / "pools.sqlite"), "chunk_blocks": 10**7, "sync_on_start": False}
+        scanner = Scanner(validate_config(cfg))
+        uni = scanner.provider
+
+        async def scenario():
+            try:
+                assert not uni.known_pools_only
+                before = await scanner.scan()
+                await scanner.maybe_catch_up_pool_index()
+                assert uni.known_pools_only and scanner.pool_index.count() == 6
+                attempted = scanner.pool_index_attempted_at
+                await scanner.maybe_catch_up_pool_index()
+                assert scanner.pool_index_attempted_at == attempted  # not due again yet
+
+                def rpc_down(*args, **kwargs):
+                    raise RuntimeError("rpc down")
+
+                scanner.pool_index_attempted_at = None
+                scanner.w3.eth.get_logs = rpc_down
+                await scanner.maybe_catch_up_pool_index()
+                return before
+            finally:
+                await scanner.close()
+
+        before = asyncio.run(scenario())
+
+    assert [r.status for r in before] == ["ok"] * 3  # resolved through getPool
+    assert not uni.known_pools_only  # a failed catch-up stops trusting misses
+
+
+def test_index_of_another_factory_is_treated_as_stale(tmp_path) -> None:
+    with JsonRpcStandIn(Profile()) as server:
+        cfg = loadtest_cfg(server.url, "http://unused", "uniswap", 1, 4)
+        cfg["pool_index"] = {"enabled": True, "path": str(tmp_path / "pools.sqlite"), "chunk_blocks": 10**7, "enumerate_routes": True}
+        scanner = Scanner(validate_config(cfg))
+
+        async def scenario():
+            try:
+                await scanner.catch_up_pool_index()
+                assert scanner.provider.known_pools_only
+                # The factory is hot-reloadable but the index is pinned to the one it was opened with.
+                moved = loadtest_cfg(server.url, "http://unused", "uniswap", 1, 4)
+                moved["route_sets"] = {"loops2": [["USDC", "WETH"]], "triangles3": []}
+                moved["uniswap"]["factory_address"] = "0x1F98431c8aD98523631AE4a59f267346ea31F984"
+                moved["pool_index"] = cfg["pool_index"]
+                await scanner.apply_config(validate_config(moved))
+            finally:
+                await scanner.close()
+
+        asyncio.run(scenario())
+
+    assert not scanner.provider.known_pools_only and not scanner.provider.pools
+    assert scanner.loops2 == [("USDC", "WETH")] and scanner.triangles3 == []
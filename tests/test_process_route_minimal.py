@@ -43,13 +43,13 @@ def test_process_route_ok_path_loop2() -> None:
 
     result = asyncio.run(process_route(provider, cfg, FakeWeb3(10_000_000_000), "loop2", ("USDC", "WETH"), amount_in))
 
-    assert result["status"] == "ok"
-    assert result["error_message"] is None
-    assert result["flags"]["suspicious"] is False
-    assert result["net_usd_est"] is not None
+    assert result.status == "ok"
+    assert result.error_message is None
+    assert result.flags.suspicious is False
+    assert result.net_usd_est is not None
 
-    expected_net = result["gross_return_usd_est"] - result["gas_cost_usd_est"] - result["buffer_usd_est"]
-    assert math.isclose(result["net_usd_est"], expected_net, rel_tol=0, abs_tol=1e-9)
+    expected_net = result.gross_return_usd_est - result.gas_cost_usd_est - result.buffer_usd_est
+    assert math.isclose(result.net_usd_est, expected_net, rel_tol=0, abs_tol=1e-9)
 
 
 def test_process_route_quote_failed_returns_error() -> None:
@@ -66,10 +66,10 @@ def test_process_route_quote_failed_returns_error() -> None:
 
     result = asyncio.run(process_route(provider, cfg, FakeWeb3(10_000_000_000), "loop2", ("USDC", "WETH"), 100.0))
 
-    assert result["status"] == "error"
-    assert result["error_message"] == "upstream_timeout"
-    assert result["net_usd_est"] is None
-    assert len(result["hops"]) == 1
+    assert result.status == "error"
+    assert result.error_message == "upstream_timeout"
+    assert result.net_usd_est is None
+    assert len(result.hops) == 1
 
 
 def test_process_route_suspicious_jump_flagged() -> None:
@@ -87,9 +87,9 @@ def test_process_route_suspicious_jump_flagged() -> None:
 
     result = asyncio.run(process_route(provider, cfg, FakeWeb3(10_000_000_000), "loop2", ("USDC", "WETH"), 100.0))
 
-    assert result["status"] == "error"
-    assert result["flags"]["suspicious"] is True
-    assert result["error_message"] == "suspicious_quote_jump"
+    assert result.status == "error"
+    assert result.flags.suspicious is True
+    assert result.error_message == "suspicious_quote_jump"
 
 
 def test_process_route_marks_low_liquidity_and_incomplete_pool_state() -> None:
@@ -119,6 +119,27 @@ def test_process_route_marks_low_liquidity_and_incomplete_pool_state() -> None:
 
     result = asyncio.run(process_route(provider, cfg, FakeWeb3(10_000_000_000), "loop2", ("USDC", "WETH"), 100.0))
 
-    assert result["status"] == "ok"
-    assert result["flags"]["low_liquidity"] is True
-    assert result["flags"]["incomplete_pool_state"] is True
+    assert result.status == "ok"
+    assert result.flags.low_liquidity is True
+    assert result.flags.incomplete_pool_state is True
+
+
+def test_process_route_non_stable_start_uses_static_price() -> None:
+    cfg = _base_cfg()
+    amount_weth_in = to_wei(1, 18)
+    amount_usdc_out = to_wei(3000, 6)
+    amount_weth_back = to_wei(1.01, 18)
+
+    provider = FakeQuoteProvider(
+        {
+            ("WETH", "USDC", amount_weth_in): QuoteResult(True, amount_weth_in, amount_usdc_out, "WETH", "USDC"),
+            ("USDC", "WETH", amount_usdc_out): QuoteResult(True, amount_usdc_out, amount_weth_back, "USDC", "WETH"),
+        }
+    )
+
+    result = asyncio.run(process_route(provider, cfg, FakeWeb3(10_000_000_000), "loop2", ("WETH", "USDC"), 1.0))
+
+    assert result.status == "ok"
+    assert math.isclose(result.gross_return_usd_est, 30.0, rel_tol=0, abs_tol=1e-9)
+    assert math.isclose(result.buffer_usd_est, 3.0, rel_tol=0, abs_tol=1e-9)
+    assert math.isclose(result.gas_cost_usd_est, 180000 * 10 * 1e9 * 3000 / 1e18, rel_tol=0, abs_tol=1e-12)
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import asyncio
+
+from src.main import process_route
+from src.quote.base import QuoteResult
+from src.routes.prune import PRUNE_PARTIAL, ProfitPruner
+from src.tokens import PRICE_SCALE, to_wei
+
+from tests.fakes import FakeQuoteProvider, FakeWeb3
+from tests.test_process_route_minimal import _base_cfg
+
+
+def _cfg() -> dict:
+    cfg = _base_cfg()
+    cfg["pruning"] = {"enabled": True, "min_net_usd": 0.0, "optimism_bps": 0, "rate_ttl_sec": 30}
+    return cfg
+
+
+def test_upper_bound_unknown_until_prices_observed() -> None:
+    pruner = ProfitPruner(_cfg())
+    pruner.observe_quote(QuoteResult(True, 10**6, 10**18 // 3000, "USDC", "WETH"))
+    pruner.observe_quote(QuoteResult(True, 10**18, 3000 * 10**6, "WETH", "USDC"))
+
+    assert pruner.upper_bound_net_usd("loop2", ("USDC", "WETH"), to_wei(100, 6)) is None
+
+    pruner.observe_prices("USDC", PRICE_SCALE, gas_fp=5 * PRICE_SCALE, gas_units=180000)
+
+    bound = pruner.upper_bound_net_usd("loop2", ("USDC", "WETH"), to_wei(100, 6))
+    assert bound is not None and bound < 0
+    assert pruner.cannot_clear("loop2", ("USDC", "WETH"), to_wei(100, 6))
+
+
+def test_upper_rate_applies_cheapest_seen_fee_tier_to_mid_price() -> None:
+    pruner = ProfitPruner(_cfg())
+    pruner.observe_quote(QuoteResult(True, 10**6, 997_000, "A", "B", meta={"fee_tier_used": 3000}))
+    assert abs(pruner.upper_rate("A", "B") - 0.997) < 1e-12
+
+    pruner.observe_quote(QuoteResult(True, 10**6, 990_000, "A", "B", meta={"fee_tier_used": 10000}))
+    assert pruner.min_fee[("A", "B")] == 3000
+    assert abs(pruner.upper_rate("A", "B") - 0.997) < 1e-12
+
+
+def test_rate_window_keeps_best_size_and_expires_so_pruned_pairs_requote(monkeypatch) -> None:
+    clock = [1000.0]
+    monkeypatch.setattr("src.routes.prune.time.monotonic", lambda: clock[0])
+    pruner = ProfitPruner(_cfg())
+    pruner.observe_prices("USDC", PRICE_SCALE, gas_fp=PRICE_SCALE, gas_units=180000)
+    pruner.observe_quote(QuoteResult(True, 10**6, 10**18 // 3000, "USDC", "WETH"))
+    pruner.observe_quote(QuoteResult(True, 10**18, 2990 * 10**6, "WETH", "USDC"))
+    # A large quote with price impact must not drag the bound below what a small size could get.
+    pruner.observe_quote(QuoteResult(True, 100 * 10**18, 200_000 * 10**6, "WETH", "USDC"))
+    assert pruner.mid_rates[("WETH", "USDC")] == 2990 * 10**6 / 10**18
+    assert pruner.cannot_clear("loop2", ("USDC", "WETH"), to_wei(100, 6))
+
+    # Every candidate on the pair is now pruned, so nothing refreshes it; the window expiring is what lets
+    # the next cycle quote it again and see the market has moved.
+    clock[0] += 31
+    assert pruner.upper_rate("WETH", "USDC") is None
+    assert not pruner.cannot_clear("loop2", ("USDC", "WETH"), to_wei(100, 6))
+    pruner.observe_quote(QuoteResult(True, 10**6, 10**18 // 3000, "USDC", "WETH"))
+    pruner.observe_quote(QuoteResult(True, 10**18, 4500 * 10**6, "WETH", "USDC"))
+    assert not pruner.cannot_clear("loop2", ("USDC", "WETH"), to_wei(100, 6))
+
+
+def test_process_route_aborts_when_partial_result_cannot_clear() -> None:
+    cfg = _cfg()
+    pruner = ProfitPruner(cfg)
+    pruner.observe_quote(QuoteResult(True, 10**18, 3000 * 10**6, "WETH", "USDC"))
+    pruner.observe_prices("USDC", PRICE_SCALE, gas_fp=PRICE_SCALE, gas_units=180000)
+
+    amount_usdc_in = to_wei(100, 6)
+    provider = FakeQuoteProvider(
+        {("USDC", "WETH", amount_usdc_in): QuoteResult(True, amount_usdc_in, 10**18 // 60, "USDC", "WETH")}
+    )
+
+    result = asyncio.run(
+        process_route(provider, cfg, FakeWeb3(10_000_000_000), "loop2", ("USDC", "WETH"), 100.0, pruner=pruner)
+    )
+
+    assert result.status == "skipped"
+    assert result.error_message == PRUNE_PARTIAL
+    assert len(result.hops) == 1
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import asyncio
+
+from src.main import process_route
+from src.quote.base import QuoteResult
+from src.quote.cache import BlockQuoteCache
+from src.tokens import to_wei
+
+from tests.fakes import FakeQuoteProvider, FakeWeb3
+from tests.test_process_route_minimal import _base_cfg
+
+
+def test_quote_entries_expire_on_new_block() -> None:
+    cache = BlockQuoteCache()
+    cache.put_quote("USDC", "WETH", 500, 100, "ignored_without_block")
+    assert cache.get_quote("USDC", "WETH", 500, 100) is None
+
+    cache.advance(10)
+    cache.put_quote("USDC", "WETH", 500, 100, (1, "0xpool", {}, "QuoterV2"))
+    assert cache.get_quote("USDC", "WETH", 500, 100) == (1, "0xpool", {}, "QuoterV2")
+
+    cache.advance(11)
+    assert cache.get_quote("USDC", "WETH", 500, 100) is None
+
+
+def test_route_carried_forward_only_when_pools_untouched() -> None:
+    cache = BlockQuoteCache()
+    cache.advance(10)
+    q1 = QuoteResult(True, 1, 2, "A", "B", meta={"pool_address": "0xAA"})
+    q2 = QuoteResult(True, 2, 3, "B", "A", meta={"pool_address": "0xBB"})
+    cache.put_route(("loop2", ("A", "B"), 1), [q1, q2])
+
+    cache.advance(11, touched_pools={"0xcc"})
+    assert cache.get_route(("loop2", ("A", "B"), 1)) == [q1, q2]
+
+    cache.advance(12, touched_pools={"0xbb"})
+    assert cache.get_route(("loop2", ("A", "B"), 1)) is None
+
+
+def test_route_dropped_when_another_tier_or_new_pool_for_its_pair_appears() -> None:
+    cache = BlockQuoteCache()
+    cache.token_addresses.update({"A": "0xA0", "B": "0xB0", "C": "0xC0"})
+    cache.register_pool("0xAA", "0xa0", "0xb0")
+    cache.register_pool("0xAB", "0xA0", "0xB0")  # same pair, another fee tier
+    cache.advance(10)
+    key = ("loop2", ("A", "B"), 1)
+    quotes = [
+        QuoteResult(True, 1, 2, "A", "B", meta={"pool_address": "0xAA"}),
+        QuoteResult(True, 2, 3, "B", "A", meta={"pool_address": "0xAA"}),
+    ]
+    cache.put_route(key, quotes)
+
+    cache.advance(11, touched_pools={"0xab"})
+    assert cache.get_route(key) is None
+
+    cache.put_route(key, quotes)
+    cache.advance(12, touched_pools=set(), created_pairs={("0xa0", "0xc0")})
+    assert cache.get_route(key) == quotes
+    cache.advance(13, touched_pools=set(), created_pairs={("0xb0", "0xa0")})
+    assert cache.get_route(key) is None
+
+
+def test_process_route_replays_cached_route_without_quoting() -> None:
+    cfg = _base_cfg()
+    amount_usdc_in = to_wei(100, 6)
+    amount_weth_out = int(0.0335 * 10**18)
+    responses = {
+        ("USDC", "WETH", amount_usdc_in): QuoteResult(
+            True, amount_usdc_in, amount_weth_out, "USDC", "WETH", meta={"pool_address": "0xAA"}
+        ),
+        ("WETH", "USDC", amount_weth_out): QuoteResult(
+            True, amount_weth_out, to_wei(101, 6), "WETH", "USDC", meta={"pool_address": "0xBB"}
+        ),
+    }
+    provider = FakeQuoteProvider(dict(responses))
+    cache = BlockQuoteCache()
+    cache.advance(1)
+
+    first = asyncio.run(process_route(provider, cfg, FakeWeb3(10_000_000_000), "loop2", ("USDC", "WETH"), 100.0, cache=cache))
+    cache.advance(2, touched_pools=set())
+    provider.responses.clear()
+    second = asyncio.run(process_route(provider, cfg, FakeWeb3(10_000_000_000), "loop2", ("USDC", "WETH"), 100.0, cache=cache))
+
+    assert first.status == "ok"
+    assert second.status == "ok"
+    assert second.gross_return_wei == first.gross_return_wei
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+from src.main import process_route
+from src.quote.base import QuoteResult
+from src.tokens import to_wei
+
+from tests.fakes import FakeQuoteProvider, FakeWeb3
+from tests.test_process_route_minimal import _base_cfg
+
+LEGACY_KEYS = {
+    "ts_iso",
+    "chainId",
+    "source",
+    "route_type",
+    "route_symbols",
+    "amount_in_human",
+    "amount_in_wei",
+    "hops",
+    "gross_return_wei",
+    "gross_return_usd_est",
+    "gas_price_wei",
+    "gas_units_est",
+    "gas_cost_usd_est",
+    "buffer_bps",
+    "buffer_usd_est",
+    "net_usd_est",
+    "flags",
+    "status",
+    "error_message",
+}
+
+
+def test_to_dict_matches_jsonl_schema_for_ok_row() -> None:
+    amount_usdc_in = to_wei(100, 6)
+    amount_weth_out = int(0.0335 * 10**18)
+    provider = FakeQuoteProvider(
+        {
+            ("USDC", "WETH", amount_usdc_in): QuoteResult(True, amount_usdc_in, amount_weth_out, "USDC", "WETH"),
+            ("WETH", "USDC", amount_weth_out): QuoteResult(True, amount_weth_out, to_wei(101, 6), "WETH", "USDC"),
+        }
+    )
+
+    row = asyncio.run(process_route(provider, _base_cfg(), FakeWeb3(10_000_000_000), "loop2", ("USDC", "WETH"), 100.0))
+    out = json.loads(json.dumps(row.to_dict()))
+
+    assert set(out) == LEGACY_KEYS | {"price_source"}
+    assert out["route_symbols"] == ["USDC", "WETH", "USDC"]
+    assert out["amount_in_wei"] == str(amount_usdc_in)
+    assert out["gross_return_wei"] == str(to_wei(1, 6))
+    assert out["hops"][1]["amount_in_wei"] == str(amount_weth_out)
+    assert out["flags"] == {"suspicious": False, "low_liquidity": False, "incomplete_pricing": False, "incomplete_pool_state": False}
+
+
+def test_to_dict_error_row_keeps_zero_gross_and_no_price_source() -> None:
+    provider = FakeQuoteProvider({})
+
+    row = asyncio.run(process_route(provider, _base_cfg(), FakeWeb3(10_000_000_000), "loop2", ("USDC", "WETH"), 100.0))
+    out = row.to_dict()
+
+    assert set(out) == LEGACY_KEYS
+    assert out["gross_return_wei"] == "0"
+    assert out["hops"] == []
+    assert out["error_message"] == "missing_fake_quote"
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+
+from src.config_loader import load_config
+from src.main import Scanner, reload_between_cycles
+from src.reload import ConfigWatcher, diff_config, iter_providers
+
+from tests.test_config_loader_minimal import _valid_cfg
+
+
+def _cfg() -> dict:
+    cfg = _valid_cfg()
+    cfg["quote_source"] = "1inch"
+    cfg["gas_price_gwei_override"] = 1
+    cfg["tokens"]["USDC"]["address"] = "0x833589fcd6edb6e08f4c7c32d4f71b54bda02913"
+    cfg["tokens"]["WETH"]["address"] = "0x4200000000000000000000000000000000000006"
+    return cfg
+
+
+def _write(path, cfg: dict, bump: int) -> None:
+    path.write_text(json.dumps(cfg), encoding="utf-8")
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + bump * 10**9))
+
+
+def test_watcher_returns_validated_config_only_on_change(tmp_path) -> None:
+    path = tmp_path / "config.json"
+    _write(path, _cfg(), 0)
+    watcher = ConfigWatcher(str(path))
+    assert watcher.poll() is None
+
+    cfg = _cfg()
+    cfg["amounts"] = {"USDC": [100, 250]}
+    _write(path, cfg, 1)
+    reloaded = watcher.poll()
+    assert reloaded["amounts"] == {"USDC": [100, 250]}
+    assert "runtime" in reloaded
+    assert watcher.poll() is None
+
+    _write(path, {"quote_source": "1inch"}, 2)
+    assert watcher.poll() is None
+
+
+def test_apply_config_updates_routes_in_place_and_pins_restart_keys(tmp_path) -> None:
+    path = tmp_path / "config.json"
+    _write(path, _cfg(), 0)
+    scanner = Scanner(load_config(str(path)))
+    try:
+        provider = scanner.provider
+        cfg = _cfg()
+        cfg["tokens"]["DAI"] = {"symbol": "DAI", "address": "0x50c5725949a6f0c72e6c4a641f24049a917db0cb", "decimals": 18, "is_stable": True}
+        cfg["route_sets"]["loops2"].append(["USDC", "DAI"])
+        cfg["amounts"] = {"USDC": [100, 250]}
+        cfg["chain_id"] = 8453
+        _write(path, cfg, 1)
+
+        applied, pinned = asyncio.run(scanner.apply_config(load_config(str(path))))
+
+        assert applied == {"tokens", "route_sets", "amounts"}
+        assert pinned == {"chain_id"}
+        assert scanner.cfg["chain_id"] == 1 and "DAI" in scanner.cfg["runtime"].tokens
+        assert scanner.provider is provider
+        assert "DAI" in provider.inner.tokens
+        assert ("USDC", "DAI") in scanner.loops2
+        assert ("loop2", ("USDC", "DAI"), 250.0) in scanner.candidates()
+    finally:
+        asyncio.run(scanner.close())
+
+
+def test_provider_rebuild_keeps_http_client_warm(tmp_path) -> None:
+    path = tmp_path / "config.json"
+    _write(path, _cfg(), 0)
+    scanner = Scanner(load_config(str(path)))
+
+    async def run():
+        old_parts = list(iter_providers(scanner.provider))
+        client = old_parts[-1].client
+        cfg = _cfg()
+        cfg["oneinch"] = {"timeout_sec": 3}
+        _write(path, cfg, 1)
+        new_cfg = load_config(str(path))
+        assert diff_config(scanner.cfg, new_cfg) == {"oneinch"}
+
+        await scanner.apply_config(new_cfg)
+
+        new_inner = list(iter_providers(scanner.provider))[-1]
+        assert new_inner is not old_parts[-1]
+        assert new_inner.client is client and not client.is_closed
+        assert new_inner._owns_client and not old_parts[-1]._owns_client
+        assert new_inner.timeout_sec == 3
+        await scanner.close()
+        assert client.is_closed
+
+    asyncio.run(run())
+
+
+def test_rejected_reload_leaves_running_scanner_intact(tmp_path, capsys) -> None:
+    path = tmp_path / "config.json"
+    _write(path, _cfg(), 0)
+    scanner = Scanner(load_config(str(path)))
+    watcher = ConfigWatcher(str(path), label="base")
+
+    async def run():
+        cfg, provider = scanner.cfg, scanner.provider
+        bad = _cfg()
+        bad["quote_source"] = "uniswap"
+        bad["uniswap"] = {"factory_address": ""}
+        bad["amounts"] = {"USDC": [100, 250]}
+        _write(path, bad, 1)
+
+        assert await reload_between_cycles(scanner, watcher, label="base") == set()
+
+        assert scanner.cfg is cfg and scanner.provider is provider and scanner.w3 is None
+        assert ("loop2", ("USDC", "WETH"), 250.0) not in scanner.candidates()
+        await scanner.close()
+
+    asyncio.run(run())
+    assert "[base] config reload failed, keeping running config" in capsys.readouterr().out
+
+
+def test_dropping_gas_price_override_brings_up_web3(tmp_path) -> None:
+    path = tmp_path / "config.json"
+    _write(path, _cfg(), 0)
+    scanner = Scanner(load_config(str(path)))
+    assert scanner.w3 is None
+
+    cfg = _cfg()
+    cfg["gas_price_gwei_override"] = None
+    _write(path, cfg, 1)
+    applied, _ = asyncio.run(scanner.apply_config(load_config(str(path))))
+
+    assert applied == {"gas_price_gwei_override"}
+    assert scanner.w3 is not None
+    asyncio.run(scanner.close())
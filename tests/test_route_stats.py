@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import json
+
+from src.config_loader import validate_config
+from src.records import RouteFlags, RouteResult
+from src.route_stats import RouteLog, RouteStatsAggregator
+
+from tests.test_config_loader_minimal import _valid_cfg
+
+
+def _logging_cfg(**overrides) -> dict:
+    cfg = _valid_cfg()
+    cfg["logging"] = overrides
+    return validate_config(cfg)["logging"]
+
+
+def _row(net: float | None, status: str = "ok", error: str | None = None, ts: float = 0.0) -> RouteResult:
+    row = RouteResult(ts, 1, "uniswap", "loop2", ("USDC", "WETH"), 100.0, 10**8, [], 180000, 10, RouteFlags())
+    row.net_usd_est = net
+    row.status = status
+    row.error_message = error
+    return row
+
+
+def test_rolling_stats_track_ewma_hits_errors_and_last_change() -> None:
+    agg = RouteStatsAggregator(_logging_cfg(ewma_alpha=0.5))
+    for i, row in enumerate([_row(1.0), _row(-1.0), _row(None, "error", "http_429"), _row(None, "error", "http_429"), _row(3.0)]):
+        row.ts = float(i)
+        agg.observe([row])
+
+    st = agg.routes["loop2:USDC-WETH:100.0"].to_dict()
+    assert st["n"] == 5
+    assert st["ok_rate"] == 0.6 and st["hit_rate"] == 0.4
+    assert st["ewma_net_usd"] == 1.5  # 1 -> 0 -> (errors skipped) -> 1.5
+    assert st["errors"] == {"http_429": 2}
+    assert st["last_changed_ts"] == 4.0
+
+
+def test_change_only_filter_logs_status_changes_crossings_and_drift() -> None:
+    agg = RouteStatsAggregator(_logging_cfg(net_change_usd=0.1, net_thresholds_usd=[0.0]))
+    seq = [-0.50, -0.48, -0.46, -0.02, 0.01, 0.02, None, None, 0.02]
+    logged = [bool(agg.observe([_row(n, "ok" if n is not None else "error", None if n is not None else "x")])) for n in seq]
+
+    # first row; drift >= 0.1 from the last logged -0.50; crossing 0; status change to error; back to ok.
+    assert logged == [True, False, False, True, True, False, True, False, True]
+    summary = agg.summary()
+    assert (summary["rows_seen"], summary["rows_changed"]) == (9, 5)
+    assert agg.summary()["rows_seen"] == 0
+
+
+def test_route_log_changes_mode_writes_less_and_summarises(tmp_path) -> None:
+    log = RouteLog(str(tmp_path), _logging_cfg(mode="changes", summary_interval_sec=3600))
+    for net in (0.5, 0.5, 0.51, 0.5):
+        log.write_cycle([_row(net)])
+    log.close()
+
+    rows = [json.loads(line) for p in tmp_path.glob("*[0-9].jsonl") for line in p.read_text().splitlines()]
+    summaries = [json.loads(line) for p in tmp_path.glob("*.summary.jsonl") for line in p.read_text().splitlines()]
+    assert len(rows) == 1 and rows[0]["log_mode"] == "changes"
+    assert len(summaries) == 1
+    assert summaries[0]["rows_seen"] == 4 and summaries[0]["routes"]["loop2:USDC-WETH:100.0"]["n"] == 4
+
+
+def test_summary_counts_cover_one_window_and_reload_evicts_routes(tmp_path) -> None:
+    log = RouteLog(str(tmp_path), _logging_cfg(summary_interval_sec=3600))
+    other = _row(1.0)
+    other.route = ("USDC", "DAI")
+    log.write_cycle([_row(1.0), other])
+    log.write_cycle([_row(None, "error", "http_429")])
+    first = log.stats.summary()
+    log.write_cycle([_row(2.0)])
+    second = log.stats.summary()
+
+    assert first["routes"]["loop2:USDC-WETH:100.0"]["n"] == 2
+    window = second["routes"]["loop2:USDC-WETH:100.0"]
+    assert (window["n"], window["ok_rate"], window["errors"]) == (1, 1.0, {})
+    assert window["ewma_net_usd"] is not None  # the EWMA spans windows
+
+    log.retain({"loop2:USDC-WETH:100.0"})
+    log.configure(_logging_cfg(mode="changes", summary_interval_sec=0))
+    assert list(log.stats.routes) == ["loop2:USDC-WETH:100.0"]
+    assert (log.mode, log.summary_interval_sec) == ("changes", 0.0)
+    log.close()
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+import requests
+from web3 import Web3
+
+from src.deadline import DEADLINE_EXCEEDED, cycle_deadline
+from src.rpc_pool import DeadlineHTTPProvider, PooledHTTPProvider, RpcEndpointError, RpcEndpointPool
+
+from tests.fakes import StubRpcServer
+
+GAS = {"eth_gasPrice": hex(7_000_000_000)}
+
+
+def test_routes_to_lower_latency_endpoint() -> None:
+    with StubRpcServer(GAS, delay_sec=0.08) as slow, StubRpcServer(GAS) as fast:
+        pool = RpcEndpointPool([slow.url, fast.url], hedge=False)
+        w3 = Web3(PooledHTTPProvider(pool))
+        for _ in range(10):
+            assert w3.eth.gas_price == 7_000_000_000
+        pool.close()
+
+    assert slow.calls <= 2
+    assert fast.calls >= 8
+
+
+def test_hedged_request_beats_slow_primary() -> None:
+    with StubRpcServer(GAS, delay_sec=1.0) as slow, StubRpcServer(GAS) as fast:
+        pool = RpcEndpointPool([slow.url, fast.url], hedge_min_delay_sec=0.02, hedge_default_delay_sec=0.05)
+        # Pretend the slow node was the best one so far so it gets picked as primary.
+        pool.endpoints[0].ewma_latency = 0.001
+        pool.endpoints[1].ewma_latency = 0.5
+
+        started = time.perf_counter()
+        assert Web3(PooledHTTPProvider(pool)).eth.gas_price == 7_000_000_000
+        elapsed = time.perf_counter() - started
+        pool.close()
+
+    assert elapsed < 0.5
+    assert pool.hedges_sent == 1
+    assert pool.hedges_won == 1
+
+
+def test_failing_endpoint_fails_over_and_is_penalised() -> None:
+    dead = "http://127.0.0.1:9"  # discard port: connection refused
+    with StubRpcServer(GAS, status=503) as broken, StubRpcServer(GAS) as healthy:
+        pool = RpcEndpointPool([broken.url, dead, healthy.url], hedge=False)
+        w3 = Web3(PooledHTTPProvider(pool))
+        for _ in range(20):
+            assert w3.eth.gas_price == 7_000_000_000
+        pool.close()
+
+    stats = {s["url"]: s for s in pool.snapshot()}
+    # Neither failing endpoint ever succeeded; one failure each is enough to stop choosing them.
+    assert broken.calls == 1
+    assert stats[dead]["requests"] == 1
+    assert stats[broken.url]["ewma_error"] > stats[healthy.url]["ewma_error"]
+    assert healthy.calls == 20
+
+
+def test_requests_stop_at_the_cycle_deadline() -> None:
+    with StubRpcServer(GAS, delay_sec=1.0) as a, StubRpcServer(GAS, delay_sec=1.0) as b:
+        for hedge in (False, True):
+            pool = RpcEndpointPool([a.url, b.url], hedge=hedge, hedge_default_delay_sec=0.05)
+            w3 = Web3(PooledHTTPProvider(pool))
+            started = time.perf_counter()
+            with cycle_deadline(0.2), pytest.raises(RpcEndpointError):
+                w3.eth.gas_price
+            assert time.perf_counter() - started < 0.6
+            pool.close()
+
+
+def test_single_endpoint_provider_clips_timeout_to_the_cycle_deadline() -> None:
+    with StubRpcServer(GAS, delay_sec=1.0) as slow:
+        w3 = Web3(DeadlineHTTPProvider(slow.url))
+        started = time.perf_counter()
+        # web3 retries timeouts itself; whichever attempt runs past the budget gives up.
+        with cycle_deadline(0.2), pytest.raises((requests.exceptions.Timeout, RpcEndpointError)):
+            w3.eth.gas_price
+        assert time.perf_counter() - started < 0.6
+        with cycle_deadline(0), pytest.raises(RpcEndpointError, match=DEADLINE_EXCEEDED):
+            w3.eth.gas_price
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import queue
+import threading
+
+from src.sharding import ShardCoordinator, _shard_worker, partition_candidates, shard_loads
+
+from tests.test_reload import _cfg
+
+
+def _cands(n: int) -> list:
+    return [("loop2", ("USDC", f"T{i}"), 100.0) for i in range(n)]
+
+
+def test_partition_balances_by_observed_cost() -> None:
+    cands = _cands(6)
+    costs = {cands[0]: 6.0, cands[1]: 3.0, cands[2]: 3.0, cands[3]: 2.0, cands[4]: 1.0, cands[5]: 1.0}
+
+    parts = partition_candidates(cands, 2, costs)
+
+    assert sorted(c for part in parts for c in part) == sorted(cands)
+    assert shard_loads(parts, costs) == [8.0, 8.0]
+
+
+def test_partition_uses_default_cost_for_unseen_candidates() -> None:
+    cands = _cands(5)
+
+    parts = partition_candidates(cands, 3, {}, default_cost=1.0)
+
+    assert sorted(len(p) for p in parts) == [1, 2, 2]
+
+
+def test_coordinator_keeps_balanced_plan_and_rebalances_on_skew(tmp_path) -> None:
+    cfg = _cfg()
+    cfg["sharding"] = {"cost_ewma_alpha": 0.5, "rebalance_imbalance": 1.25}
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps(cfg), encoding="utf-8")
+    coord = ShardCoordinator(str(path), 2)
+    cands = _cands(4)
+
+    first = coord._plan(cands)
+    assert coord.rebalances == 1
+    coord._observe_costs({c: 1.0 for c in cands})
+    assert coord._plan(cands) is first
+    assert coord.rebalances == 1
+
+    # EWMA: one slow cycle on a single route moves its cost halfway, enough to skew its shard.
+    slow = first[0][0]
+    coord._observe_costs({slow: 9.0})
+    assert coord.costs[slow] == 5.0
+    parts = coord._plan(cands)
+    assert coord.rebalances == 2
+    assert sorted(shard_loads(parts, coord.costs)) == [3.0, 5.0]
+    assert [slow] in parts
+
+
+def test_shard_worker_survives_a_reload_it_cannot_apply(tmp_path, capsys) -> None:
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps(_cfg()), encoding="utf-8")
+    inbox, outbox = queue.Queue(), queue.Queue()
+    worker = threading.Thread(target=_shard_worker, args=(str(path), inbox, outbox, 1, 2))
+    worker.start()
+    inbox.put([])
+    outbox.get(timeout=10)
+    bad = _cfg()
+    bad["quote_source"] = "uniswap"
+    bad["uniswap"] = {"factory_address": ""}
+    path.write_text(json.dumps(bad), encoding="utf-8")
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+    inbox.put([])
+    shard_id, rows, *_ = outbox.get(timeout=10)
+    inbox.put(None)
+    worker.join(timeout=10)
+
+    assert (shard_id, rows) == (1, [])
+    assert "[shard1] config reload failed, keeping running config" in capsys.readouterr().out
+
+
+def test_curve_finalist_budget_is_split_across_shards() -> None:
+    from src.config_loader import validate_config
+    from src.main import Scanner
+    from src.tokens import PRICE_SCALE
+
+    cfg = _cfg()
+    cfg["curve_model"] = {"enabled": True, "finalists": 5}
+    for i in range(8):
+        cfg["tokens"][f"T{i}"] = {"symbol": f"T{i}", "address": "0x1", "decimals": 6, "is_stable": True}
+    scanner = Scanner(validate_config(cfg))
+    try:
+        for i in range(8):
+            for pair in (("USDC", f"T{i}"), (f"T{i}", "USDC")):
+                for _ in range(2):
+                    scanner.curves.observe(*pair, 100 * 10**6, 100 * 10**6)
+        scanner.pruner.observe_prices("USDC", PRICE_SCALE, PRICE_SCALE, 180000)
+        cands = _cands(8)
+
+        kept = []
+        for shard_id in range(2):
+            scanner.shard = (shard_id, 2)
+            kept.append(len(scanner.screen(cands[shard_id::2])))
+
+        assert kept == [3, 2]
+    finally:
+        asyncio.run(scanner.close())
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+from web3 import Web3
+
+from src.config_loader import validate_config
+from src.main import Scanner, build_snapshot_saver
+from src.quote.base import QuoteResult
+from src.quote.breaker import OPEN, BreakerRegistry
+from src.quote.uniswap_v3 import UniswapV3QuoteProvider
+from src.snapshot import load_snapshot, save_snapshot
+from src.tools.loadtest import FACTORY, QUOTER_V1, QUOTER_V2, TOKENS
+
+from tests.test_config_loader_minimal import _valid_cfg
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_load_snapshot_checks_version_chain_and_age(tmp_path) -> None:
+    path = str(tmp_path / "snap.json")
+    save_snapshot(path, 1, {"breakers": [], "pruner": {"token_usd": {}}})
+
+    components, age = load_snapshot(path, 1, max_age_sec=60, volatile_max_age_sec=60)
+    assert set(components) == {"breakers", "pruner"} and age < 5
+    assert load_snapshot(path, 8453, max_age_sec=60, volatile_max_age_sec=60) is None
+    assert load_snapshot(str(tmp_path / "missing.json"), 1, 60, 60) is None
+
+    payload = json.loads((tmp_path / "snap.json").read_text())
+    payload["saved_at"] -= 120
+    (tmp_path / "snap.json").write_text(json.dumps(payload))
+    components, _ = load_snapshot(path, 1, max_age_sec=600, volatile_max_age_sec=60)
+    assert set(components) == {"breakers"}  # price state is too old to trust
+    assert load_snapshot(path, 1, max_age_sec=60, volatile_max_age_sec=60) is None
+
+    payload["version"] = 0
+    (tmp_path / "snap.json").write_text(json.dumps(payload))
+    assert load_snapshot(path, 1, max_age_sec=600, volatile_max_age_sec=600) is None
+
+
+def test_breaker_state_survives_restart_minus_downtime() -> None:
+    old = BreakerRegistry(failure_threshold=1, base_cooldown_sec=100, clock=FakeClock(50.0))
+    old.record_failure(("pool", "A", "B", 500))
+    state = json.loads(json.dumps(old.export_state()))
+
+    clock = FakeClock(7.0)
+    new = BreakerRegistry(failure_threshold=1, base_cooldown_sec=100, clock=clock)
+    new.import_state(state, age_sec=40)
+
+    key = ("pool", "A", "B", 500)
+    assert new.state(key) == OPEN
+    assert not new.allow(key)
+    clock.now = 7.0 + 60
+    assert new.allow(key)
+
+
+def test_scanner_warm_start_restores_components(tmp_path) -> None:
+    cfg = _valid_cfg()
+    cfg["quote_source"] = "1inch"
+    cfg["gas_price_gwei_override"] = 1
+    cfg["pruning"] = {"enabled": True}
+    cfg["curve_model"] = {"enabled": True}
+    cfg["snapshot"] = {"enabled": True, "path": str(tmp_path / "snap.json")}
+
+    first = Scanner(validate_config(json.loads(json.dumps(cfg))))
+    first.pruner.observe_quote(QuoteResult(True, 10**6, 300, "USDC", "WETH"))
+    first.pruner.token_usd["USDC"] = 1.0
+    first.curves.observe("USDC", "WETH", 10**8, 3 * 10**16)
+    first.route_costs[("loop2", ("USDC", "WETH"), 100.0)] = 0.25
+    build_snapshot_saver(first).save()
+
+    second = Scanner(validate_config(json.loads(json.dumps(cfg))))
+    saver = build_snapshot_saver(second)
+    try:
+        assert saver is not None
+        assert second.pruner.mid_rates == {("USDC", "WETH"): 0.0003}
+        assert second.pruner.token_usd == {"USDC": 1.0}
+        assert second.curves.anchors[("USDC", "WETH")][(10**8).bit_length()][:2] == (10**8, 3 * 10**16)
+        assert second.route_costs == {("loop2", ("USDC", "WETH"), 100.0): 0.25}
+    finally:
+        asyncio.run(first.close())
+        asyncio.run(second.close())
+
+
+def test_uniswap_fee_preferences_survive_snapshot() -> None:
+    uni_cfg = {"factory_address": FACTORY, "quoter_v2_address": QUOTER_V2, "quoter_address": QUOTER_V1}
+    w3 = Web3(Web3.HTTPProvider("http://127.0.0.1:9"))
+    first = UniswapV3QuoteProvider(w3, TOKENS, uni_cfg)
+    first._prefer("USDC", "WETH", 3000)
+
+    second = UniswapV3QuoteProvider(w3, TOKENS, uni_cfg)
+    second.import_state(json.loads(json.dumps(first.export_state())), age_sec=0.0)
+
+    assert second._fee_order("USDC", "WETH") == [3000, 500, 10000]
+    assert second._fee_order("WETH", "USDC") == [500, 3000, 10000]
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from decimal import ROUND_DOWN, Decimal, localcontext
+
+import pytest
+
+from src.tokens import from_wei, to_wei
+
+
+def _reference_to_wei(amount, decimals: int) -> int:
+    with localcontext() as ctx:
+        ctx.prec = 80
+        return int((Decimal(str(amount)) * Decimal(10) ** decimals).quantize(Decimal("1"), rounding=ROUND_DOWN))
+
+
+@pytest.mark.parametrize(
+    "amount",
+    [0, 100, 100.0, 0.1, 0.05, 1e-05, 2.5e-3, 1e20, 123456789.987654321, -1.5, "1.23456789012345678901234", ".5", "5.", Decimal("3.14")],
+)
+@pytest.mark.parametrize("decimals", [0, 6, 9, 18])
+def test_to_wei_matches_decimal_reference(amount, decimals: int) -> None:
+    assert to_wei(amount, decimals) == _reference_to_wei(amount, decimals)
+
+
+def test_from_wei_keeps_full_precision() -> None:
+    assert from_wei(123456789012345678901234567890, 18) == Decimal("123456789012.345678901234567890")
@@ -0,0 +1,151 @@
+import json
+
+import pytest
+
+from src.tools import whatif
+from src.tools.whatif import iter_rows, load_rows, main, parse_gas_units, parse_ladder, sweep
+
+
+@pytest.fixture(params=[False, True], ids=["python", "numpy"])
+def vectorized(request):
+    if request.param and whatif.np is None:
+        pytest.skip("numpy not installed")
+    return request.param
+
+
+def _row(route_type, symbols, amount, gross, gas_units=180000, gwei=1.0, bps=10.0, amount_usd=None, status="ok"):
+    amount_usd = amount if amount_usd is None else amount_usd
+    gas = gas_units * gwei * 1e9 * 2000.0 / 1e18  # ETH at $2000
+    buffer = amount_usd * bps / 1e4
+    return {
+        "ts_iso": "2026-01-01T00:00:00+00:00",
+        "chainId": 8453,
+        "route_type": route_type,
+        "route_symbols": [*symbols, symbols[0]],
+        "amount_in_human": amount,
+        "amount_in_wei": str(int(amount * 10**6)),
+        "gross_return_wei": str(int(gross * 10**6)),
+        "gross_return_usd_est": gross,
+        "gas_price_wei": int(gwei * 1e9),
+        "gas_units_est": gas_units,
+        "gas_cost_usd_est": gas,
+        "buffer_bps": bps,
+        "buffer_usd_est": buffer,
+        "net_usd_est": gross - gas - buffer,
+        "status": status,
+    }
+
+
+def _write_logs(tmp_path):
+    rows = [
+        # loop2 gas = 0.36, buffer = 0.1 (0.01 at 10 USDC) -> net 0.54 / 0.04 / -0.12
+        _row("loop2", ["USDC", "WETH"], 100, 1.0),
+        _row("loop2", ["USDC", "WETH"], 100, 0.5),
+        _row("loop2", ["USDC", "DAI"], 10, 0.25),
+        # triangle gas = 0.52, buffer = 0.5 -> net 0.98
+        _row("triangle3", ["USDC", "WETH", "DAI"], 500, 2.0, gas_units=260000),
+        _row("loop2", ["USDC", "WETH"], 100, 9.0, status="quote_failed"),
+    ]
+    (tmp_path / "8453").mkdir()
+    with (tmp_path / "8453" / "20260101.jsonl").open("w") as f:
+        f.writelines(json.dumps(r) + "\n" for r in rows)
+        f.write("{not json\n")
+    (tmp_path / "8453" / "20260101.summary.jsonl").write_text(json.dumps({"kind": "route_summary"}) + "\n")
+    return tmp_path
+
+
+def test_recorded_settings_reproduce_the_logged_net(tmp_path, vectorized):
+    cache = tmp_path / "cache"
+    rows = load_rows([str(_write_logs(tmp_path))], cache_dir=str(cache))
+    assert len(rows) == 4
+    assert rows.skipped == {"status_not_ok": 1, "bad_json": 1}
+    assert list(cache.iterdir())
+
+    cached = load_rows([str(tmp_path / "8453")], cache_dir=str(cache))
+    assert list(cached.gross) == list(rows.gross) and cached.routes == rows.routes
+
+    report = sweep(rows, top=3, vectorized=vectorized)
+    base, point = report["baseline"], report["points"][0]
+    assert base["profitable"] == point["profitable"] == 3
+    assert point["profitable_net_usd"] == pytest.approx(base["profitable_net_usd"])
+    assert [r["route"] for r in point["top"]] == [r["route"] for r in base["top"]]
+    assert point["top"][0]["route"] == "8453:triangle3:USDC-WETH-DAI:500"
+    assert point["top_overlap"] == 3
+
+
+def test_cost_grid_shifts_counts_and_rankings(tmp_path, vectorized):
+    rows = load_rows([str(_write_logs(tmp_path))])
+    report = sweep(rows, slippage_bps=[10, 50], gas_price_gwei=[None, 0.1], top=2, vectorized=vectorized)
+    by_setting = {(p["gas_price_gwei"], p["slippage_bps"]): p for p in report["points"]}
+
+    assert by_setting[(None, 10)]["profitable"] == 3
+    # 50 bps: triangle buffer 2.5 > gross, the big loop2 row nets 1.0 - 0.36 - 0.5.
+    wide = by_setting[(None, 50)]
+    assert wide["profitable"] == 1
+    assert wide["profitable_net_usd"] == pytest.approx(0.14)
+    assert wide["top"][0]["route"] == "8453:loop2:USDC-WETH:100"
+    assert wide["top"][0]["baseline_rank"] == 2
+    # Cheap gas: every row clears at 10 bps, loop2 net = gross - 0.036 - buffer.
+    cheap = by_setting[(0.1, 10)]
+    assert cheap["profitable"] == 4
+    assert cheap["profitable_net_usd"] == pytest.approx((1.0 - 0.136) + (0.5 - 0.136) + (0.25 - 0.046) + (2.0 - 0.552))
+
+
+def test_gas_units_and_ladders_are_grid_axes(tmp_path, vectorized):
+    rows = load_rows([str(_write_logs(tmp_path))])
+    assert parse_gas_units("triangle3=1000000") == {"triangle3": 1000000}
+    assert parse_ladder("recorded") == ("recorded", None)
+
+    report = sweep(
+        rows,
+        gas_units=[None, parse_gas_units("triangle3=1000000")],
+        ladders=[("recorded", None), parse_ladder("USDC=100")],
+        vectorized=vectorized,
+    )
+    points = {(p["ladder"], p["gas_units"] is None): p for p in report["points"]}
+    # 1M units on the triangle costs $2, wiping out its $2 gross.
+    assert points[("recorded", False)]["profitable"] == 2
+    # The ladder keeps only the 100 USDC routes.
+    only_100 = points[("USDC=100", True)]
+    assert only_100["rows"] == 2
+    assert {r["route"] for r in only_100["top"]} == {"8453:loop2:USDC-WETH:100"}
+
+
+def test_streamed_files_sweep_like_one_table(tmp_path, vectorized):
+    logs = _write_logs(tmp_path)
+    (logs / "8453" / "20260102.jsonl").write_text(
+        "".join(json.dumps(_row("loop2", ["USDC", s], 100, g)) + "\n" for s, g in (("WETH", 2.0), ("CBBTC", 0.3)))
+    )
+    grid = {"slippage_bps": [None, 50], "gas_price_gwei": [None, 0.1], "ladders": [("recorded", None), parse_ladder("USDC=100")]}
+
+    whole = sweep(load_rows([str(logs)]), vectorized=vectorized, **grid)
+    streamed = sweep(iter_rows([str(logs)], jobs=2), vectorized=vectorized, **grid)
+
+    assert streamed["baseline"]["rows"] == whole["baseline"]["rows"] == 6
+    assert streamed["baseline"]["routes"] == 4
+    for a, b in zip(streamed["points"], whole["points"]):
+        assert (a["rows"], a["profitable"], a["top"]) == (b["rows"], b["profitable"], b["top"])
+        assert a["profitable_net_usd"] == pytest.approx(b["profitable_net_usd"])
+
+
+def test_cache_is_json_header_plus_raw_columns_and_keeps_change_only_marker(tmp_path, monkeypatch, capsys):
+    logs = _write_logs(tmp_path)
+    marked = _row("loop2", ["USDC", "WETH"], 100, 1.0)
+    marked["log_mode"] = "changes"
+    with (logs / "8453" / "20260102.jsonl").open("w") as f:
+        f.write(json.dumps(marked) + "\n")
+    cache = tmp_path / "cache"
+
+    rows = load_rows([str(logs / "8453")], cache_dir=str(cache))
+    cached = load_rows([str(logs / "8453")], cache_dir=str(cache))
+
+    assert rows.change_only == cached.change_only == 1
+    assert cached.skipped == rows.skipped and list(cached.net) == list(rows.net)
+    for f in cache.iterdir():
+        assert json.loads(f.read_bytes().split(b"\n", 1)[0])["rows"] in (1, 4)
+
+    monkeypatch.setattr("sys.argv", ["whatif", str(logs / "8453"), "--no-cache"])
+    with pytest.raises(SystemExit) as exc:
+        main()
+    assert exc.value.code == 2
+    assert "change-only" in capsys.readouterr().err